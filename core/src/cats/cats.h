@@ -44,6 +44,7 @@
 #include "lib/source_location.h"
 
 #include <bitset>
+#include <optional>
 #include <string>
 #include <stdexcept>
 #include <system_error>
@@ -146,6 +147,10 @@ struct JobDbRecord {
   // Extra stuff not in DB
   uint64_t limit = 0;  /**< limit records to display */
   uint64_t offset = 0; /**< offset records to display */
+  // keyset pagination: list jobs ordered by JobId, after this JobId
+  std::optional<JobId_t> after_JobId{};
+  // set by ListJobRecords(): last JobId read, also if filtered by an ACL
+  std::optional<JobId_t> last_JobId{};
   faddr_t rec_addr = 0;
   uint32_t FileIndex = 0; /**< added during Verify */
 };
@@ -342,6 +347,10 @@ struct MediaDbRecord {
 
   // Extra stuff not in DB
   faddr_t rec_addr = 0; /**< found record address */
+  // keyset pagination: list volumes ordered by MediaId, after this MediaId
+  std::optional<DBId_t> after_MediaId{};
+  // set by ListMediaRecords(): last MediaId read, also if filtered by an ACL
+  std::optional<DBId_t> last_MediaId{};
 
   // Since the database returns times as strings, this is how we pass them back.
   char cFirstWritten[MAX_TIME_LENGTH]{0}; /**< FirstWritten returned from DB */
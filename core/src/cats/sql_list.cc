@@ -216,6 +216,12 @@ void BareosDb::ListMediaRecords(JobControlRecord* jcr,
    * malformed SQL queries. */
   if (range == NULL) { range = ""; }
 
+  // Keyset pagination: continue after the last MediaId of the previous page.
+  PoolMem after(PM_MESSAGE);
+  if (mdbr->after_MediaId) {
+    after.bsprintf(" AND MediaId > %s", edit_int64(*mdbr->after_MediaId, ed1));
+  }
+
   if (count) {
     /* NOTE: ACLs are ignored. */
     if (mdbr->VolumeName[0] != 0) {
@@ -236,11 +242,15 @@ void BareosDb::ListMediaRecords(JobControlRecord* jcr,
     if (mdbr->VolumeName[0] != 0) {
       query.bsprintf("%s WHERE VolumeName='%s'", select.c_str(), esc);
     } else if (mdbr->PoolId > 0) {
-      query.bsprintf("%s WHERE PoolId=%s ORDER BY MediaId %s", select.c_str(),
-                     edit_int64(mdbr->PoolId, ed1), range);
+      query.bsprintf("%s WHERE PoolId=%s%s ORDER BY MediaId %s", select.c_str(),
+                     edit_int64(mdbr->PoolId, ed1), after.c_str(), range);
     } else if (mdbr->MediaId > 0) {
       query.bsprintf("%s WHERE MediaId=%s ORDER BY MediaId %s", select.c_str(),
                      edit_int64(mdbr->MediaId, ed1), range);
+    } else if (mdbr->after_MediaId) {
+      query.bsprintf("%s WHERE MediaId > %s ORDER BY MediaId %s",
+                     select.c_str(), edit_int64(*mdbr->after_MediaId, ed1),
+                     range);
     } else {
       query.bsprintf("%s ORDER BY MediaId %s", select.c_str(), range);
     }
@@ -252,6 +262,15 @@ void BareosDb::ListMediaRecords(JobControlRecord* jcr,
 
   ListResult(jcr, sendit, type);
 
+  /* Keyset pagination: the next page continues after the last row read,
+   * even if the output filters have suppressed it (MediaId is column 0). */
+  if (mdbr->after_MediaId && !count && SqlNumRows() > 0) {
+    SqlDataSeek(SqlNumRows() - 1);
+    if (SQL_ROW row = SqlFetchRow()) {
+      mdbr->last_MediaId = str_to_uint64(row[0]);
+    }
+  }
+
   SqlFreeResult();
 }
 
@@ -524,6 +543,16 @@ void BareosDb::ListJobRecords(JobControlRecord* jcr,
     PmStrcat(selection, temp.c_str());
   }
 
+  /* Keyset pagination: continue after the last JobId of the previous page.
+   * In contrast to OFFSET, the database does not have to scan the skipped
+   * rows, but the jobs must be ordered by JobId instead of StartTime. */
+  const char* order = "StartTime";
+  if (jr->after_JobId) {
+    temp.bsprintf("AND Job.JobId > %s ", edit_int64(*jr->after_JobId, ed1));
+    PmStrcat(selection, temp.c_str());
+    order = "Job.JobId";
+  }
+
   if (jr->Name[0] != 0) {
     EscapeString(jcr, esc, jr->Name, strlen(jr->Name));
     temp.bsprintf("AND Job.Name = '%s' ", esc);
@@ -578,15 +607,16 @@ void BareosDb::ListJobRecords(JobControlRecord* jcr,
     FillQuery(SQL_QUERY::list_jobs_count, selection.c_str(), range);
   } else if (last) {
     if (type == VERT_LIST) {
-      FillQuery(SQL_QUERY::list_jobs_long_last, selection.c_str(), range);
+      FillQuery(SQL_QUERY::list_jobs_long_last, selection.c_str(), order,
+                range);
     } else {
-      FillQuery(SQL_QUERY::list_jobs_last, selection.c_str(), range);
+      FillQuery(SQL_QUERY::list_jobs_last, selection.c_str(), order, range);
     }
   } else {
     if (type == VERT_LIST) {
-      FillQuery(SQL_QUERY::list_jobs_long, selection.c_str(), range);
+      FillQuery(SQL_QUERY::list_jobs_long, selection.c_str(), order, range);
     } else {
-      FillQuery(SQL_QUERY::list_jobs, selection.c_str(), range);
+      FillQuery(SQL_QUERY::list_jobs, selection.c_str(), order, range);
     }
   }
 
@@ -596,6 +626,13 @@ void BareosDb::ListJobRecords(JobControlRecord* jcr,
   ListResult(jcr, sendit, type);
   sendit->ArrayEnd("jobs");
 
+  /* Keyset pagination: the next page continues after the last row read,
+   * even if the output filters have suppressed it (JobId is column 0). */
+  if (jr->after_JobId && !count && SqlNumRows() > 0) {
+    SqlDataSeek(SqlNumRows() - 1);
+    if (SQL_ROW row = SqlFetchRow()) { jr->last_JobId = str_to_uint64(row[0]); }
+  }
+
   SqlFreeResult();
 }
 
@@ -181,7 +181,8 @@ const char list_cmd_usage[] = NT_(
     "jobs [job=<job-name>] [client=<client-name>] [jobstatus=<status>] "
     "[jobtype=<jobtype>] [joblevel=<joblevel>] [volume=<volumename>] "
     "[pool=<pool>] "
-    "[days=<number>] [hours=<number>] [last] [count] | "
+    "[days=<number>] [hours=<number>] [last] [count] "
+    "[after_jobid=<jobid>] | "
     "job=<job-name> [client=<client-name>] [jobstatus=<status>] "
     "[jobtype=<jobtype>] [joblevel=<joblevel>] [volume=<volumename>] "
     "[days=<number>] [hours=<number>] | "
@@ -203,7 +204,7 @@ const char list_cmd_usage[] = NT_(
     "poolid=<poolid> | "
     "storages | "
     "volumes [ jobid=<jobid> | ujobid=<complete_name> | pool=<pool-name> "
-    "| all ] [count] | "
+    "| all ] [count] [after_mediaid=<mediaid>] | "
     "volume=<volume-name> | "
     "volumeid=<volumeid> | "
     "mediaid=<volumeid> | "
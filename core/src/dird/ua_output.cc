@@ -527,6 +527,10 @@ static bool ListMedia(UaContext* ua,
     ua->db->ListVolumesOfJobid(ua->jcr, jobid, ua->send, llist);
   } else if (jobid == 0) {
     MediaDbRecord mr;
+    // Keyset pagination: only volumes with a MediaId higher than after_mediaid.
+    if (const char* value = GetArgValue(ua, NT_("after_mediaid"))) {
+      mr.after_MediaId = str_to_uint64(value);
+    }
     // List a specific volume?
     if (ua->argv[1]) {
       bstrncpy(mr.VolumeName, ua->argv[1], sizeof(mr.VolumeName));
@@ -554,6 +558,9 @@ static bool ListMedia(UaContext* ua,
         ua->db->ListMediaRecords(ua->jcr, &mr, query_range.c_str(),
                                  optionslist.count, ua->send, llist);
         ua->send->ArrayEnd("volumes");
+        if (mr.last_MediaId) {
+          ua->send->ObjectKeyValue("lastmediaid", *mr.last_MediaId);
+        }
         return true;
       } else {
         int num_pools;
@@ -579,6 +586,10 @@ static bool ListMedia(UaContext* ua,
           ua->db->ListMediaRecords(ua->jcr, &mr, query_range.c_str(),
                                    optionslist.count, ua->send, llist);
           ua->send->ArrayEnd("volumes");
+          // Keyset pagination: with ACLs, this can be behind the last volume.
+          if (mr.last_MediaId) {
+            ua->send->ObjectKeyValue("lastmediaid", *mr.last_MediaId);
+          }
         } else {
           // List Volumes in all pools
           if (!ua->db->GetPoolIds(ua->jcr, &num_pools, &ids)) {
@@ -643,6 +654,12 @@ static bool ListJobs(UaContext* ua,
     return false;
   }
 
+  /* Keyset pagination: only jobs with a JobId higher than after_jobid,
+   * ordered by JobId (also for after_jobid=0). */
+  if (const char* value = GetArgValue(ua, NT_("after_jobid"))) {
+    jr.after_JobId = str_to_uint64(value);
+  }
+
   int jobid = GetJobidFromCmdline(ua);
   if (jobid > 0) {
     jr.JobId = jobid;
@@ -724,6 +741,8 @@ static bool ListJobs(UaContext* ua,
                          optionslist.jobstatuslist, optionslist.joblevel_list,
                          optionslist.jobtypes, volumename, poolname, schedtime,
                          optionslist.last, optionslist.count, ua->send, llist);
+  // Keyset pagination: with ACLs, this can be behind the last listed job.
+  if (jr.last_JobId) { ua->send->ObjectKeyValue("lastjobid", *jr.last_JobId); }
 
   return true;
 }
@@ -1219,10 +1238,10 @@ static bool ParseListBackupsCmd(UaContext* ua,
 
   if (llist == VERT_LIST) {
     ua->db->FillQuery(ua->cmd, BareosDb::SQL_QUERY::list_jobs_long,
-                      selection.c_str(), criteria.c_str());
+                      selection.c_str(), "StartTime", criteria.c_str());
   } else {
     ua->db->FillQuery(ua->cmd, BareosDb::SQL_QUERY::list_jobs,
-                      selection.c_str(), criteria.c_str());
+                      selection.c_str(), "StartTime", criteria.c_str());
   }
 
   return true;
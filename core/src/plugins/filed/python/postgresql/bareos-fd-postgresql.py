@@ -37,6 +37,7 @@ import bareosfd
 from bareosfd import *
 
 from BareosFdPluginBaseclass import BareosFdPluginBaseclass
+from BareosFdDirectoryScanner import DirectoryScanner
 from BareosFdWrapper import *  # noqa
 
 
@@ -207,8 +208,12 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
         self.data_stream = None
         self.fname = ""
         self.file_type = ""
+        # paths (or tuples of path and os.lstat result) to backup and
+        # iterators over further ones, read while the backup runs
         self.paths_to_backup = deque()
         self.file_to_backup = ""
+        # threads reading directories ahead in __build_paths_to_backup
+        self.scan_workers = 4
         # Store os.stat of PG_VERSION as reference for our virtual files
         self.ref_statp = None
         # We need to get the stat-packet in set_file_attributes() and use it again
@@ -251,10 +256,11 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
 
     def __build_paths_to_backup(self, start_dir):
         """
-        Build the tree of paths to be backed up by recursing from top directory.
-        To be able to exclude the `ignore_subdirs` we use os.walk() with TopDown set to True.
-        The deque is reversed, so files appear first, and directories at the end.
-        `self.paths_to_backup` is extended with it.
+        Add the tree of paths to be backed up below start_dir.
+        The tree is walked by a DirectoryScanner, which is added to
+        `self.paths_to_backup` and read while the backup runs.
+        Its threads read the directories ahead, the `ignore_subdirs` are not
+        read at all. Files appear first, and their directory after them.
 
         This function is used to parse `data_directory`, `wal_archive_dir`, `tablespace`
         """
@@ -271,73 +277,75 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
         if not start_dir.endswith("/"):
             start_dir += "/"
         self.paths_to_backup.append(start_dir)
-        # local store for searching tree
-        _paths = deque()
-        try:
-            for topdir, dirnames, filenames in os.walk(start_dir, topdown=True):
-                # Usually Bareos takes care about timestamps when doing incremental backups
-                # but there we have to compare against last BackupPostgreSQL finish timestamp.
-                # to ensure valid comparison we will handle microsecond
-
-                # Filter out any ignored subdirectory
-                dirnames[:] = [
-                    dirname
-                    for dirname in dirnames
-                    if not dirname in self.ignore_subdirs
-                ]
-
-                for filename in filenames:
-                    if (
-                        not os.path.dirname(os.path.normpath(filename))
-                        in self.ignore_subdirs
-                        and not filename in self.ignore_files
-                    ):
-                        fullname = os.path.join(topdir, filename)
-                        try:
-                            # Avoid checking os.stat for Full we took them all.
-                            if chr(self.level) != "F":
-                                mtime = os.stat(fullname).st_mtime_ns
-                                if mtime > self.last_backup_stop_time:
-                                    bareosfd.DebugMessage(
-                                        150,
-                                        (
-                                            f"file:{fullname}"
-                                            f" fullTime: {self.last_backup_stop_time}"
-                                            f" os.st_mtime: {mtime}\n"
-                                        ),
-                                    )
-                                    _paths.append(fullname)
-                            else:
-                                # Create the reference file
-                                if filename == "PG_VERSION":
-                                    self.ref_statp = os.stat(fullname)
-                                _paths.append(fullname)
-                        except os.error as os_error:
-                            # if can't stat the file, record a debug message warning
-                            # and don't annoy user with that in joblog
-                            bareosfd.DebugMessage(
-                                150,
-                                f"Warning Skip Could not stat file {fullname}: {os_error}\n",
-                            )
-                            continue
-                # we don't care about mtime for dirs.
-                for dirname in dirnames:
-                    if not dirname in self.ignore_subdirs:
-                        fulldirname = os.path.join(topdir, dirname) + "/"
-                        _paths.append(fulldirname)
-        except os.error as os_error:
-            bareosfd.DebugMessage(
-                100, f"os error raised in __build_paths_to backup(), error {os_error}\n"
-            )
-            raise
-        except Exception as global_error:
-            bareosfd.DebugMessage(
-                100,
-                f"unexpected error happen in __build_paths_to backup(), error {global_error}\n",
+
+        # Usually Bareos takes care about timestamps when doing incremental backups
+        # but there we have to compare against last BackupPostgreSQL finish timestamp.
+        # It is taken now, as it is updated before the tree is walked.
+        is_full = chr(self.level) == "F"
+        last_backup_stop_time = self.last_backup_stop_time
+
+        def dir_filter(path):
+            return os.path.basename(path) not in self.ignore_subdirs
+
+        def target_stat(path, statp):
+            """
+            Returns the os.stat result of path, reusing the os.lstat result
+            statp, unless path is a symbolic link, or None on errors.
+            """
+            if statp is not None and not stat.S_ISLNK(statp.st_mode):
+                return statp
+            try:
+                return os.stat(path)
+            except os.error as os_error:
+                # if can't stat the file, record a debug message warning
+                # and don't annoy user with that in joblog
+                bareosfd.DebugMessage(
+                    150,
+                    f"Warning Skip Could not stat file {path}: {os_error}\n",
+                )
+                return None
+
+        def file_filter(path, statp):
+            filename = os.path.basename(path)
+            if filename in self.ignore_files:
+                return False
+            # Avoid checking mtime for Full we took them all,
+            # symbolic links are backed up as links, even if dangling.
+            if is_full:
+                # Create the reference file
+                if filename == "PG_VERSION":
+                    self.ref_statp = target_stat(path, statp)
+                    return self.ref_statp is not None
+                return True
+            # the mtime of the link target is compared
+            statp = target_stat(path, statp)
+            if statp is None:
+                return False
+            if statp.st_mtime_ns > last_backup_stop_time:
+                bareosfd.DebugMessage(
+                    150,
+                    (
+                        f"file:{path}"
+                        f" fullTime: {last_backup_stop_time}"
+                        f" os.st_mtime: {statp.st_mtime_ns}\n"
+                    ),
+                )
+                return True
+            return False
+
+        def on_error(path, os_error):
+            bareosfd.JobMessage(
+                bareosfd.M_WARNING,
+                f"Could not read directory {path}: {os_error}\n",
             )
-            raise
 
-        _paths.reverse()
+        scanner = DirectoryScanner(
+            workers=self.scan_workers,
+            dir_filter=dir_filter,
+            file_filter=file_filter,
+            on_error=on_error,
+        )
+        self.paths_to_backup.append(scanner.walk(start_dir))
         # Now re-add excluded mandatory_subdirs as directory only.
         # But only for Full and `pg_working_dir`
         if (
@@ -345,9 +353,24 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
             and start_dir == self.cluster_configuration_parameters["data_directory"]
         ):
             for dirname in self.mandatory_subdirs:
-                _paths.append(os.path.join(start_dir, dirname) + "/")
+                self.paths_to_backup.append(os.path.join(start_dir, dirname) + "/")
 
-        self.paths_to_backup.extend(_paths)
+    def __has_paths_to_backup(self):
+        """
+        True, if there are paths left to backup.
+        An iterator at the front of `self.paths_to_backup` is advanced, until
+        a path is in front of it or it is exhausted.
+        """
+        while self.paths_to_backup:
+            item = self.paths_to_backup[0]
+            if isinstance(item, (str, tuple)):
+                return True
+            path = next(item, None)
+            if path is None:
+                self.paths_to_backup.popleft()
+            else:
+                self.paths_to_backup.appendleft(path)
+        return False
 
     def __check_cluster_configuration_parameters(self):
         """
@@ -1402,12 +1425,15 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
         We distinguish normal files from the virtuals and ROP.
         """
         bareosfd.DebugMessage(100, "start_backup_file called\n")
-        if not self.paths_to_backup:
+        if not self.__has_paths_to_backup():
             bareosfd.DebugMessage(100, "No files to backup\n")
             return bareosfd.bRC_Stop
 
+        statp = None
         try:
             self.file_to_backup = self.paths_to_backup.popleft()
+            if isinstance(self.file_to_backup, tuple):
+                self.file_to_backup, statp = self.file_to_backup
         except UnicodeEncodeError:
             bareosfd.JobMessage(
                 bareosfd.M_ERROR,
@@ -1460,33 +1486,32 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
                 savepkt.fname = self.file_to_backup
                 # register a debug warning and skip if file can't be read like in normal backup
                 try:
-                    # os.islink will detect links to directories only when
-                    # there is no trailing slash - we need to perform checks
-                    # on the stripped name but use it with trailing / for the backup itself
-                    if os.path.islink(self.file_to_backup.rstrip("/")):
-                        statp = os.lstat(self.file_to_backup)
+                    # links (also to directories) are stat'ed without trailing /,
+                    # otherwise their target would be stat'ed
+                    path = self.file_to_backup.rstrip("/")
+                    if statp is None:
+                        statp = os.lstat(path)
+                    if stat.S_ISLNK(statp.st_mode):
                         savepkt.type = bareosfd.FT_LNK
                         # tell the fd to not open the symlink
                         savepkt.no_read = True
-                        savepkt.link = os.readlink(self.file_to_backup.rstrip("/"))
+                        savepkt.link = os.readlink(path)
+                    elif stat.S_ISREG(statp.st_mode):
+                        savepkt.type = bareosfd.FT_REG
+                    elif stat.S_ISDIR(statp.st_mode):
+                        savepkt.type = bareosfd.FT_DIREND
+                        savepkt.link = self.file_to_backup
+                    elif stat.S_ISFIFO(statp.st_mode):
+                        savepkt.type = bareosfd.FT_FIFO
                     else:
-                        statp = os.stat(self.file_to_backup)
-                        if os.path.isfile(self.file_to_backup):
-                            savepkt.type = bareosfd.FT_REG
-                        elif os.path.isdir(self.file_to_backup):
-                            savepkt.type = bareosfd.FT_DIREND
-                            savepkt.link = self.file_to_backup
-                        elif stat.S_ISFIFO(os.stat(self.file_to_backup).st_mode):
-                            savepkt.type = bareosfd.FT_FIFO
-                        else:
-                            bareosfd.JobMessage(
-                                bareosfd.M_FATAL,
-                                (
-                                    f"Unknown error."
-                                    f"Don't know how to handle {self.file_to_backup}\n"
-                                ),
-                            )
-                            return bareosfd.bRC_Error
+                        bareosfd.JobMessage(
+                            bareosfd.M_FATAL,
+                            (
+                                f"Unknown error."
+                                f"Don't know how to handle {self.file_to_backup}\n"
+                            ),
+                        )
+                        return bareosfd.bRC_Error
 
                     my_statp.st_mode = statp.st_mode
                     my_statp.st_ino = statp.st_ino
@@ -1756,7 +1781,7 @@ class BareosFdPluginPostgreSQL(BareosFdPluginBaseclass):  # noqa
         empty and bareosfd.bRC_OK when we are done
         """
         bareosfd.DebugMessage(100, "end_backup_file() entry point in Python called\n")
-        if self.paths_to_backup:
+        if self.__has_paths_to_backup():
             return bareosfd.bRC_More
 
         if self.is_full_backup and self.is_backup_running:
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BAREOS - Backup Archiving REcovery Open Sourced
+#
+# Copyright (C) 2025-2025 Bareos GmbH & Co. KG
+#
+# This program is Free Software; you can redistribute it and/or
+# modify it under the terms of version three of the GNU Affero General Public
+# License as published by the Free Software Foundation, which is
+# listed in the file LICENSE.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.
+#
+# Author: Bareos Team
+#
+"""
+Concurrent walk of directory trees for Bareos python plugins
+
+Directories are read (os.scandir and os.lstat of every entry) by a pool of
+worker threads ahead of the plugin, so the metadata I/O overlaps with the
+data transfer of the files already found. This matters on network file
+systems, where every stat has the latency of a round trip.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+# kinds of directory entries
+FILE = 0
+DIRECTORY = 1
+# symbolic link to a directory, not followed
+DIRECTORY_LINK = 2
+
+
+def list_directory(dirname):
+    """
+    Reads the directory dirname, called by the worker threads.
+    Returns a tuple of the list of its entries (path, os.lstat result or None,
+    kind) and the OSError raised by os.scandir or None.
+    """
+    entries = []
+    try:
+        with os.scandir(dirname) as iterator:
+            for entry in iterator:
+                # is_symlink and is_dir(follow_symlinks=False) are answered
+                # from the directory listing without a syscall on most
+                # filesystems
+                try:
+                    if entry.is_symlink():
+                        kind = DIRECTORY_LINK if entry.is_dir() else FILE
+                    elif entry.is_dir(follow_symlinks=False):
+                        kind = DIRECTORY
+                    else:
+                        kind = FILE
+                except OSError:
+                    kind = FILE
+                try:
+                    statp = entry.stat(follow_symlinks=False)
+                except OSError:
+                    statp = None
+                entries.append((entry.path, statp, kind))
+    except OSError as e:
+        return entries, e
+    return entries, None
+
+
+class DirectoryScanner(object):
+    """
+    Walks directory trees with a pool of worker threads reading directories
+    ahead. The output is the same as of a single threaded walk, independent
+    of the order in which the workers finish: the contents of a directory
+    are yielded before the directory itself, in the order of os.scandir.
+
+    At most max_prefetch directory listings are read ahead of the walk,
+    which bounds the memory used. Directories are read ahead in the order
+    the walk will reach them.
+
+    The filters and on_error are only called by the thread iterating over
+    walk, so they can call bareosfd functions:
+    - dir_filter(path): only directories (and links to directories) for which
+      it returns True are yielded and walked.
+    - file_filter(path, statp): only files for which it returns True
+      are yielded. statp is the os.lstat result of the file or None.
+    - on_error(path, error): called, if the directory path can not be read.
+    """
+
+    def __init__(
+        self,
+        workers=4,
+        max_prefetch=16,
+        dir_filter=None,
+        file_filter=None,
+        on_error=None,
+    ):
+        self.workers = workers
+        self.max_prefetch = max_prefetch
+        self.dir_filter = dir_filter
+        self.file_filter = file_filter
+        self.on_error = on_error
+
+    def walk(self, topdir):
+        """
+        Generator yielding tuples of path and os.lstat result (or None)
+        of all files and directories below topdir (not topdir itself).
+        Directories and links to directories are yielded with trailing /,
+        links to directories are not followed.
+        """
+        walk = _Walk(self, topdir)
+        try:
+            for item in walk:
+                yield item
+        finally:
+            walk.close()
+
+
+class _Walk(object):
+    """
+    State of one DirectoryScanner.walk.
+    """
+
+    def __init__(self, scanner, topdir):
+        self.scanner = scanner
+        self.topdir = topdir
+        self.executor = ThreadPoolExecutor(max_workers=max(1, scanner.workers))
+        # directory -> future of list_directory, read ahead
+        self.futures = {}
+        # directories to read ahead, the next one to be reached by the walk last
+        self.candidates = []
+
+    def __iter__(self):
+        # directories being walked: (path, os.lstat result, remaining entries)
+        stack = [(self.topdir, None, iter(self.enter(self.topdir)))]
+        while stack:
+            dirname, dirstatp, entries = stack[-1]
+            for path, statp, kind in entries:
+                if kind == DIRECTORY:
+                    stack.append((path, statp, iter(self.enter(path))))
+                    break
+                if kind == DIRECTORY_LINK:
+                    yield path + "/", statp
+                elif self.scanner.file_filter is None or self.scanner.file_filter(
+                    path, statp
+                ):
+                    yield path, statp
+            else:
+                stack.pop()
+                if stack:
+                    yield dirname + "/", dirstatp
+
+    def enter(self, dirname):
+        """
+        Returns the entries of dirname, which the walk enters now.
+        Directories excluded by dir_filter are removed, the others are
+        read ahead.
+        """
+        future = self.futures.pop(dirname, None)
+        if future is None:
+            # not read ahead yet, usually the next candidate
+            if self.candidates and self.candidates[-1] == dirname:
+                self.candidates.pop()
+            elif dirname in self.candidates:
+                self.candidates.remove(dirname)
+            future = self.executor.submit(list_directory, dirname)
+        entries, error = future.result()
+        if error is not None and self.scanner.on_error is not None:
+            self.scanner.on_error(dirname, error)
+        if self.scanner.dir_filter is not None:
+            entries = [
+                (path, statp, kind)
+                for path, statp, kind in entries
+                if kind == FILE or self.scanner.dir_filter(path)
+            ]
+        self.candidates.extend(
+            reversed([path for path, statp, kind in entries if kind == DIRECTORY])
+        )
+        self.read_ahead()
+        return entries
+
+    def read_ahead(self):
+        while self.candidates and len(self.futures) < self.scanner.max_prefetch:
+            dirname = self.candidates.pop()
+            self.futures[dirname] = self.executor.submit(list_directory, dirname)
+
+    def close(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        self.candidates = []
+        self.executor.shutdown(wait=False)
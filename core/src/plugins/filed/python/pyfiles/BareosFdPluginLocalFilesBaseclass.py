@@ -29,6 +29,7 @@ import os
 import sys
 import re
 from BareosFdPluginBaseclass import BareosFdPluginBaseclass
+from BareosFdDirectoryScanner import DirectoryScanner
 import stat
 
 
@@ -50,7 +51,18 @@ class BareosFdPluginLocalFilesBaseclass(BareosFdPluginBaseclass):  # noqa
             plugindef, mandatory_options
         )
         self.files_to_backup = []
+        # iterators over further files to backup, read while the backup runs
+        self.file_iterators = []
+        # next file to backup and its stat result (or None), already taken
+        # from files_to_backup or file_iterators
+        self.next_file_to_backup = None
         self.file_to_backup = ""
+        # file type of file_to_backup for plugin_io_open
+        self.file_to_backup_io_type = None
+        # report the progress of walk_directory after this many entries
+        self.progress_interval = 100000
+        # threads reading directories ahead in walk_directory
+        self.scan_workers = 4
         # We need to get the stat-packet in set_file_attributes
         # and use it again in end_restore_file, and this may be mixed up
         # with different files
@@ -67,46 +79,159 @@ class BareosFdPluginLocalFilesBaseclass(BareosFdPluginBaseclass):  # noqa
         """
         self.files_to_backup.append(filename)
 
+    def append_files_to_backup(self, filenames):
+        """
+        Add an iterable of filenames (e.g. a generator like walk_directory)
+        to the files to backup. It is not read here, but entry by entry
+        while the backup runs, after the files in files_to_backup.
+        Instead of a filename, an item can be a tuple of the filename and
+        its os.lstat result, which then is used instead of calling
+        os.lstat again.
+        """
+        self.file_iterators.append(iter(filenames))
+
+    def walk_directory(self, topdir, file_filter=None):
+        """
+        Generator yielding all files below topdir and the directories
+        including topdir itself (with trailing /), read lazily.
+        The contents of a directory are yielded before the
+        directory, because its FT_DIREND entry has to follow them.
+        Symbolic links to directories are yielded but not followed.
+        Only files (not directories) for which file_filter returns True
+        are yielded, if file_filter is given.
+
+        Items are tuples of the filename and its os.lstat result
+        (None for topdir). Directories are read ahead by scan_workers
+        threads, see BareosFdDirectoryScanner.
+        """
+        scanner = DirectoryScanner(
+            workers=self.scan_workers,
+            file_filter=(
+                None
+                if file_filter is None
+                else lambda filename, statp: file_filter(filename)
+            ),
+            on_error=self._report_walk_error,
+        )
+        found = 0
+        for filename, statp in scanner.walk(topdir):
+            found += 1
+            self._report_walk_progress(topdir, found)
+            yield filename, statp
+        found += 1
+        # FD requires / at the end of a directory name
+        yield topdir if topdir.endswith("/") else topdir + "/", None
+        bareosfd.JobMessage(
+            bareosfd.M_INFO,
+            "Found %d files and directories in %s\n" % (found, topdir),
+        )
+
+    def _report_walk_error(self, dirname, error):
+        bareosfd.JobMessage(
+            bareosfd.M_ERROR,
+            'Could not read directory %s: "%s"\n' % (dirname, error),
+        )
+
+    def _report_walk_progress(self, topdir, found):
+        if self.progress_interval and found % self.progress_interval == 0:
+            bareosfd.JobMessage(
+                bareosfd.M_INFO,
+                "Found %d files and directories in %s so far\n" % (found, topdir),
+            )
+
+    def _get_next_file(self):
+        """
+        Returns the next file to backup as tuple of filename and its
+        stat result (None, if not known yet) or None, if there is none left.
+        """
+        if self.files_to_backup:
+            return self.files_to_backup.pop(), None
+        while self.file_iterators:
+            item = next(self.file_iterators[0], None)
+            if item is None:
+                self.file_iterators.pop(0)
+            elif isinstance(item, tuple):
+                return item
+            else:
+                return item, None
+        return None
+
     def _get_next_file_as_str(self):
         while True:
-            fname = self.files_to_backup.pop()
+            item = self._get_next_file()
+            if item is None:
+                return None
             try:
-                fname.encode("utf-8")
-                return fname
+                item[0].encode("utf-8")
+                return item
             except UnicodeEncodeError:
                 bareosfd.JobMessage(
                     bareosfd.M_ERROR,
-                    "name " + repr(fname) + " cannot be encoded in utf-8\n",
+                    "name " + repr(item[0]) + " cannot be encoded in utf-8\n",
                 )
 
+    def has_files_to_backup(self):
+        """
+        True, if there are files left to backup.
+        Reads ahead one file from the file iterators, if needed.
+        """
+        if self.next_file_to_backup is None:
+            if sys.version_info >= (3, 0):
+                self.next_file_to_backup = self._get_next_file_as_str()
+            else:
+                self.next_file_to_backup = self._get_next_file()
+        return self.next_file_to_backup is not None
+
+    def get_io_file_type(self, filename):
+        """
+        File type of filename as used by plugin_io_open.
+        For the file currently backed up, this is the type already
+        determined by start_backup_file, otherwise it takes one os.lstat.
+        """
+        if filename == self.file_to_backup and self.file_to_backup_io_type:
+            return self.file_to_backup_io_type
+        try:
+            mode = os.lstat(filename).st_mode
+        except OSError:
+            return "FT_REG"
+        if stat.S_ISDIR(mode):
+            return "FT_DIR"
+        if stat.S_ISLNK(mode):
+            return "FT_LNK"
+        if stat.S_ISFIFO(mode):
+            return "FT_FIFO"
+        return "FT_REG"
+
     def start_backup_file(self, savepkt):
         """
         Defines the file to backup and creates the savepkt. In this example
         only files (no directories) are allowed
         """
         bareosfd.DebugMessage(100, "start_backup_file() called\n")
-        if not self.files_to_backup:
+        if not self.has_files_to_backup():
             bareosfd.DebugMessage(100, "No files to backup\n")
             return bareosfd.bRC_Stop
 
-        if sys.version_info >= (3, 0):
-            self.file_to_backup = self._get_next_file_as_str()
-        else:
-            self.file_to_backup = self.files_to_backup.pop()
+        self.file_to_backup, statp = self.next_file_to_backup
+        self.next_file_to_backup = None
+        self.file_to_backup_io_type = None
         bareosfd.DebugMessage(100, "file: " + self.file_to_backup + "\n")
 
-        mystatp = bareosfd.StatPacket()
-        try:
-            if os.path.islink(self.file_to_backup):
-                statp = os.lstat(self.file_to_backup)
-            else:
-                statp = os.stat(self.file_to_backup)
-        except Exception as e:
-            bareosfd.JobMessage(
-                bareosfd.M_ERROR,
-                'Could net get stat-info for file %s: "%s"' % (self.file_to_backup, e),
-            )
+        # links (also to directories) are stat'ed without trailing /,
+        # otherwise their target would be stat'ed
+        path = self.file_to_backup.rstrip("/") or "/"
+        if statp is None:
+            try:
+                statp = os.lstat(path)
+            except Exception as e:
+                bareosfd.JobMessage(
+                    bareosfd.M_ERROR,
+                    'Could net get stat-info for file %s: "%s"\n'
+                    % (self.file_to_backup, e),
+                )
+                return bareosfd.bRC_Skip
 
+        mystatp = bareosfd.StatPacket()
         # As of Bareos 19.2.7 attribute names in bareosfd.StatPacket differ from os.stat
         # In this case we have to translate names
         # For future releases consistent names are planned, allowing to assign the
@@ -128,24 +253,26 @@ class BareosFdPluginLocalFilesBaseclass(BareosFdPluginBaseclass):  # noqa
         # bareosfd.JobMessage( bareosfd.M_ERROR, '\nmystatp: %s\nstatp: %s\n' % (mystatp,statp))
 
         savepkt.fname = self.file_to_backup
-        # os.islink will detect links to directories only when
-        # there is no trailing slash - we need to perform checks
-        # on the stripped name but use it with trailing / for the backup itself
-        if os.path.islink(self.file_to_backup.rstrip("/")):
+        # the type is taken from the stat result, no further syscalls
+        if stat.S_ISLNK(statp.st_mode):
             savepkt.type = bareosfd.FT_LNK
-            savepkt.link = os.readlink(self.file_to_backup.rstrip("/"))
+            savepkt.link = os.readlink(path)
+            self.file_to_backup_io_type = "FT_LNK"
             bareosfd.DebugMessage(150, "file type is: FT_LNK\n")
-        elif os.path.isfile(self.file_to_backup):
+        elif stat.S_ISREG(statp.st_mode):
             savepkt.type = bareosfd.FT_REG
+            self.file_to_backup_io_type = "FT_REG"
             bareosfd.DebugMessage(150, "file type is: FT_REG\n")
-        elif os.path.isdir(self.file_to_backup):
+        elif stat.S_ISDIR(statp.st_mode):
             savepkt.type = bareosfd.FT_DIREND
             savepkt.link = self.file_to_backup
+            self.file_to_backup_io_type = "FT_DIR"
             bareosfd.DebugMessage(
                 150, "file %s type is: FT_DIREND\n" % self.file_to_backup
             )
-        elif stat.S_ISFIFO(os.stat(self.file_to_backup).st_mode):
+        elif stat.S_ISFIFO(statp.st_mode):
             savepkt.type = bareosfd.FT_FIFO
+            self.file_to_backup_io_type = "FT_FIFO"
             bareosfd.DebugMessage(150, "file type is: FT_FIFO\n")
         else:
             bareosfd.JobMessage(
@@ -294,11 +421,11 @@ class BareosFdPluginLocalFilesBaseclass(BareosFdPluginBaseclass):  # noqa
 
     def end_backup_file(self):
         """
-        Here we return 'bRC_More' as long as our list files_to_backup is not
-        empty and bRC_OK when we are done
+        Here we return 'bRC_More' as long as there are files left to backup
+        and bRC_OK when we are done
         """
         bareosfd.DebugMessage(100, "end_backup_file() entry point in Python called\n")
-        if self.files_to_backup:
+        if self.has_files_to_backup():
             return bareosfd.bRC_More
         else:
             return bareosfd.bRC_OK
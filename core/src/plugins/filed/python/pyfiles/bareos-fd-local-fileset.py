@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 # BAREOS - Backup Archiving REcovery Open Sourced
 #
-# Copyright (C) 2014-2023 Bareos GmbH & Co. KG
+# Copyright (C) 2014-2025 Bareos GmbH & Co. KG
 #
 # This program is Free Software; you can redistribute it and/or
 # modify it under the terms of version three of the GNU Affero General Public
@@ -32,7 +32,6 @@ import bareosfd
 import os
 import re
 from BareosFdPluginLocalFilesBaseclass import BareosFdPluginLocalFilesBaseclass
-import stat
 
 
 @BareosPlugin
@@ -78,8 +77,8 @@ class BareosFdPluginLocalFileset(BareosFdPluginLocalFilesBaseclass):  # noqa
     def start_backup_job(self):
         """
         At this point, plugin options were passed and checked already.
-        We try to read from filename and setup the list of file to backup
-        in self.files_to_backup
+        We try to read from filename and setup the walk of the files to
+        backup, which are read while the backup runs
         """
         bareosfd.DebugMessage(
             100,
@@ -105,31 +104,10 @@ class BareosFdPluginLocalFileset(BareosFdPluginLocalFilesBaseclass):  # noqa
         if "deny" in self.options:
             self.deny = re.compile(self.options["deny"])
 
-        for listItem in config_file.read().splitlines():
-            if os.path.isfile(listItem) and self.filename_is_allowed(
-                listItem, self.allow, self.deny
-            ):
-                self.append_file_to_backup(listItem)
-            if os.path.isdir(listItem):
-                fullDirName = listItem
-                # FD requires / at the end of a directory name
-                if not fullDirName.endswith(tuple("/")):
-                    fullDirName += "/"
-                self.append_file_to_backup(fullDirName)
-                for topdir, dirNames, fileNames in os.walk(listItem):
-                    for fileName in fileNames:
-                        if self.filename_is_allowed(
-                            os.path.join(topdir, fileName),
-                            self.allow,
-                            self.deny,
-                        ):
-                            self.append_file_to_backup(os.path.join(topdir, fileName))
-                    for dirName in dirNames:
-                        fullDirName = os.path.join(topdir, dirName) + "/"
-                        self.append_file_to_backup(fullDirName)
-        bareosfd.DebugMessage(150, "Filelist: %s\n" % (self.files_to_backup))
+        self.append_files_to_backup(self.walk_fileset(config_file.read().splitlines()))
+        config_file.close()
 
-        if not self.files_to_backup:
+        if not self.has_files_to_backup():
             bareosfd.JobMessage(
                 bareosfd.M_ERROR,
                 "No (allowed) files to backup found\n",
@@ -138,38 +116,42 @@ class BareosFdPluginLocalFileset(BareosFdPluginLocalFilesBaseclass):  # noqa
         else:
             return bareosfd.bRC_OK
 
+    def walk_fileset(self, listItems):
+        """
+        Generator yielding the files to backup for the files and directories
+        in listItems. Directories are walked lazily, while the backup runs.
+        """
+        for listItem in listItems:
+            if os.path.isfile(listItem) and self.filename_is_allowed(
+                listItem, self.allow, self.deny
+            ):
+                yield listItem
+            if os.path.isdir(listItem):
+                for fileName, statp in self.walk_directory(
+                    listItem,
+                    lambda fileName: self.filename_is_allowed(
+                        fileName, self.allow, self.deny
+                    ),
+                ):
+                    bareosfd.DebugMessage(150, "Next file: %s\n" % (fileName))
+                    yield fileName, statp
+
     def plugin_io_open(self, IOP):
         self.FNAME = IOP.fname
         bareosfd.DebugMessage(250, "io_open: self.FNAME is set to %s\n" % (self.FNAME))
-        if os.path.isdir(self.FNAME):
-            bareosfd.DebugMessage(100, "%s is a directory\n" % (self.FNAME))
-            self.fileType = "FT_DIR"
-            bareosfd.DebugMessage(
-                100,
-                "Did not open file %s of type %s\n" % (self.FNAME, self.fileType),
-            )
-            return bareosfd.bRC_OK
-        elif os.path.islink(self.FNAME):
-            self.fileType = "FT_LNK"
+        self.fileType = self.get_io_file_type(self.FNAME)
+        if self.fileType != "FT_REG":
+            if self.fileType == "FT_DIR":
+                bareosfd.DebugMessage(100, "%s is a directory\n" % (self.FNAME))
             bareosfd.DebugMessage(
                 100,
                 "Did not open file %s of type %s\n" % (self.FNAME, self.fileType),
             )
             return bareosfd.bRC_OK
-        elif os.path.exists(self.FNAME) and stat.S_ISFIFO(os.stat(self.FNAME).st_mode):
-            self.fileType = "FT_FIFO"
-            bareosfd.DebugMessage(
-                100,
-                "Did not open file %s of type %s\n" % (self.FNAME, self.fileType),
-            )
-            return bareosfd.bRC_OK
-        else:
-            self.fileType = "FT_REG"
-            bareosfd.DebugMessage(
-                150,
-                "file %s has type %s - trying to open it\n"
-                % (self.FNAME, self.fileType),
-            )
+        bareosfd.DebugMessage(
+            150,
+            "file %s has type %s - trying to open it\n" % (self.FNAME, self.fileType),
+        )
         try:
             if IOP.flags & (os.O_CREAT | os.O_WRONLY):
                 bareosfd.DebugMessage(
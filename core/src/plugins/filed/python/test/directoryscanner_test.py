@@ -0,0 +1,177 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2025-2025 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Compares the walk of BareosFdDirectoryScanner with a single threaded
+reference walk. Requires only the pyfiles directory in PYTHONPATH.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from BareosFdDirectoryScanner import DirectoryScanner
+
+
+def reference_walk(topdir, dir_filter=None, file_filter=None, on_error=None):
+    """
+    Single threaded walk with the documented output of DirectoryScanner.walk.
+    """
+    result = []
+
+    def walk(dirname):
+        try:
+            with os.scandir(dirname) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            if on_error is not None:
+                on_error(dirname, e)
+            return
+        for entry in entries:
+            statp = entry.stat(follow_symlinks=False)
+            if entry.is_dir(follow_symlinks=False):
+                if dir_filter is None or dir_filter(entry.path):
+                    walk(entry.path)
+                    result.append((entry.path + "/", statp))
+            elif entry.is_symlink() and entry.is_dir():
+                if dir_filter is None or dir_filter(entry.path):
+                    result.append((entry.path + "/", statp))
+            elif file_filter is None or file_filter(entry.path, statp):
+                result.append((entry.path, statp))
+
+    walk(topdir)
+    return result
+
+
+class TestDirectoryScanner(unittest.TestCase):
+    def setUp(self):
+        self.topdir = tempfile.mkdtemp(prefix="directoryscanner_test.")
+        # nested directories
+        for i in range(3):
+            path = os.path.join(self.topdir, "d%d" % i, "sub", "subsub")
+            os.makedirs(path)
+            for dirname in [path, os.path.dirname(path)]:
+                for j in range(3):
+                    with open(os.path.join(dirname, "f%d" % j), "w") as f:
+                        f.write("x")
+        os.mkdir(os.path.join(self.topdir, "empty"))
+        os.mkdir(os.path.join(self.topdir, "unreadable"))
+        with open(os.path.join(self.topdir, "unreadable", "hidden"), "w") as f:
+            f.write("x")
+        # symbolic links to a directory, a file and nowhere
+        os.symlink("d0", os.path.join(self.topdir, "link_to_dir"))
+        os.symlink("d0/sub/f0", os.path.join(self.topdir, "link_to_file"))
+        os.symlink("nonexistent", os.path.join(self.topdir, "dangling"))
+        # more subdirectories than read ahead
+        for i in range(20):
+            os.makedirs(os.path.join(self.topdir, "wide", "w%02d" % i, "x"))
+
+    def tearDown(self):
+        shutil.rmtree(self.topdir)
+
+    def assertSameWalk(self, expected, result):
+        self.assertEqual(
+            [(path, statp.st_ino) for path, statp in expected],
+            [(path, statp.st_ino) for path, statp in result],
+        )
+
+    def test_walk(self):
+        for workers in [1, 4]:
+            result = list(DirectoryScanner(workers=workers).walk(self.topdir))
+            self.assertSameWalk(reference_walk(self.topdir), result)
+        paths = [path for path, statp in result]
+        self.assertIn(os.path.join(self.topdir, "link_to_dir/"), paths)
+        self.assertIn(os.path.join(self.topdir, "dangling"), paths)
+        self.assertNotIn(os.path.join(self.topdir, "link_to_dir", "sub/"), paths)
+        self.assertNotIn(self.topdir + "/", paths)
+
+    def test_max_prefetch_smaller_than_fanout(self):
+        scanner = DirectoryScanner(workers=4, max_prefetch=2)
+        result = list(scanner.walk(self.topdir))
+        self.assertSameWalk(reference_walk(self.topdir), result)
+
+    def test_filters(self):
+        def dir_filter(path):
+            return os.path.basename(path) not in ["sub", "wide"]
+
+        def file_filter(path, statp):
+            self.assertIsNotNone(statp)
+            return os.path.basename(path) != "f1"
+
+        result = list(
+            DirectoryScanner(dir_filter=dir_filter, file_filter=file_filter).walk(
+                self.topdir
+            )
+        )
+        self.assertSameWalk(
+            reference_walk(self.topdir, dir_filter, file_filter), result
+        )
+        for path, statp in result:
+            self.assertNotIn("/sub/", path)
+            self.assertNotEqual("f1", os.path.basename(path))
+
+    def test_unreadable_directory(self):
+        unreadable = os.path.join(self.topdir, "unreadable")
+        scandir = os.scandir
+
+        def failing_scandir(path):
+            if path == unreadable:
+                raise PermissionError(13, "Permission denied", path)
+            return scandir(path)
+
+        errors = []
+        expected_errors = []
+        with mock.patch("os.scandir", failing_scandir):
+            expected = reference_walk(
+                self.topdir,
+                on_error=lambda path, e: expected_errors.append(path),
+            )
+            result = list(
+                DirectoryScanner(
+                    on_error=lambda path, e: errors.append((path, e))
+                ).walk(self.topdir)
+            )
+        self.assertSameWalk(expected, result)
+        self.assertEqual([unreadable], expected_errors)
+        self.assertEqual([unreadable], [path for path, e in errors])
+        self.assertIsInstance(errors[0][1], PermissionError)
+        # the directory itself is still backed up
+        self.assertIn(unreadable + "/", [path for path, statp in result])
+
+    def test_close_early(self):
+        threads = threading.active_count()
+        walk = DirectoryScanner(workers=4, max_prefetch=4).walk(self.topdir)
+        expected = reference_walk(self.topdir)
+        self.assertSameWalk(expected[:3], [next(walk) for i in range(3)])
+        walk.close()
+        with self.assertRaises(StopIteration):
+            next(walk)
+        # the worker threads end, when the read ahead is finished
+        deadline = time.monotonic() + 10
+        while threading.active_count() > threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(threads, threading.active_count())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2025-2025 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Benchmark of the file system calls of the bareos-fd-local-fileset plugin.
+
+Creates a synthetic tree (by default 1 million files), runs the backup side
+of the plugin on it (start_backup_job, then start_backup_file,
+plugin_io_open/plugin_io_close and end_backup_file for every file)
+and reports the number of file system calls per file, the duration
+and the maximum memory usage.
+
+No Bareos file daemon is required: the plugin runs with a minimal stand-in
+of the bareosfd module, file contents are not read.
+File system calls are counted by wrapping the functions of the os module
+(stat, lstat, readlink, scandir and os.DirEntry.stat) and open.
+os.DirEntry.is_dir and is_symlink are assumed to be answered from
+the directory listing, as on most Linux file systems.
+
+To compare different versions of the plugin,
+run the benchmark with --pyfiles pointing to the different source trees, e.g.
+
+    ./local-fileset-benchmark.py --tree /tmp/tree \\
+        --pyfiles /tmp/bareos-old/core/src/plugins/filed/python/pyfiles
+    ./local-fileset-benchmark.py --tree /tmp/tree
+"""
+
+from __future__ import print_function
+from argparse import ArgumentParser
+import builtins
+from collections import Counter
+import importlib.util
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+PYFILES_DIR = os.path.realpath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "pyfiles")
+)
+
+calls = Counter()
+
+
+def create_bareosfd_module():
+    """
+    Minimal stand-in of the bareosfd module, as far as used by the plugin.
+    """
+    bareosfd = types.ModuleType("bareosfd")
+    values = dict(
+        bRC_OK=0,
+        bRC_Stop=1,
+        bRC_Error=2,
+        bRC_More=3,
+        bRC_Term=4,
+        bRC_Seen=5,
+        bRC_Core=6,
+        bRC_Skip=7,
+        bRC_Cancel=8,
+        FT_LNKSAVED=1,
+        FT_REGE=2,
+        FT_REG=3,
+        FT_LNK=4,
+        FT_DIREND=5,
+        FT_FIFO=19,
+        M_ERROR=4,
+        M_WARNING=5,
+        M_INFO=6,
+        iostat_error=-1,
+        iostat_do_in_plugin=0,
+        iostat_do_in_core=1,
+        bVarJobId=1,
+        bVarFDName=2,
+        bVarLevel=3,
+        bVarType=4,
+        bVarClient=5,
+        bVarJobName=6,
+        bVarJobStatus=7,
+        bVarSinceTime=8,
+        bVarAccurate=9,
+        bVarFileSeen=10,
+        bVarVssClient=11,
+        bVarWorkingDir=12,
+        bVarWhere=13,
+        bVarRegexWhere=14,
+        bVarExePath=15,
+        bVarVersion=16,
+        bVarDistName=17,
+        bVarPrevJobName=18,
+        bVarPrefixLinks=19,
+        bVarUsedConfig=20,
+        bEventJobStart=1,
+        bEventJobEnd=2,
+        bEventStartBackupJob=3,
+        bEventEndBackupJob=4,
+        bEventStartRestoreJob=5,
+        bEventEndRestoreJob=6,
+        bEventStartVerifyJob=7,
+        bEventEndVerifyJob=8,
+        bEventBackupCommand=9,
+        bEventRestoreCommand=10,
+        bEventEstimateCommand=11,
+        bEventLevel=12,
+        bEventSince=13,
+        bEventCancelCommand=14,
+        bEventRestoreObject=15,
+        bEventEndFileSet=16,
+        bEventPluginCommand=17,
+        bEventOptionPlugin=18,
+        bEventHandleBackupFile=19,
+        bEventNewPluginOptions=20,
+    )
+    for name, value in values.items():
+        setattr(bareosfd, name, value)
+    job_values = {
+        bareosfd.bVarJobId: 1,
+        bareosfd.bVarFDName: "bareos-fd",
+        bareosfd.bVarClient: "bareos-fd",
+        bareosfd.bVarSinceTime: 0,
+        bareosfd.bVarLevel: ord("F"),
+        bareosfd.bVarJobName: "benchmark.2025-01-01_00.00.00_00",
+        bareosfd.bVarWorkingDir: tempfile.gettempdir(),
+        bareosfd.bVarUsedConfig: "",
+    }
+    bareosfd.GetValue = job_values.get
+    bareosfd.RegisterEvents = lambda events: None
+    bareosfd.DebugMessage = lambda level, message: None
+    bareosfd.JobMessage = lambda level, message: None
+
+    class StatPacket(object):
+        pass
+
+    bareosfd.StatPacket = StatPacket
+    return bareosfd
+
+
+def load_plugin_class(pyfiles_dir):
+    sys.path.insert(0, pyfiles_dir)
+    spec = importlib.util.spec_from_file_location(
+        "bareos_fd_local_fileset",
+        os.path.join(pyfiles_dir, "bareos-fd-local-fileset.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BareosFdPluginLocalFileset
+
+
+def create_tree(path, files, files_per_dir):
+    """
+    Creates files empty files in directories of files_per_dir files,
+    every 100th file is a symbolic link.
+    """
+    for i in range(files):
+        directory = os.path.join(
+            path, "d%04d" % (i // files_per_dir // 1000), "d%04d" % (i // files_per_dir)
+        )
+        if i % files_per_dir == 0:
+            os.makedirs(directory)
+        filename = os.path.join(directory, "f%07d" % i)
+        if i % 100 == 99:
+            os.symlink("f%07d" % (i - 1), filename)
+        else:
+            os.close(os.open(filename, os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+class CountingDirEntry(object):
+    __slots__ = ("entry",)
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    @property
+    def name(self):
+        return self.entry.name
+
+    @property
+    def path(self):
+        return self.entry.path
+
+    def inode(self):
+        return self.entry.inode()
+
+    def is_symlink(self):
+        return self.entry.is_symlink()
+
+    def is_dir(self, follow_symlinks=True):
+        if follow_symlinks and self.entry.is_symlink():
+            calls["stat"] += 1
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        if follow_symlinks and self.entry.is_symlink():
+            calls["stat"] += 1
+        return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, follow_symlinks=True):
+        calls["stat" if follow_symlinks else "lstat"] += 1
+        return self.entry.stat(follow_symlinks=follow_symlinks)
+
+
+class CountingScandirIterator(object):
+    def __init__(self, iterator):
+        self.iterator = iterator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return CountingDirEntry(next(self.iterator))
+
+    def close(self):
+        self.iterator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def counting(name, function):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+def count_calls():
+    os.stat = counting("stat", os.stat)
+    os.lstat = counting("lstat", os.lstat)
+    os.readlink = counting("readlink", os.readlink)
+    builtins.open = counting("open", builtins.open)
+    scandir = os.scandir
+
+    def counting_scandir(*args):
+        calls["scandir"] += 1
+        return CountingScandirIterator(scandir(*args))
+
+    os.scandir = counting_scandir
+
+
+class Packet(object):
+    pass
+
+
+def run_backup(plugin_class, bareosfd, filelist):
+    """
+    Runs the backup side of the plugin, returns the number of files.
+    """
+    plugin = plugin_class("python3:module_name=bareos-fd-local-fileset")
+    plugin.options = {"filename": filelist}
+    if plugin.start_backup_job() != bareosfd.bRC_OK:
+        raise RuntimeError("start_backup_job failed")
+    files = 0
+    while True:
+        savepkt = Packet()
+        result = plugin.start_backup_file(savepkt)
+        if result == bareosfd.bRC_Stop:
+            break
+        files += 1
+        if result == bareosfd.bRC_OK and savepkt.type == bareosfd.FT_REG:
+            iop = Packet()
+            iop.fname = savepkt.fname
+            iop.flags = os.O_RDONLY
+            plugin.plugin_io_open(iop)
+            plugin.plugin_io_close(iop)
+        if plugin.end_backup_file() != bareosfd.bRC_More:
+            break
+    return files
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--pyfiles",
+        default=PYFILES_DIR,
+        help="Directory containing bareos-fd-local-fileset.py. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--files", type=int, default=1000000, help="Number of files of the tree"
+    )
+    parser.add_argument(
+        "--files-per-dir", type=int, default=1000, help="Files per directory"
+    )
+    parser.add_argument(
+        "--tree",
+        help="Directory of the tree. Created, if it does not exist yet, "
+        "and kept afterwards. Default: temporary directory, removed afterwards",
+    )
+    args = parser.parse_args()
+
+    sys.modules["bareosfd"] = bareosfd = create_bareosfd_module()
+    plugin_class = load_plugin_class(os.path.realpath(args.pyfiles))
+
+    tree = args.tree or tempfile.mkdtemp(prefix="local-fileset-benchmark.")
+    try:
+        if not os.path.exists(os.path.join(tree, "files")):
+            start = time.perf_counter()
+            create_tree(os.path.join(tree, "files"), args.files, args.files_per_dir)
+            print("tree created:     {0:.1f} s".format(time.perf_counter() - start))
+        filelist = os.path.join(tree, "filelist")
+        with open(filelist, "w") as f:
+            f.write(os.path.join(tree, "files") + "\n")
+
+        count_calls()
+        start = time.perf_counter()
+        files = run_backup(plugin_class, bareosfd, filelist)
+        duration = time.perf_counter() - start
+    finally:
+        if not args.tree:
+            shutil.rmtree(tree)
+
+    total = sum(calls.values())
+    print("plugin:           {0}".format(os.path.realpath(args.pyfiles)))
+    print("files:            {0}".format(files))
+    print("duration:         {0:.2f} s".format(duration))
+    print("files/s:          {0:.0f}".format(files / duration))
+    print(
+        "max RSS:          {0} MB".format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        )
+    )
+    print("calls per file:   {0:.2f}".format(total / float(files)))
+    for name, count in sorted(calls.items()):
+        print("  {0:<16}{1:.2f}".format(name + ":", count / float(files)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2025-2025 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Tests the lazy walk of the bareos-fd-local-fileset plugin,
+running its backup side with the stand-in of the bareosfd module
+of local-fileset-benchmark.py. No Bareos file daemon is required.
+"""
+
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.realpath(__file__))
+
+spec = importlib.util.spec_from_file_location(
+    "local_fileset_benchmark", os.path.join(TEST_DIR, "local-fileset-benchmark.py")
+)
+benchmark = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(benchmark)
+
+sys.modules["bareosfd"] = bareosfd = benchmark.create_bareosfd_module()
+BareosFdPluginLocalFileset = benchmark.load_plugin_class(benchmark.PYFILES_DIR)
+
+
+class Packet(object):
+    pass
+
+
+class TestLocalFileset(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="localfileset_test.")
+        self.topdir = os.path.join(self.tmpdir, "top")
+        for path in ["a/b", "c"]:
+            os.makedirs(os.path.join(self.topdir, path))
+        for path in ["a/f1", "a/b/f2", "f3", "c/f4.skip"]:
+            with open(os.path.join(self.topdir, path), "w") as f:
+                f.write("x")
+        os.symlink("a", os.path.join(self.topdir, "link"))
+        self.single_file = os.path.join(self.tmpdir, "single")
+        with open(self.single_file, "w") as f:
+            f.write("x")
+        self.filelist = os.path.join(self.tmpdir, "filelist")
+        with open(self.filelist, "w") as f:
+            f.write(self.single_file + "\n" + self.topdir + "\n")
+        self.messages = []
+        bareosfd.JobMessage = lambda level, message: self.messages.append(
+            (level, message)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def create_plugin(self, **options):
+        plugin = BareosFdPluginLocalFileset(
+            "python3:module_name=bareos-fd-local-fileset"
+        )
+        plugin.options = dict(filename=self.filelist, **options)
+        return plugin
+
+    def run_backup(self, plugin):
+        """
+        Returns the list of (fname, type) of the backed up files.
+        """
+        self.assertEqual(bareosfd.bRC_OK, plugin.start_backup_job())
+        result = []
+        while True:
+            savepkt = Packet()
+            if plugin.start_backup_file(savepkt) == bareosfd.bRC_Stop:
+                break
+            result.append((savepkt.fname, savepkt.type))
+            if plugin.end_backup_file() != bareosfd.bRC_More:
+                break
+        return result
+
+    def test_walk_fileset(self):
+        plugin = self.create_plugin(deny=r"\.skip$")
+        result = self.run_backup(plugin)
+        names = [fname for fname, filetype in result]
+        top = self.topdir
+        self.assertEqual(
+            sorted(
+                [
+                    self.single_file,
+                    top + "/",
+                    top + "/a/",
+                    top + "/a/f1",
+                    top + "/a/b/",
+                    top + "/a/b/f2",
+                    top + "/c/",
+                    top + "/f3",
+                    top + "/link/",
+                ]
+            ),
+            sorted(names),
+        )
+        self.assertEqual(self.single_file, names[0])
+        self.assertEqual(top + "/", names[-1])
+        # every directory follows its contents
+        for index, name in enumerate(names):
+            if name.endswith("/"):
+                for contained in names[index + 1 :]:
+                    self.assertFalse(contained.startswith(name), contained)
+        types = dict(result)
+        self.assertEqual(bareosfd.FT_DIREND, types[top + "/a/"])
+        self.assertEqual(bareosfd.FT_REG, types[top + "/a/f1"])
+        self.assertEqual(bareosfd.FT_LNK, types[top + "/link/"])
+
+    def test_walk_is_lazy(self):
+        plugin = self.create_plugin()
+        walk = plugin.walk_fileset([self.topdir])
+        plugin.append_files_to_backup(walk)
+        self.assertTrue(plugin.has_files_to_backup())
+        # only the first file has been taken from the walk
+        self.assertEqual([], plugin.files_to_backup)
+        self.assertEqual(1, len(plugin.file_iterators))
+        self.assertFalse(plugin.next_file_to_backup[0].endswith("/"))
+        # the summary is reported at the end of the walk
+        self.assertEqual([], self.messages)
+
+    def test_files_to_backup_before_iterators(self):
+        plugin = self.create_plugin()
+        statp = os.lstat(self.single_file)
+        plugin.append_files_to_backup(iter(["/iterated", ("/with_stat", statp)]))
+        plugin.append_file_to_backup("/listed")
+        result = []
+        while plugin.has_files_to_backup():
+            result.append(plugin.next_file_to_backup)
+            plugin.next_file_to_backup = None
+        self.assertEqual(
+            [("/listed", None), ("/iterated", None), ("/with_stat", statp)], result
+        )
+        self.assertEqual([], plugin.file_iterators)
+
+    def test_skip_names_not_utf8(self):
+        os.close(
+            os.open(
+                os.path.join(os.fsencode(self.topdir), b"invalid\xff"),
+                os.O_CREAT | os.O_WRONLY,
+                0o644,
+            )
+        )
+        result = self.run_backup(self.create_plugin())
+        names = [fname for fname, filetype in result]
+        self.assertIn(self.topdir + "/f3", names)
+        self.assertFalse([name for name in names if "invalid" in name])
+        self.assertIn(
+            bareosfd.M_ERROR,
+            [level for level, message in self.messages if "invalid" in message],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -136,6 +136,125 @@ Example:
    bareos.exceptions.JsonRpcErrorReceivedException: failed: test it: is an invalid command.
 
 
+Processing large results
+------------------------
+
+The `call` method returns only after the whole result has been received.
+For very large results (e.g. ``list files`` of a job with millions of files),
+`call_iter` and `call_stream` process the result while it arrives.
+
+`call_iter` yields the raw result in parts.
+`call_stream` of `DirectorConsoleJson` parses the result incrementally
+and yields every element of the contained arrays separately:
+
+.. code:: python
+
+   >>> import bareos.bsock
+   >>> directorconsole = bareos.bsock.DirectorConsoleJson(address='localhost', port=9101, password='secret')
+   >>> for path, value in directorconsole.call_stream('list files jobid=1'):
+   ...   print(path, value)
+   ...
+   ('filenames', 0) {'filename': '/etc/passwd'}
+   ('filenames', 1) {'filename': '/etc/group'}
+
+`AsyncDirectorConsoleJson` offers the same as asynchronous iterators
+(``async for path, value in directorconsole.call_stream(...)``).
+
+
+Calling multiple commands
+-------------------------
+
+`call_many` sends multiple commands without waiting for the individual results
+and returns the results in the same order.
+This saves a network round trip per command:
+
+.. code:: python
+
+   >>> jobs, clients = directorconsole.call_many(['list jobs', 'list clients'])
+
+`call_raw` of `DirectorConsoleJson` returns the result as JSON text (bytes),
+without decoding it. This is useful to pass results on unchanged.
+
+
+Reusing connections
+-------------------
+
+Establishing a connection to the Bareos Director
+(TCP, TLS-PSK, authentication and API mode initialization)
+takes multiple round trips.
+Programs calling the Director repeatedly or from multiple threads
+can use a `DirectorConsolePool` to reuse authenticated connections:
+
+.. code:: python
+
+   >>> import bareos.bsock
+   >>> pool = bareos.bsock.DirectorConsolePool(max_size=4, address='localhost', port=9101, name='user1', password='secret')
+   >>> with pool.connection() as directorconsole:
+   ...   pools = directorconsole.call('list pools')
+   ...
+   >>> pool.close()
+
+Single commands can also be called by ``pool.call('list pools')``.
+
+Connections idle for more than ``idle_timeout`` seconds are closed.
+Connections idle for more than ``probe_interval`` seconds
+are verified before they are handed out again.
+
+
+Connection statistics
+---------------------
+
+To profile the throughput of a connection,
+per connection counters can be enabled:
+
+.. code:: python
+
+   >>> statistics = directorconsole.enable_statistics()
+   >>> result = directorconsole.call('list jobs')
+   >>> statistics.as_dict()
+   {'bytes_sent': 13, 'bytes_received': 1524, 'messages_sent': 1, 'messages_received': 3, 'signals_received': 1, 'recv_time': 0.0021, 'recv_timeouts': 0}
+
+``recv_time`` is the time (in seconds) spent waiting for data from the network.
+
+
+asyncio
+-------
+
+`AsyncDirectorConsole`, `AsyncDirectorConsoleJson` and `AsyncFileDaemon`
+offer the same functionality using ``asyncio``.
+This allows to handle many connections concurrently in a single thread.
+The connection is established when entering the ``async with`` block
+(or by calling ``open``):
+
+.. code:: python
+
+   >>> import asyncio
+   >>> import bareos.bsock
+   >>> async def jobs(address):
+   ...   async with bareos.bsock.AsyncDirectorConsoleJson(address=address, port=9101, name='user1', password='secret') as directorconsole:
+   ...     return await directorconsole.call('list jobs')
+   ...
+   >>> async def main():
+   ...   return await asyncio.gather(jobs('dir1.example.com'), jobs('dir2.example.com'))
+   ...
+   >>> results = asyncio.run(main())
+
+Concurrent calls on the same connection are serialized.
+``await directorconsole.call_many([...])`` pipelines multiple commands like `call_many`.
+To execute commands of concurrent tasks in parallel,
+use `AsyncDirectorConsolePool`, the asyncio counterpart of `DirectorConsolePool`:
+
+.. code:: python
+
+   >>> async def main():
+   ...   async with bareos.bsock.AsyncDirectorConsolePool(max_size=4, address='localhost', port=9101, name='user1', password='secret') as pool:
+   ...     return await asyncio.gather(pool.call('list jobs'), pool.call('list volumes'))
+   ...
+   >>> results = asyncio.run(main())
+
+TLS-PSK is only available with asyncio,
+if it is supported by the Python ``ssl`` module (Python >= 3.13).
+
 
 .. _section-python-bareos-tls-psk:
 
@@ -234,11 +353,17 @@ like in the following example:
 
 from bareos.exceptions import *
 from bareos.util.password import Password
+from bareos.bsock.connectionstatistics import ConnectionStatistics
 from bareos.bsock.connectiontype import ConnectionType
 from bareos.bsock.constants import Constants
 from bareos.bsock.filedaemon import FileDaemon
 from bareos.bsock.directorconsole import DirectorConsole
 from bareos.bsock.directorconsolejson import DirectorConsoleJson
+from bareos.bsock.directorconsolepool import DirectorConsolePool
+from bareos.bsock.asyncdirectorconsole import AsyncDirectorConsole
+from bareos.bsock.asyncdirectorconsolejson import AsyncDirectorConsoleJson
+from bareos.bsock.asyncdirectorconsolepool import AsyncDirectorConsolePool
+from bareos.bsock.asyncfiledaemon import AsyncFileDaemon
 from bareos.bsock.protocolversions import ProtocolVersions
 from bareos.bsock.tlsversionparser import TlsVersionParser
 
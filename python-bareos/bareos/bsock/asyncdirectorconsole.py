@@ -0,0 +1,169 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Send and receive the response to Bareos Director Daemon Console interface using asyncio.
+"""
+
+from bareos.bsock.asynclowlevel import AsyncLowLevel
+from bareos.bsock.connectiontype import ConnectionType
+from bareos.bsock.directorconsole import DirectorConsole
+from bareos.bsock.protocolmessageids import ProtocolMessageIds
+from bareos.bsock.protocolmessages import ProtocolMessages
+from bareos.bsock.protocolversions import ProtocolVersions
+import bareos.exceptions
+
+
+class AsyncDirectorConsole(AsyncLowLevel):
+    """Send and receive the response to Bareos Director Daemon Console interface using asyncio.
+
+    Example:
+       >>> import asyncio
+       >>> import bareos.bsock
+       >>> async def main():
+       ...   async with bareos.bsock.AsyncDirectorConsole(address='localhost', port=9101, name='user1', password='secret') as directorconsole:
+       ...     print((await directorconsole.call('help')).decode("utf-8"))
+       ...
+       >>> asyncio.run(main())
+    """
+
+    argparser_add_default_command_line_arguments = staticmethod(
+        DirectorConsole.argparser_add_default_command_line_arguments
+    )
+
+    def __init__(
+        self,
+        address="localhost",
+        port=9101,
+        timeout=None,
+        dirname=None,
+        name="*UserAgent*",
+        password=None,
+        protocolversion=None,
+        pam_username=None,
+        pam_password=None,
+        tls_psk_enable=True,
+        tls_psk_require=False,
+        tls_version=None,
+        recv_timeout=None,
+    ):
+        """\
+
+        The connection is established by :py:func:`open`
+        or when entering the ``async with`` block.
+
+        **Parameters:** The parameter are identical to :py:class:`bareos.bsock.directorconsole.DirectorConsole`.
+        ``tls_version`` is only used by the ``sslpsk`` module.
+        ``timeout`` applies to connecting and authenticating.
+        ``recv_timeout`` is the number of seconds to wait for data of a command result,
+        after which the connection is closed. Default: wait forever.
+        """
+        super(AsyncDirectorConsole, self).__init__()
+        self.connect_parameter = {
+            "address": address,
+            "port": port,
+            "dirname": dirname,
+            "connection_type": ConnectionType.DIRECTOR,
+            "name": name,
+            "password": password,
+            "timeout": timeout,
+        }
+        self.pam_username = pam_username
+        self.pam_password = pam_password
+        self.tls_psk_enable = tls_psk_enable
+        self.tls_psk_require = tls_psk_require
+        if tls_version is not None:
+            self.tls_version = tls_version
+        self.recv_timeout = recv_timeout
+        self.identity_prefix = "R_CONSOLE"
+        if protocolversion is not None and protocolversion > 0:
+            self.requested_protocol_version = int(protocolversion)
+            self.protocol_messages.set_version(self.requested_protocol_version)
+
+    async def open(self):
+        """Connect to the Bareos Director.
+
+        Raises:
+          bareos.exceptions.ConnectionError: On connections errors.
+        """
+        await self.connect(**self.connect_parameter)
+        await self._init_connection()
+        return self
+
+    async def _finalize_authentication(self):
+        code, text = await self.receive_and_evaluate_response_message()
+
+        self.logger.debug("code: {0}".format(code))
+
+        #
+        # Test if PAM is requested.
+        # If yes, handle PAM messages.
+        #
+        if code == ProtocolMessageIds.PamRequired:
+            self.logger.debug("PAM request: {0}".format(text))
+            if (not self.pam_username) or (not self.pam_password):
+                raise bareos.exceptions.PamAuthenticationError(
+                    "PAM authentication is requested, but no PAM credentials given. Giving up.\n"
+                )
+            await self.send(
+                ProtocolMessages.pam_user_credentials(
+                    self.pam_username, self.pam_password
+                )
+            )
+            try:
+                code, text = await self.receive_and_evaluate_response_message()
+            except bareos.exceptions.ConnectionLostError as e:
+                raise bareos.exceptions.PamAuthenticationError(
+                    "PAM authentication failed."
+                )
+        else:
+            if (self.pam_username) or (self.pam_password):
+                raise bareos.exceptions.PamAuthenticationError(
+                    "PAM credentials provided, but this Director console does not offer PAM login. Giving up.\n"
+                )
+
+        #
+        # Test if authentication has been accepted.
+        #
+        if code == ProtocolMessageIds.Ok:
+            self.logger.info("Authentication: {0}".format(text))
+            self.auth_credentials_valid = True
+        else:
+            raise bareos.exceptions.AuthenticationError(
+                "Received unexcepted message: {0} {1} (expecting auth ok)".format(
+                    code, text
+                )
+            )
+
+        if self.get_protocol_version() >= ProtocolVersions.bareos_18_2:
+            #
+            # Handle info message.
+            #
+            code, text = await self.receive_and_evaluate_response_message()
+            if code == ProtocolMessageIds.InfoMessage:
+                self.logger.debug("Info: {0}".format(text))
+            else:
+                raise bareos.exceptions.AuthenticationError(
+                    "Received unexcepted message: {0} {1} (expecting info message)".format(
+                        code, text
+                    )
+                )
+
+    async def _init_connection(self):
+        await self.call("autodisplay off")
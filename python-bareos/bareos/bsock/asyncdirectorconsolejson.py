@@ -0,0 +1,240 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Communicate with the Bareos Director Daemon Console interface in API mode 2 (JSON) using asyncio.
+"""
+
+from bareos.bsock.asyncdirectorconsole import AsyncDirectorConsole
+from bareos.bsock.directorconsolejson import DirectorConsoleJson
+import bareos.exceptions
+import asyncio
+import itertools
+
+
+class AsyncDirectorConsoleJson(AsyncDirectorConsole):
+    """Communicate with the Bareos Director Daemon Console interface in API mode 2 (JSON) using asyncio.
+
+    Example:
+
+       >>> import asyncio
+       >>> import bareos.bsock
+       >>> async def main():
+       ...   async with bareos.bsock.AsyncDirectorConsoleJson(address='localhost', port=9101, password='secret') as directorconsole:
+       ...     pools = await directorconsole.call('list pools')
+       ...     for pool in pools["pools"]:
+       ...       print(pool["name"])
+       ...
+       >>> asyncio.run(main())
+       Scratch
+       Incremental
+       Full
+       Differential
+
+       The results the the `call` method is a ``dict`` object.
+
+       In case of an error, an exception, derived from ``bareos.exceptions.Error`` is raised.
+    """
+
+    async def _init_connection(self):
+        # older version did not support compact mode,
+        # therfore first set api mode to json (which should always work in bareos >= 15.2.0)
+        # and then set api mode json compact (which should work with bareos >= 15.2.2)
+        self.logger.debug(await self.call(".api json"))
+        self.logger.debug(await self.call(".api json compact=yes"))
+
+    async def call(self, command):
+        """Calls a command on the Bareos Director and returns its result.
+
+        If the JSON-RPC result indicates an error
+        (contains the ``error`` element),
+        an exception will be raised.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            dict: Result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        return DirectorConsoleJson._get_result(await self.call_fullresult(command))
+
+    async def call_raw(self, command):
+        """Calls a command on the Bareos Director and returns its result as JSON text.
+
+        See :py:func:`bareos.bsock.directorconsolejson.DirectorConsoleJson.call_raw`.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            bytes: JSON text of the result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        return DirectorConsoleJson._get_raw_result(
+            await super(AsyncDirectorConsoleJson, self).call(command)
+        )
+
+    async def call_many(self, commands, return_exceptions=False):
+        """Calls multiple commands on the Bareos Director, without waiting for each result.
+
+        See :py:func:`bareos.bsock.directorconsolejson.DirectorConsoleJson.call_many`.
+
+        Args:
+           commands (list): Commands to execute. Each command as str or list.
+
+           return_exceptions (bool):
+              If True, errors are returned as exception objects in the result list,
+              instead of raising the first one.
+
+        Returns:
+            list: Results (dict) in the order of the commands.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        results = []
+        for resultstring in await super(AsyncDirectorConsoleJson, self).call_many(
+            commands
+        ):
+            try:
+                results.append(
+                    DirectorConsoleJson._get_result(
+                        DirectorConsoleJson._parse_fullresult(resultstring)
+                    )
+                )
+            except bareos.exceptions.JsonRpcErrorReceivedException as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def call_iter(self, command):
+        """Calls a command on the Bareos Director and iterates over the raw result while it arrives.
+
+        See :py:func:`bareos.bsock.directorconsolejson.DirectorConsoleJson.call_iter`.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            async iterator: Iterator over the parts (bytes) of the result.
+        """
+        if isinstance(command, list):
+            command = " ".join(command)
+        return self._send_a_command_and_receive_iter(command, regex=None)
+
+    async def call_stream(self, command, batch_size=1000):
+        """Calls a command on the Bareos Director and parses the result while it arrives.
+
+        See :py:func:`bareos.bsock.directorconsolejson.DirectorConsoleJson.call_stream`.
+
+        The result is received by the event loop,
+        but parsed in the default executor,
+        in batches of up to ``batch_size`` items,
+        so that large results do not block the event loop.
+
+        Example:
+           >>> async for path, value in directorconsole.call_stream("list files jobid=1"):
+           ...   print(path, value)
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+           batch_size (int): Maximum number of items parsed at once.
+
+        Yields:
+            tuple: (path, value) of the result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        # called from a coroutine, so this is the running loop
+        # (asyncio.get_running_loop requires Python >= 3.7)
+        loop = asyncio.get_event_loop()
+        chunks = self.call_iter(command)
+
+        def receive():
+            # runs in the executor, the chunks are received by the event loop
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(
+                        chunks.__anext__(), loop
+                    ).result()
+                except StopAsyncIteration:
+                    return
+
+        items = DirectorConsoleJson._stream_result(receive(), command)
+        batch = None
+        try:
+            while True:
+                batch = loop.run_in_executor(
+                    None, lambda: list(itertools.islice(items, batch_size))
+                )
+                # when cancelled, the batch is finished by _close_stream
+                values = await asyncio.shield(batch)
+                if not values:
+                    return
+                for value in values:
+                    yield value
+        finally:
+            # in a separate task, so that it is completed,
+            # even if this task gets cancelled again
+            await asyncio.shield(
+                asyncio.ensure_future(self._close_stream(batch, items, chunks))
+            )
+
+    @staticmethod
+    async def _close_stream(batch, items, chunks):
+        if batch is not None and not batch.done():
+            # the executor has to finish the batch,
+            # before items and chunks can be closed
+            await asyncio.wait([batch])
+        await asyncio.get_event_loop().run_in_executor(None, items.close)
+        await chunks.aclose()
+
+    async def call_fullresult(self, command):
+        """Calls a command on the Bareos Director and returns its result.
+
+        Returns:
+            dict: Result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        return DirectorConsoleJson._parse_fullresult(
+            await super(AsyncDirectorConsoleJson, self).call(command)
+        )
@@ -0,0 +1,376 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Pool of authenticated asyncio connections to the Bareos Director Daemon Console interface.
+"""
+
+from bareos.bsock.asyncdirectorconsolejson import AsyncDirectorConsoleJson
+import bareos.exceptions
+import asyncio
+import logging
+import time
+
+
+class AsyncDirectorConsolePool(object):
+    """Pool of authenticated Bareos Director console connections using asyncio.
+
+    The asyncio counterpart of :py:class:`bareos.bsock.directorconsolepool.DirectorConsolePool`.
+    A connection is exclusively used by one task,
+    from :py:func:`checkout` until :py:func:`checkin`,
+    so that commands of concurrent tasks are executed in parallel
+    (up to ``max_size``), instead of being serialized on one connection.
+
+    The pool must be used by a single event loop.
+
+    Example:
+       >>> import asyncio
+       >>> import bareos.bsock
+       >>> async def main():
+       ...   async with bareos.bsock.AsyncDirectorConsolePool(max_size=4, address='localhost', port=9101, name='user1', password='secret') as pool:
+       ...     pools = await pool.call('list pools')
+       ...     async with pool.connection() as directorconsole:
+       ...       jobs = await directorconsole.call('list jobs')
+       ...
+       >>> asyncio.run(main())
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        idle_timeout=300,
+        probe_interval=30,
+        checkout_timeout=None,
+        console_class=AsyncDirectorConsoleJson,
+        **console_parameter
+    ):
+        """\
+
+        No connection is established by the constructor.
+        Use :py:func:`open` or ``async with``
+        to establish the ``min_size`` connections.
+
+        **Parameters:** The parameter are identical to :py:class:`bareos.bsock.directorconsolepool.DirectorConsolePool`,
+        except ``max_reconnects``, as asyncio connections do not reconnect.
+        Connections lost while idle are detected by the probe
+        and replaced by new connections.
+        """
+        self.logger = logging.getLogger()
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(
+                "invalid pool size (min_size={0}, max_size={1})".format(
+                    min_size, max_size
+                )
+            )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.probe_interval = probe_interval
+        self.checkout_timeout = checkout_timeout
+        self.console_class = console_class
+        self.console_parameter = console_parameter
+        # Created on first use, as it must belong to the running event loop.
+        self.condition = None
+        # idle connections as (console, last used) tuples,
+        # the most recently used at the end.
+        self.idle = []
+        # number of connections, idle or checked out
+        self.size = 0
+        self.closed = False
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_condition(self):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        return self.condition
+
+    async def open(self):
+        """Establish the ``min_size`` connections.
+
+        Raises:
+          bareos.exceptions.ConnectionError: If a connection can not be established.
+        """
+        created = []
+        while self.size < self.min_size:
+            self.size += 1
+            try:
+                console = await self._create()
+            except BaseException:
+                self.size -= 1
+                # do not leak the connections established so far
+                # (unless checked out meanwhile)
+                unused = [
+                    console for console, last_used in self.idle if console in created
+                ]
+                self.idle = [item for item in self.idle if item[0] not in created]
+                self.size -= len(unused)
+                for console in unused:
+                    await self._discard(console)
+                raise
+            created.append(console)
+            self.idle.append((console, time.monotonic()))
+        return self
+
+    async def _create(self):
+        console = self.console_class(**self.console_parameter)
+        await console.open()
+        return console
+
+    async def _probe(self, console):
+        """Verify that an idle connection is still usable.
+
+        Returns:
+           bool: True, if the connection is usable.
+        """
+        try:
+            await console._init_connection()
+        except (OSError, bareos.exceptions.Error) as e:
+            self.logger.warning("discarding connection: {0}".format(e))
+            return False
+        return console.is_connected()
+
+    async def _discard(self, console):
+        try:
+            await console.close()
+        except OSError:
+            pass
+
+    def _remove_idle(self, now):
+        """Remove idle connections exceeding idle_timeout from the pool.
+
+        Returns:
+           list: The removed connections. They must be closed by the caller.
+        """
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+        while (
+            self.idle
+            and self.size > self.min_size
+            and now - self.idle[0][1] > self.idle_timeout
+        ):
+            expired.append(self.idle.pop(0)[0])
+            self.size -= 1
+        return expired
+
+    async def evict_idle(self):
+        """Close connections that have been idle longer than ``idle_timeout``.
+
+        Returns:
+           int: Number of closed connections.
+        """
+        expired = self._remove_idle(time.monotonic())
+        for console in expired:
+            await self._discard(console)
+        return len(expired)
+
+    async def checkout(self, timeout=-1):
+        """Get a connection from the pool.
+
+        See :py:func:`bareos.bsock.directorconsolepool.DirectorConsolePool.checkout`.
+
+        Args:
+           timeout (float):
+              Time (in seconds) to wait for a free connection.
+              None: wait forever. Default: ``checkout_timeout`` of the pool.
+
+        Returns:
+           Connection (``console_class``). Must be returned by :py:func:`checkin`.
+
+        Raises:
+          bareos.exceptions.PoolTimeoutError: If no connection got available in time.
+          bareos.exceptions.ConnectionError: If no connection can be established.
+        """
+        if timeout == -1:
+            timeout = self.checkout_timeout
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        condition = self._get_condition()
+
+        while True:
+            console = None
+            async with condition:
+                while True:
+                    if self.closed:
+                        raise bareos.exceptions.ConnectionError(
+                            "connection pool is closed"
+                        )
+                    now = time.monotonic()
+                    expired = self._remove_idle(now)
+                    if self.idle:
+                        console, last_used = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        self.size += 1
+                        break
+                    if deadline is not None and now >= deadline:
+                        raise bareos.exceptions.PoolTimeoutError(
+                            "no connection available within {0} seconds (max_size={1})".format(
+                                timeout, self.max_size
+                            )
+                        )
+                    try:
+                        await asyncio.wait_for(
+                            condition.wait(),
+                            None if deadline is None else deadline - now,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+            for expired_console in expired:
+                await self._discard(expired_console)
+
+            if console is None:
+                try:
+                    console = await self._create()
+                except BaseException:
+                    await self._release_slot()
+                    raise
+                return console
+
+            if (
+                self.probe_interval is None
+                or now - last_used < self.probe_interval
+                or await self._probe(console)
+            ):
+                return console
+            await self._discard(console)
+            await self._release_slot()
+
+    async def _release_slot(self):
+        condition = self._get_condition()
+        async with condition:
+            self.size -= 1
+            condition.notify()
+
+    async def checkin(self, console, discard=False):
+        """Return a connection to the pool.
+
+        Args:
+           console: Connection retrieved by :py:func:`checkout`.
+
+           discard (bool):
+              Close the connection instead of reusing it,
+              e.g. because its state is unknown.
+        """
+        if discard or self.closed or not console.is_connected():
+            await self._discard(console)
+            await self._release_slot()
+            return
+        condition = self._get_condition()
+        async with condition:
+            now = time.monotonic()
+            self.idle.append((console, now))
+            expired = self._remove_idle(now)
+            condition.notify()
+        for expired_console in expired:
+            await self._discard(expired_console)
+
+    def connection(self, timeout=-1):
+        """Async context manager to :py:func:`checkout` and :py:func:`checkin` a connection.
+
+        If the block is left by a connection related exception,
+        the connection is discarded instead of returned to the pool.
+
+        Example:
+           >>> async with pool.connection() as directorconsole:
+           ...   jobs = await directorconsole.call('list jobs')
+
+        Args:
+           timeout (float): See :py:func:`checkout`.
+        """
+        return _PooledConnection(self, timeout)
+
+    async def call(self, command, timeout=-1):
+        """Calls a command on a connection of the pool and returns its result.
+
+        Args:
+           command (str or list): Command to execute.
+           timeout (float): See :py:func:`checkout`.
+
+        Returns:
+           The result of the ``call`` method of the connection.
+
+        Raises:
+          bareos.exceptions.PoolTimeoutError: If no connection got available in time.
+        """
+        async with self.connection(timeout) as console:
+            return await console.call(command)
+
+    async def close(self):
+        """Close all idle connections.
+
+        Connections currently checked out are closed,
+        when they are returned by :py:func:`checkin`.
+        """
+        self.closed = True
+        idle = self.idle
+        self.idle = []
+        self.size -= len(idle)
+        if self.condition is not None:
+            async with self.condition:
+                self.condition.notify_all()
+        for console, last_used in idle:
+            await self._discard(console)
+
+
+class _PooledConnection(object):
+    """
+    Async context manager returned by :py:func:`AsyncDirectorConsolePool.connection`
+    (contextlib.asynccontextmanager requires Python >= 3.7).
+    """
+
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.console = None
+
+    async def __aenter__(self):
+        self.console = await self.pool.checkout(self.timeout)
+        return self.console
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.pool.checkin(self.console)
+        elif issubclass(
+            exc_type,
+            (
+                OSError,
+                bareos.exceptions.ConnectionError,
+                bareos.exceptions.ConnectionLostError,
+                bareos.exceptions.SocketEmptyHeader,
+            ),
+        ):
+            await self.pool.checkin(self.console, discard=True)
+        elif issubclass(exc_type, Exception):
+            # The exception is not caused by the connection
+            # (e.g. a JSON-RPC error), so it can be reused.
+            await self.pool.checkin(self.console)
+        else:
+            # e.g. asyncio.CancelledError:
+            # the connection might be in the middle of a command.
+            await self.pool.checkin(self.console, discard=True)
+        return False
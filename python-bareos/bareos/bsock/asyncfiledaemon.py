@@ -0,0 +1,119 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Send and receive the response to Bareos File Daemon (bareos-fd) using asyncio.
+"""
+
+from bareos.bsock.asynclowlevel import AsyncLowLevel
+from bareos.bsock.connectiontype import ConnectionType
+from bareos.bsock.filedaemon import FileDaemon
+from bareos.bsock.protocolmessageids import ProtocolMessageIds
+import bareos.exceptions
+import shlex
+
+
+class AsyncFileDaemon(AsyncLowLevel):
+    """Send and receive the response to Bareos File Daemon (bareos-fd) using asyncio."""
+
+    argparser_add_default_command_line_arguments = staticmethod(
+        FileDaemon.argparser_add_default_command_line_arguments
+    )
+
+    def __init__(
+        self,
+        address="localhost",
+        port=9102,
+        dirname=None,
+        name=None,
+        password=None,
+        tls_psk_enable=True,
+        tls_psk_require=False,
+        tls_version=None,
+    ):
+        """\
+
+        The connection is established by :py:func:`open`
+        or when entering the ``async with`` block.
+
+        **Parameters:** The parameter are identical to :py:class:`bareos.bsock.filedaemon.FileDaemon`.
+        ``tls_version`` is only used by the ``sslpsk`` module.
+        """
+        super(AsyncFileDaemon, self).__init__()
+        self.connect_parameter = {
+            "address": address,
+            "port": port,
+            "dirname": dirname,
+            "connection_type": ConnectionType.FILEDAEMON,
+            "name": name,
+            "password": password,
+        }
+        self.tls_psk_enable = tls_psk_enable
+        self.tls_psk_require = tls_psk_require
+        if tls_version is not None:
+            self.tls_version = tls_version
+        # Well, we are not really a Director,
+        # but using the interface provided for Directors.
+        self.identity_prefix = "R_DIRECTOR"
+
+    async def open(self):
+        """Connect to the Bareos File Daemon.
+
+        Raises:
+          bareos.exceptions.ConnectionError: On connections errors.
+        """
+        await self.connect(**self.connect_parameter)
+        await self._init_connection()
+        return self
+
+    async def _finalize_authentication(self):
+        code, text = await self.receive_and_evaluate_response_message()
+
+        self.logger.debug("code: {0}".format(code))
+
+        #
+        # Test if authentication has been accepted.
+        #
+        if code == ProtocolMessageIds.FdOk:
+            self.logger.info("Authentication: {0}".format(text))
+            self.auth_credentials_valid = True
+        else:
+            raise bareos.exceptions.AuthenticationError(
+                "Received unexcepted message: {0} {1} (expecting auth ok)".format(
+                    code, text
+                )
+            )
+
+    async def call(self, command):
+        """Calls a command on the Bareos File Daemon and returns its result.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            bytes: Result received from the File Daemon.
+        """
+        if isinstance(command, list):
+            cmdlist = command
+        else:
+            cmdlist = shlex.split(command)
+        command0 = []
+        for arg in cmdlist:
+            command0.append(arg.replace(" ", "\x01"))
+        return await super(AsyncFileDaemon, self).call(command0)
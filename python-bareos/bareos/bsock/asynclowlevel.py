@@ -0,0 +1,785 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Low Level asyncio methods to communicate with a Bareos Daemon.
+"""
+
+import asyncio
+import collections
+import logging
+import re
+import ssl
+import struct
+import time
+
+from bareos.bsock.connectionstatistics import ConnectionStatistics
+from bareos.bsock.connectiontype import ConnectionType
+from bareos.bsock.constants import Constants
+from bareos.bsock.lowlevel import LowLevel
+from bareos.bsock.protocolmessages import ProtocolMessages
+from bareos.bsock.protocolversions import ProtocolVersions
+from bareos.util.password import Password
+import bareos.exceptions
+
+# See lowlevel.py, which also warns, if TLS-PSK is not available.
+if not getattr(ssl, "HAS_PSK", False):
+    try:
+        import sslpsk
+    except ImportError:
+        pass
+
+
+class SslPskContext(ssl.SSLContext):
+    """
+    SSL context for asyncio TLS-PSK client connections
+    on Python versions without TLS-PSK support in the ssl module.
+
+    asyncio wraps its connections by :py:func:`wrap_bio`,
+    where the TLS-PSK client callback of the ``sslpsk`` module is installed.
+    """
+
+    # (pre-shared key, identity), as passed to sslpsk.wrap_socket
+    psk = None
+
+    def wrap_bio(self, *args, **kwargs):
+        sslobject = super(SslPskContext, self).wrap_bio(*args, **kwargs)
+        psk = self.psk
+        sslpsk.sslpsk._ssl_set_psk_client_callback(sslobject, lambda hint: psk)
+        return sslobject
+
+
+class AsyncLowLevel(object):
+    """
+    Low Level asyncio methods to communicate with a Bareos Daemon.
+
+    This is the asyncio counterpart of :py:class:`bareos.bsock.lowlevel.LowLevel`.
+    It uses the same protocol messages and authentication,
+    but all network operations are coroutines.
+    This way, many connections can be handled in a single event loop.
+
+    TLS-PSK is available, if it is supported by the ``ssl`` module (Python >= 3.13)
+    or by the ``sslpsk`` module (see :py:class:`SslPskContext`).
+
+    This class should not be used by itself,
+    only by inherited classed.
+    """
+
+    argparser_get_bareos_parameter = staticmethod(
+        LowLevel.argparser_get_bareos_parameter
+    )
+    # receive buffer handling does no I/O, so it is shared with LowLevel
+    _append_to_receive_buffer = LowLevel._append_to_receive_buffer
+    _reset_receive_buffer = LowLevel._reset_receive_buffer
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self.logger.debug("init")
+        self.status = None
+        self.address = None
+        # connect timeout, also used while authenticating
+        self.timeout = 30
+        # seconds to wait for data of command results, None: wait forever
+        self.recv_timeout = None
+        self.name = None
+        self.password = None
+        self.pam_username = None
+        self.pam_password = None
+        self.port = None
+        self.dirname = None
+        self.reader = None
+        self.writer = None
+        self.auth_credentials_valid = False
+        self.tls_psk_enable = True
+        self.tls_psk_require = False
+        # only used with the sslpsk module
+        self.tls_version = ssl.PROTOCOL_TLS
+        self.connection_type = None
+        self.requested_protocol_version = None
+        self.protocol_messages = ProtocolMessages()
+        # identity_prefix have to be set in each class
+        self.identity_prefix = "R_NONE"
+        self.receive_buffer = bytearray()
+        self.receive_buffer_line_start = 0
+        # Serializes commands of concurrent tasks on this connection.
+        # Created on first use, as it must belong to the running event loop.
+        self.lock = None
+        self.statistics = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def open(self):
+        """Establish the connection, using the parameter given to the constructor.
+
+        Implemented by the inherited classes.
+        """
+        raise NotImplementedError()
+
+    async def connect(
+        self,
+        address,
+        port,
+        dirname,
+        connection_type,
+        name=None,
+        password=None,
+        timeout=None,
+    ):
+        """Establish a network connection and authenticate.
+
+        Args:
+           address (str): Address of the Bareos Daemon (hostname or IP).
+
+           port (int): Port number of the Bareos Daemon.
+
+           dirname (str, optional):
+              Name of the Bareos Director. Deprecated, normally not required.
+
+           connection_type (int): See :py:class:`bareos.bsock.connectiontype.ConnectionType`.
+
+           name (str, optional):
+              Credential name.
+
+           password  (str, bareos.util.Password):
+              Credential password, in cleartext or as Password object.
+
+           timeout (int, optional):
+              Connection timeout in seconds.
+
+        Returns:
+           bool: True, if the authentication succeeds.
+
+        Raises:
+           bareos.exceptions.ConnectionError: If connection can be established.
+           bareos.exceptions.PamAuthenticationError: If PAM authentication fails.
+           bareos.exceptions.AuthenticationError: If Bareos authentication fails.
+        """
+        self.address = address
+        self.port = int(port)
+        if dirname:
+            self.dirname = dirname
+        else:
+            self.dirname = address
+        if timeout:
+            self.timeout = timeout
+        self.connection_type = connection_type
+        self.name = name
+        if password is None:
+            raise bareos.exceptions.ConnectionError("Parameter 'password' is required.")
+        if isinstance(password, Password):
+            self.password = password
+        else:
+            self.password = Password(password)
+
+        return await self._connect()
+
+    async def _connect(self):
+        connected = False
+        if self.tls_psk_require:
+            if not self.is_tls_psk_available():
+                raise bareos.exceptions.ConnectionError(
+                    "TLS-PSK is required, but not available."
+                )
+            if not self.tls_psk_enable:
+                raise bareos.exceptions.ConnectionError(
+                    "TLS-PSK is required, but not enabled."
+                )
+
+        if self.tls_psk_enable and self.is_tls_psk_available():
+            try:
+                await self._open_connection(self._get_tls_psk_context())
+            except (bareos.exceptions.ConnectionError, ssl.SSLError) as e:
+                await self._handleSocketError(e)
+                if self.tls_psk_require:
+                    raise
+                else:
+                    self.logger.warning(
+                        "Failed to connect via TLS-PSK. Trying plain connection."
+                    )
+            else:
+                connected = True
+                self.logger.debug("Encryption: {0}".format(self.get_cipher()))
+
+        if not connected:
+            await self._open_connection()
+            self.logger.debug("Encryption: None")
+
+        try:
+            auth = await self.auth()
+        except bareos.exceptions.PamAuthenticationError:
+            raise
+        except bareos.exceptions.AuthenticationError:
+            if (
+                self.connection_type == ConnectionType.DIRECTOR
+                and self.requested_protocol_version is None
+                and self.get_protocol_version() > ProtocolVersions.bareos_12_4
+            ):
+                # reconnect and try old protocol
+                self.logger.warning(
+                    "Failed to connect using protocol version {0}. Trying protocol version {1}. ".format(
+                        self.get_protocol_version(), ProtocolVersions.bareos_12_4
+                    )
+                )
+                await self.close()
+                await self._open_connection()
+                self.protocol_messages.set_version(ProtocolVersions.bareos_12_4)
+                auth = await self.auth()
+            else:
+                raise
+
+        return auth
+
+    async def _open_connection(self, ssl_context=None):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.address, self.port, ssl=ssl_context),
+                self.timeout,
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            await self._handleSocketError(e)
+            raise bareos.exceptions.ConnectionError(
+                "Failed to connect to host {0}, port {1}: {2}".format(
+                    self.address, self.port, str(e)
+                )
+            )
+        self.logger.debug("connected to {0}:{1}".format(self.address, self.port))
+        return True
+
+    def _get_tls_psk_context(self):
+        if not isinstance(self.password, Password):
+            raise bareos.exceptions.ConnectionError("No password provided.")
+        identity = self.get_tls_psk_identity()
+        password = self.password.md5()
+        if getattr(ssl, "HAS_PSK", False):
+            return LowLevel.get_tls_psk_context(identity, password)
+        context = SslPskContext(self.tls_version)
+        if self.tls_version == ssl.PROTOCOL_TLS:
+            # the sslpsk callbacks only work up to TLS 1.2
+            if hasattr(ssl, "TLSVersion"):
+                context.maximum_version = ssl.TLSVersion.TLSv1_2
+            else:
+                # Python < 3.7
+                context.options |= getattr(ssl, "OP_NO_TLSv1_3", 0)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.set_ciphers("ALL:!ADH:!LOW:!EXP:!MD5:@STRENGTH")
+        context.psk = (password, identity)
+        return context
+
+    def get_tls_psk_identity(self):
+        """Bareos TLS-PSK excepts the identity is a specific format."""
+        name = str(self.name)
+        if isinstance(self.name, bytes):
+            name = self.name.decode("utf-8")
+        result = "{0}{1}{2}".format(
+            self.identity_prefix, Constants.record_separator, name
+        )
+        return bytes(bytearray(result, "utf-8"))
+
+    @staticmethod
+    def is_tls_psk_available():
+        """Checks if TLS-PSK is available."""
+        return LowLevel.is_tls_psk_available()
+
+    def get_protocol_version(self):
+        """Get the Bareos Console protocol version that is used.
+
+        Returns:
+           int: Number that represents the Bareos Console protocol version (see :py:class:`bareos.bsock.protocolversions.ProtocolVersions`.)
+        """
+        return self.protocol_messages.get_version()
+
+    def get_cipher(self):
+        """
+        If a encrypted connection is used, returns information about the encryption. Else it returns None.
+
+        Returns:
+           tuple or None: Returns a three-value tuple containing the name of the cipher being used, the version of the SSL protocol that defines its use, and the number of secret bits being used. If the connection is unencrypted or has been established, returns None.
+        """
+        if self.writer is None:
+            return None
+        return self.writer.get_extra_info("cipher")
+
+    async def auth(self):
+        """
+        Login to a Bareos Daemon.
+
+        Returns:
+           bool: True, if the authentication succeeds.
+
+        Raises:
+           bareos.exceptions.AuthenticationError: if authentication fails.
+        """
+        bashed_name = self.protocol_messages.hello(self.name, type=self.connection_type)
+        # send the bash to the director
+        await self.send(bashed_name)
+
+        try:
+            result = await self._cram_md5_respond(password=self.password.md5())
+        except bareos.exceptions.SignalReceivedException as e:
+            await self._handleSocketError(e)
+            raise bareos.exceptions.AuthenticationError(
+                "Received unexcepted signal: {0}".format(str(e))
+            )
+        if not result:
+            raise bareos.exceptions.AuthenticationError("failed (in response)")
+        if not await self._cram_md5_challenge(
+            clientname=self.name, password=self.password.md5()
+        ):
+            raise bareos.exceptions.AuthenticationError("failed (in challenge)")
+
+        await self._finalize_authentication()
+
+        return self.auth_credentials_valid
+
+    async def _finalize_authentication(self):
+        raise NotImplementedError()
+
+    async def _cram_md5_challenge(self, clientname, password, tls_local_need=0):
+        """
+        client launch the challenge,
+        client confirm the dir is the correct director
+        """
+        (chal, msg) = ProtocolMessages.cram_md5_challenge(clientname, tls_local_need)
+        await self.send(msg)
+        msg = await self.recv()
+        if msg[-1] == 0:
+            del msg[-1]
+
+        chal = bytearray(chal, "utf-8")
+        is_correct = (msg == ProtocolMessages.cram_md5_hash(password, chal, True)) or (
+            msg == ProtocolMessages.cram_md5_hash(password, chal, False)
+        )
+        if is_correct:
+            await self.send(ProtocolMessages.auth_ok())
+        else:
+            self.logger.error("challenge failed, received {0}".format(msg))
+            await self.send(ProtocolMessages.auth_failed())
+        return is_correct
+
+    async def _cram_md5_respond(self, password):
+        """
+        client connect to dir,
+        the dir confirm the password and the config is correct
+        """
+        msg = await self.recv()
+
+        # invalid username
+        if ProtocolMessages.is_not_authorized(msg):
+            self.logger.error("failed: " + str(msg))
+            return False
+
+        chal = msg.split(b" ")[2]
+        await self.send(ProtocolMessages.cram_md5_hash(password, chal))
+        received = await self.recv()
+        if ProtocolMessages.is_auth_ok(received):
+            return True
+        self.logger.error("failed: " + str(received))
+        return False
+
+    async def receive_and_evaluate_response_message(self):
+        """Retrieve a message and evaluate it.
+
+        Only used during in the authentication phase.
+
+        Returns:
+           2-tuple: (code, text).
+        """
+        regex_str = r"^(\d\d\d\d){0}(.*)$".format(
+            Constants.record_separator_compat_regex
+        )
+        regex = bytes(bytearray(regex_str, "utf8"))
+        incoming_message = await self.recv_msg(regex)
+        match = re.search(regex, incoming_message, re.DOTALL)
+        code = int(match.group(1))
+        text = match.group(2)
+
+        return (code, text)
+
+    async def _init_connection(self):
+        pass
+
+    async def close(self):
+        """Close the connection."""
+        writer = self.writer
+        self.reader = None
+        self.writer = None
+        self.auth_credentials_valid = False
+        if writer is not None:
+            writer.close()
+            try:
+                # Python >= 3.7
+                if hasattr(writer, "wait_closed"):
+                    await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    def enable_statistics(self, enable=True):
+        """Enable (or disable) collecting connection statistics.
+
+        See :py:func:`bareos.bsock.lowlevel.LowLevel.enable_statistics`.
+
+        Returns:
+           ConnectionStatistics: The counters of this connection (or None, if disabled).
+        """
+        if not enable:
+            self.statistics = None
+        elif self.statistics is None:
+            self.statistics = ConnectionStatistics()
+        return self.statistics
+
+    def _get_lock(self):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        return self.lock
+
+    async def call(self, command):
+        """Call a Bareos command.
+
+        Concurrent calls on the same connection are serialized.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            bytes: Result received from the Daemon.
+        """
+        if isinstance(command, list):
+            command = " ".join(command)
+        async with self._get_lock():
+            await self.send(bytearray(command, "utf-8"))
+            return await self.recv_msg()
+
+    def call_iter(self, command):
+        """Call a Bareos command and iterate over the result while it arrives.
+
+        See :py:func:`bareos.bsock.lowlevel.LowLevel.call_iter`.
+        Other commands on this connection wait,
+        until the iteration is finished.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            async iterator: Iterator over the parts (bytes) of the result.
+        """
+        if isinstance(command, list):
+            command = " ".join(command)
+        return self._send_a_command_and_receive_iter(command)
+
+    async def _send_a_command_and_receive_iter(
+        self, command, regex=b"^\\d\\d\\d\\d OK.*$"
+    ):
+        async with self._get_lock():
+            await self.send(bytearray(command, "utf-8"))
+            chunks = self.recv_msg_iter(regex)
+            try:
+                async for data in chunks:
+                    yield data
+            finally:
+                await chunks.aclose()
+
+    async def call_many(self, commands, max_pending_bytes=65536):
+        """Call multiple Bareos commands, without waiting for each result.
+
+        See :py:func:`bareos.bsock.lowlevel.LowLevel.call_many`.
+
+        Args:
+           commands (list): Commands to execute. Each command as str or list.
+
+           max_pending_bytes (int):
+              Not more than this number of bytes of commands (at least one command)
+              are sent in advance,
+              so the Daemon can not block while waiting for its results to be read.
+
+        Returns:
+            list: Results (bytes) in the order of the commands.
+        """
+        messages = [
+            bytearray(
+                " ".join(command) if isinstance(command, list) else command, "utf-8"
+            )
+            for command in commands
+        ]
+        async with self._get_lock():
+            self.__check_connection()
+            results = []
+            pending = collections.deque()
+            pending_bytes = 0
+            sent = 0
+            try:
+                while len(results) < len(messages):
+                    frames = []
+                    while sent < len(messages) and (
+                        not pending
+                        or pending_bytes + len(messages[sent]) + 4 <= max_pending_bytes
+                    ):
+                        msg = messages[sent]
+                        if self.logger.isEnabledFor(logging.DEBUG):
+                            self.logger.debug("{0}".format(msg.rstrip()))
+                        frames.append(struct.pack("!i", len(msg)) + msg)
+                        pending.append(len(msg) + 4)
+                        pending_bytes += len(msg) + 4
+                        sent += 1
+                    if frames:
+                        data = b"".join(frames)
+                        self.writer.write(data)
+                        await self.writer.drain()
+                        if self.statistics is not None:
+                            self.statistics.messages_sent += len(frames)
+                            self.statistics.bytes_sent += len(data)
+                    results.append(await self.recv_msg())
+                    pending_bytes -= pending.popleft()
+            except OSError as e:
+                await self._handleSocketError(e)
+                raise bareos.exceptions.ConnectionLostError(
+                    "connection lost after {0} of {1} results: {2}".format(
+                        len(results), len(messages), e
+                    )
+                )
+            return results
+
+    async def send(self, msg=None):
+        """Send message to the Daemon.
+
+        Args:
+           msg (bytearray): Message to send.
+        """
+        self.__check_connection()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("{0}".format(msg.rstrip()))
+        try:
+            self.writer.write(struct.pack("!i", len(msg)) + msg)
+            await self.writer.drain()
+            if self.statistics is not None:
+                self.statistics.messages_sent += 1
+                self.statistics.bytes_sent += len(msg) + 4
+        except OSError as e:
+            await self._handleSocketError(e)
+            raise bareos.exceptions.ConnectionLostError(str(e))
+
+    async def recv_bytes(self, length):
+        """Receive a number of bytes.
+
+        Args:
+          length (int): Number of bytes to receive.
+
+        Raises:
+            bareos.exceptions.ConnectionLostError:
+               If the connection gets lost
+               or no data is received within the timeout
+               (``timeout`` until authenticated, afterwards ``recv_timeout``).
+        """
+        statistics = self.statistics
+        if self.auth_credentials_valid:
+            timeout = self.recv_timeout
+        else:
+            timeout = self.timeout
+        try:
+            if statistics is None:
+                return bytearray(
+                    await asyncio.wait_for(self.reader.readexactly(length), timeout)
+                )
+            start = time.perf_counter()
+            try:
+                data = await asyncio.wait_for(self.reader.readexactly(length), timeout)
+            finally:
+                statistics.recv_time += time.perf_counter() - start
+            statistics.bytes_received += len(data)
+            return bytearray(data)
+        except asyncio.TimeoutError as e:
+            if statistics is not None:
+                statistics.recv_timeouts += 1
+            errormsg = (
+                "No data received within {0} seconds. Closing the connection.".format(
+                    timeout
+                )
+            )
+            # the rest of the message may still arrive,
+            # so the connection can not be used anymore
+            await self._handleSocketError(e)
+            raise bareos.exceptions.ConnectionLostError(errormsg)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            errormsg = "Failed to retrieve data. Assuming the connection is lost."
+            await self._handleSocketError(e)
+            raise bareos.exceptions.ConnectionLostError(errormsg)
+
+    async def _recv_header(self):
+        header = struct.unpack("!i", await self.recv_bytes(4))[0]
+        if self.statistics is not None:
+            self.statistics.add_header(header)
+        return header
+
+    async def recv(self):
+        """Receive a single message.
+
+        Returns:
+           bytearray: Message retrieved via the connection.
+
+        Raises:
+            bareos.exceptions.SignalReceivedException:
+                If a Bareos signal is received.
+        """
+        self.__check_connection()
+        header = await self._recv_header()
+        if header <= 0:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("header: " + str(header))
+            raise bareos.exceptions.SignalReceivedException(header)
+        return await self.recv_bytes(header)
+
+    async def recv_msg(self, regex=b"^\\d\\d\\d\\d OK.*$"):
+        """Receive a full message.
+
+        It retrieves messages (header + message text),
+        until
+
+           1. the message contains the specified regex or
+           2. the header indicates a signal.
+
+        Args:
+          regex (bytes): Descripes the expected end of the message.
+
+        Returns:
+           bytes: Message retrieved via the connection.
+        """
+        self.__check_connection()
+        while True:
+            header = await self._recv_header()
+            if header <= 0:
+                # header is a signal
+                self.status = header
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(
+                        "{0} ({1})".format(Constants.get_description(header), header)
+                    )
+                if self.is_end_of_message(header):
+                    result = bytes(self.receive_buffer)
+                    self._reset_receive_buffer()
+                    return result
+            else:
+                submsg = await self.recv_bytes(header)
+                match_end = self._append_to_receive_buffer(submsg, regex)
+                if match_end is not None:
+                    result = bytes(self.receive_buffer[0:match_end])
+                    self._reset_receive_buffer(self.receive_buffer[match_end + 1 :])
+                    return result
+
+    async def recv_msg_iter(self, regex=b"^\\d\\d\\d\\d OK.*$"):
+        """Receive a full message piece by piece.
+
+        See :py:func:`bareos.bsock.lowlevel.LowLevel.recv_msg_iter`.
+
+        If the iteration is stopped early (``aclose``),
+        the rest of the message is received and discarded,
+        so that the connection stays usable.
+
+        Args:
+          regex (bytes or None): Descripes the expected end of the message.
+
+        Yields:
+           bytes: Parts of the message retrieved via the connection.
+        """
+        self.__check_connection()
+        pending = self.receive_buffer
+        self._reset_receive_buffer()
+        finished = False
+        try:
+            while True:
+                header = await self._recv_header()
+                if header <= 0:
+                    # header is a signal
+                    self.status = header
+                    if self.is_end_of_message(header):
+                        finished = True
+                        if pending:
+                            yield bytes(pending)
+                        return
+                    continue
+                submsg = await self.recv_bytes(header)
+                if regex is None:
+                    if pending:
+                        yield bytes(pending)
+                        pending = bytearray()
+                    yield bytes(submsg)
+                    continue
+                pending += submsg
+                match = re.search(regex, pending, re.DOTALL)
+                if match:
+                    finished = True
+                    self._reset_receive_buffer(pending[match.end() + 1 :])
+                    yield bytes(pending[: match.end()])
+                    return
+                newline = pending.rfind(b"\n")
+                if newline >= 0:
+                    data = bytes(pending[: newline + 1])
+                    del pending[: newline + 1]
+                    yield data
+        except GeneratorExit:
+            if not finished and self.writer is not None:
+                self.logger.debug("discarding rest of message")
+                self._reset_receive_buffer(pending)
+                async for data in self.recv_msg_iter(regex):
+                    pass
+            raise
+
+    def is_end_of_message(self, data):
+        """Checks if a Bareos signal indicates the end of a message.
+
+        Args:
+           data (int): Negative integer.
+
+        Returns:
+           bool: True, if regular end of message is reached.
+        """
+        return (
+            (not self.is_connected())
+            or data == Constants.BNET_EOD
+            or data == Constants.BNET_TERMINATE
+            or data == Constants.BNET_MAIN_PROMPT
+            or data == Constants.BNET_SUB_PROMPT
+        )
+
+    def is_connected(self):
+        """Verifes that last status still indicates connected.
+
+        Returns:
+           bool: True, if still connected.
+        """
+        return self.status != Constants.BNET_TERMINATE
+
+    def __check_connection(self):
+        if self.writer is None:
+            if self.auth_credentials_valid:
+                # connection have worked before, but now it is gone
+                raise bareos.exceptions.ConnectionLostError(
+                    "currently no network connection"
+                )
+            else:
+                raise RuntimeError("should connect to director first before send data")
+        return True
+
+    async def _handleSocketError(self, exception):
+        self.logger.warning("socket error: {0}".format(str(exception)))
+        await self.close()
@@ -0,0 +1,80 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Counters of a Bareos network connection.
+"""
+
+
+class ConnectionStatistics(object):
+    """Counters of a Bareos network connection.
+
+    Collected, when enabled by :py:func:`bareos.bsock.lowlevel.LowLevel.enable_statistics`.
+
+    Attributes:
+       bytes_sent (int): Bytes sent, including message headers.
+       bytes_received (int): Bytes received, including message headers.
+       messages_sent (int): Number of messages sent.
+       messages_received (int): Number of data messages received.
+       signals_received (int): Number of signals received.
+       recv_time (float): Seconds spent waiting for data from the network.
+       recv_timeouts (int): Number of timeouts while waiting for data.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Set all counters to zero."""
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.signals_received = 0
+        self.recv_time = 0.0
+        self.recv_timeouts = 0
+
+    def add_header(self, header):
+        """Count a received message header."""
+        if header <= 0:
+            self.signals_received += 1
+        else:
+            self.messages_received += 1
+
+    def as_dict(self):
+        """
+        Returns:
+           dict: The counters.
+        """
+        return {
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "signals_received": self.signals_received,
+            "recv_time": self.recv_time,
+            "recv_timeouts": self.recv_timeouts,
+        }
+
+    def __repr__(self):
+        return "ConnectionStatistics({0})".format(
+            ", ".join(
+                "{0}={1}".format(key, value) for key, value in self.as_dict().items()
+            )
+        )
@@ -23,8 +23,16 @@ Communicate with the Bareos Director Daemon Console interface in API mode 2 (JSO
 
 from bareos.bsock.directorconsole import DirectorConsole
 import bareos.exceptions
+from bareos.util.jsonstream import JsonStreamParser
 from pprint import pformat, pprint
 import json
+import re
+
+# Begin of a JSON-RPC result with "result" as last member,
+# as sent by the Director (when built with jansson >= 2.8, which keeps the member order).
+RAW_RESULT_PREFIX = re.compile(
+    rb'\s*\{\s*"jsonrpc"\s*:\s*"2\.0"\s*,\s*"id"\s*:\s*null\s*,\s*"result"\s*:\s*'
+)
 
 
 class DirectorConsoleJson(DirectorConsole):
@@ -84,7 +92,10 @@ class DirectorConsoleJson(DirectorConsole):
             bareos.exceptions.JsonRpcInvalidJsonReceivedException:
                 if an invalid JSON-RPC result is received.
         """
-        json = self.call_fullresult(command)
+        return self._get_result(self.call_fullresult(command))
+
+    @staticmethod
+    def _get_result(json):
         if json == None:
             return
         if "result" in json:
@@ -105,7 +116,10 @@ class DirectorConsoleJson(DirectorConsole):
             bareos.exceptions.JsonRpcInvalidJsonReceivedException:
                 if an invalid JSON-RPC result is received.
         """
-        resultstring = super(DirectorConsoleJson, self).call(command)
+        return self._parse_fullresult(super(DirectorConsoleJson, self).call(command))
+
+    @staticmethod
+    def _parse_fullresult(resultstring):
         data = None
         if resultstring:
             try:
@@ -117,5 +131,168 @@ class DirectorConsoleJson(DirectorConsole):
                 raise bareos.exceptions.JsonRpcInvalidJsonReceivedException(data)
         return data
 
+    def call_raw(self, command):
+        """Calls a command on the Bareos Director and returns its result as JSON text.
+
+        In contrast to :py:func:`call`,
+        the result is not decoded,
+        which is faster, if it is only passed on (e.g. by a web service).
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            bytes: JSON text of the result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        return self._get_raw_result(super(DirectorConsoleJson, self).call(command))
+
+    @staticmethod
+    def _get_raw_result(resultstring):
+        if resultstring:
+            match = RAW_RESULT_PREFIX.match(resultstring)
+            # end of the result: before the last "}" and whitespace
+            end = len(resultstring)
+            while end > 0 and resultstring[end - 1] in b" \t\r\n":
+                end -= 1
+            if match and end > match.end() and resultstring[end - 1] == ord("}"):
+                end -= 1
+                while resultstring[end - 1] in b" \t\r\n":
+                    end -= 1
+                # only copy the result once, as it can be large
+                return bytes(memoryview(resultstring)[match.end() : end])
+        # errors or other member order: decode and encode it again
+        result = DirectorConsoleJson._get_result(
+            DirectorConsoleJson._parse_fullresult(resultstring)
+        )
+        return json.dumps(result).encode("utf-8")
+
+    def call_many(self, commands, return_exceptions=False):
+        """Calls multiple commands on the Bareos Director, without waiting for each result.
+
+        See :py:func:`bareos.bsock.lowlevel.LowLevel.call_many`.
+        All results are received,
+        before errors are raised,
+        so the connection stays usable.
+
+        Example:
+           >>> jobs, count = directorconsole.call_many(["list jobs", "list jobs count"])
+
+        Args:
+           commands (list): Commands to execute. Each command as str or list.
+
+           return_exceptions (bool):
+              If True, errors are returned as exception objects in the result list,
+              instead of raising the first one.
+
+        Returns:
+            list: Results (dict) in the order of the commands.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        results = []
+        for resultstring in super(DirectorConsoleJson, self).call_many(commands):
+            try:
+                results.append(self._get_result(self._parse_fullresult(resultstring)))
+            except bareos.exceptions.JsonRpcErrorReceivedException as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def call_iter(self, command):
+        """Calls a command on the Bareos Director and iterates over the raw result while it arrives.
+
+        The JSON result is not interpreted.
+        As JSON results consist of a single line,
+        the received sub messages are yielded unmodified.
+        The command is sent, when the iteration starts
+        (see :py:func:`bareos.bsock.lowlevel.LowLevel.call_iter`).
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            iterator: Iterator over the parts (bytes) of the result.
+        """
+        if isinstance(command, list):
+            command = " ".join(command)
+        return self._send_a_command_and_receive_iter(command, regex=None)
+
+    def call_stream(self, command):
+        """Calls a command on the Bareos Director and parses the result while it arrives.
+
+        In contrast to :py:func:`call`,
+        the result is parsed incrementally.
+        Arrays (like ``filenames``, ``jobs`` or ``volumes``)
+        are not returned as a whole,
+        instead every element is yielded as soon as it is received.
+        Other values are yielded as well.
+        Each item is a ``(path, value)`` tuple,
+        where path is a tuple of keys (and array indexes)
+        inside the ``result`` object.
+
+        Example:
+           >>> for path, value in directorconsole.call_stream("list files jobid=1"):
+           ...   print(path, value)
+           ...
+           ('filenames', 0) {'filename': '/etc/passwd'}
+           ('filenames', 1) {'filename': '/etc/group'}
+
+        This way, even results with millions of entries
+        can be processed with constant memory.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Yields:
+            tuple: (path, value) of the result received from the Bareos Director.
+
+        Raises:
+            bareos.exceptions.JsonRpcErrorReceivedException:
+                if an JSON-RPC error object is received.
+            bareos.exceptions.JsonRpcInvalidJsonReceivedException:
+                if an invalid JSON-RPC result is received.
+        """
+        items = self._stream_result(self.call_iter(command), command)
+        try:
+            for item in items:
+                yield item
+        finally:
+            items.close()
+
+    @staticmethod
+    def _stream_result(chunks, command):
+        """Parses the JSON-RPC result, received as chunks (iterator of bytes).
+
+        See :py:func:`call_stream`. The chunks are closed at the end.
+        """
+        error = {}
+        try:
+            for path, value in JsonStreamParser(chunks):
+                if not path or not isinstance(path[0], str):
+                    raise ValueError("JSON-RPC response is not an object")
+                if path[0] == "result":
+                    yield (path[1:], value)
+                elif path[0] == "error":
+                    JsonStreamParser.set_path(error, path, value)
+        except ValueError as e:
+            data = {"error": {"code": 2, "message": str(e), "data": command}}
+            raise bareos.exceptions.JsonRpcInvalidJsonReceivedException(data)
+        finally:
+            # on early exit, the rest of the message gets discarded
+            chunks.close()
+        if error:
+            raise bareos.exceptions.JsonRpcErrorReceivedException(error)
+
     def _show_result(self, msg):
         pprint(msg)
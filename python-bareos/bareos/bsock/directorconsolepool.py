@@ -0,0 +1,381 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Pool of authenticated connections to the Bareos Director Daemon Console interface.
+"""
+
+from bareos.bsock.directorconsolejson import DirectorConsoleJson
+import bareos.exceptions
+from contextlib import contextmanager
+import logging
+import socket
+import threading
+import time
+
+
+class DirectorConsolePool(object):
+    """Thread-safe pool of authenticated Bareos Director console connections.
+
+    Establishing a console connection requires a TCP connect,
+    the TLS-PSK handshake, the CRAM-MD5 authentication
+    and the initialization of the API mode.
+    The pool keeps connections open and hands them out again.
+
+    A connection is exclusively used by one thread,
+    from :py:func:`checkout` until :py:func:`checkin`.
+    :py:func:`connection` does both as a context manager.
+
+    Example:
+       >>> import bareos.bsock
+       >>> pool = bareos.bsock.DirectorConsolePool(max_size=4, address='localhost', port=9101, name='user1', password='secret')
+       >>> with pool.connection() as directorconsole:
+       ...   pools = directorconsole.call('list pools')
+       ...
+       >>> pool.close()
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        idle_timeout=300,
+        probe_interval=30,
+        checkout_timeout=None,
+        max_reconnects=1,
+        console_class=DirectorConsoleJson,
+        **console_parameter
+    ):
+        """\
+
+        Args:
+           min_size (int): Number of connections established at start and kept open, even if idle.
+
+           max_size (int): Maximum number of connections (idle and checked out).
+
+           idle_timeout (float):
+              Connections idle longer than this (in seconds) are closed,
+              as long as more than ``min_size`` connections exist.
+              None: never close idle connections.
+
+           probe_interval (float):
+              Connections idle longer than this (in seconds)
+              are probed before they are handed out.
+              0: always probe. None: never probe.
+
+           checkout_timeout (float):
+              Default time (in seconds) :py:func:`checkout` waits
+              for a free connection, when ``max_size`` is reached.
+              None: wait forever.
+
+           max_reconnects (int):
+              Number of reconnects a connection may try
+              (see :py:func:`bareos.bsock.lowlevel.LowLevel.reconnect`),
+              while it is checked out.
+
+           console_class (class):
+              Class of the connections. Default: :py:class:`bareos.bsock.directorconsolejson.DirectorConsoleJson`.
+
+           console_parameter:
+              Parameter passed to ``console_class``,
+              e.g. ``address``, ``port``, ``name`` and ``password``.
+
+        Raises:
+          bareos.exceptions.ConnectionError: If the ``min_size`` connections can not be established.
+        """
+        self.logger = logging.getLogger()
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(
+                "invalid pool size (min_size={0}, max_size={1})".format(
+                    min_size, max_size
+                )
+            )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.probe_interval = probe_interval
+        self.checkout_timeout = checkout_timeout
+        self.max_reconnects = max_reconnects
+        self.console_class = console_class
+        self.console_parameter = console_parameter
+        self.condition = threading.Condition()
+        # idle connections as (console, last used) tuples,
+        # the most recently used at the end.
+        self.idle = []
+        # number of connections, idle or checked out
+        self.size = 0
+        self.closed = False
+        try:
+            for i in range(min_size):
+                self.idle.append((self._create(), time.monotonic()))
+                self.size += 1
+        except BaseException:
+            # do not leak the connections established so far
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create(self):
+        try:
+            return self.console_class(**self.console_parameter)
+        except socket.error as e:
+            raise bareos.exceptions.ConnectionError(
+                "failed to connect to {0}: {1}".format(
+                    self.console_parameter.get("address"), e
+                )
+            )
+
+    def _probe(self, console):
+        """Verify that an idle connection is still usable.
+
+        The connection initialization (e.g. ``.api json``) is repeated,
+        as this is permitted to every console.
+        A lost connection is reestablished by :py:func:`bareos.bsock.lowlevel.LowLevel.reconnect`.
+
+        Returns:
+           bool: True, if the connection is usable.
+        """
+        try:
+            console._init_connection()
+        except (socket.error, bareos.exceptions.Error) as e:
+            self.logger.warning("discarding connection: {0}".format(e))
+            return False
+        return console.is_connected()
+
+    def _discard(self, console):
+        try:
+            console.close()
+        except socket.error:
+            pass
+
+    def _remove_idle(self, now):
+        """Remove idle connections exceeding idle_timeout from the pool.
+
+        Must be called with the condition lock held.
+
+        Returns:
+           list: The removed connections. They must be closed by the caller.
+        """
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+        # self.idle is ordered by last use,
+        # so the expired connections are at the beginning.
+        while (
+            self.idle
+            and self.size > self.min_size
+            and now - self.idle[0][1] > self.idle_timeout
+        ):
+            expired.append(self.idle.pop(0)[0])
+            self.size -= 1
+        return expired
+
+    def evict_idle(self):
+        """Close connections that have been idle longer than ``idle_timeout``.
+
+        This is also done by :py:func:`checkout` and :py:func:`checkin`,
+        but can be called periodically to release idle connections earlier.
+
+        Returns:
+           int: Number of closed connections.
+        """
+        with self.condition:
+            expired = self._remove_idle(time.monotonic())
+        for console in expired:
+            self._discard(console)
+        return len(expired)
+
+    def checkout(self, timeout=-1):
+        """Get a connection from the pool.
+
+        An idle connection is reused,
+        if possible. Otherwise a new connection is established,
+        as long as ``max_size`` is not reached.
+        Otherwise, wait until another thread returns a connection.
+
+        Args:
+           timeout (float):
+              Time (in seconds) to wait for a free connection.
+              None: wait forever. Default: ``checkout_timeout`` of the pool.
+
+        Returns:
+           Connection (``console_class``). Must be returned by :py:func:`checkin`.
+
+        Raises:
+          bareos.exceptions.PoolTimeoutError: If no connection got available in time.
+          bareos.exceptions.ConnectionError: If no connection can be established.
+        """
+        if timeout == -1:
+            timeout = self.checkout_timeout
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        while True:
+            console = None
+            with self.condition:
+                while True:
+                    if self.closed:
+                        raise bareos.exceptions.ConnectionError(
+                            "connection pool is closed"
+                        )
+                    now = time.monotonic()
+                    expired = self._remove_idle(now)
+                    if self.idle:
+                        # reuse the most recently used connection,
+                        # so the others can expire.
+                        console, last_used = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        # reserve a slot for a new connection
+                        self.size += 1
+                        break
+                    if deadline is not None and now >= deadline:
+                        raise bareos.exceptions.PoolTimeoutError(
+                            "no connection available within {0} seconds (max_size={1})".format(
+                                timeout, self.max_size
+                            )
+                        )
+                    self.condition.wait(None if deadline is None else deadline - now)
+            for expired_console in expired:
+                self._discard(expired_console)
+
+            if console is None:
+                try:
+                    console = self._create()
+                except BaseException:
+                    self._release_slot()
+                    raise
+                break
+
+            console.max_reconnects = self.max_reconnects
+            if (
+                self.probe_interval is None
+                or now - last_used < self.probe_interval
+                or self._probe(console)
+            ):
+                break
+            self._discard(console)
+            self._release_slot()
+
+        console.max_reconnects = self.max_reconnects
+        return console
+
+    def _release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def checkin(self, console, discard=False):
+        """Return a connection to the pool.
+
+        Args:
+           console: Connection retrieved by :py:func:`checkout`.
+
+           discard (bool):
+              Close the connection instead of reusing it,
+              e.g. because its state is unknown.
+        """
+        if discard or self.closed or not console.is_connected():
+            self._discard(console)
+            self._release_slot()
+            return
+        with self.condition:
+            now = time.monotonic()
+            self.idle.append((console, now))
+            expired = self._remove_idle(now)
+            self.condition.notify()
+        for expired_console in expired:
+            self._discard(expired_console)
+
+    @contextmanager
+    def connection(self, timeout=-1):
+        """Context manager to :py:func:`checkout` and :py:func:`checkin` a connection.
+
+        If the block is left by a connection related exception,
+        the connection is discarded instead of returned to the pool.
+
+        Example:
+           >>> with pool.connection() as directorconsole:
+           ...   jobs = directorconsole.call('list jobs')
+
+        Args:
+           timeout (float): See :py:func:`checkout`.
+        """
+        console = self.checkout(timeout)
+        try:
+            yield console
+        except (
+            socket.error,
+            bareos.exceptions.ConnectionError,
+            bareos.exceptions.ConnectionLostError,
+            bareos.exceptions.SocketEmptyHeader,
+        ):
+            self.checkin(console, discard=True)
+            raise
+        except Exception:
+            # The exception is not caused by the connection
+            # (e.g. a JSON-RPC error), so it can be reused.
+            self.checkin(console)
+            raise
+        except BaseException:
+            # e.g. KeyboardInterrupt: the state of the connection is unknown.
+            self.checkin(console, discard=True)
+            raise
+        else:
+            self.checkin(console)
+
+    def call(self, command, timeout=-1):
+        """Calls a command on a connection of the pool and returns its result.
+
+        Shortcut for calling a single command
+        inside a :py:func:`connection` block.
+
+        Args:
+           command (str or list): Command to execute.
+           timeout (float): See :py:func:`checkout`.
+
+        Returns:
+           The result of the ``call`` method of the connection.
+
+        Raises:
+          bareos.exceptions.PoolTimeoutError: If no connection got available in time.
+        """
+        with self.connection(timeout) as console:
+            return console.call(command)
+
+    def close(self):
+        """Close all idle connections.
+
+        Connections currently checked out are closed,
+        when they are returned by :py:func:`checkin`.
+        """
+        with self.condition:
+            self.closed = True
+            idle = self.idle
+            self.idle = []
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for console, last_used in idle:
+            self._discard(console)
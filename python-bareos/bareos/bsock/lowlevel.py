@@ -24,10 +24,8 @@ Low Level socket methods to communicate with a Bareos Daemon.
 # Authentication code is taken from
 # https://github.com/hanxiangduo/bacula-console-python
 
-import hashlib
-import hmac
+import collections
 import logging
-import random
 import re
 from select import select
 import socket
@@ -37,12 +35,12 @@ import sys
 import time
 import warnings
 
+from bareos.bsock.connectionstatistics import ConnectionStatistics
 from bareos.bsock.constants import Constants
 from bareos.bsock.connectiontype import ConnectionType
 from bareos.bsock.protocolmessageids import ProtocolMessageIds
 from bareos.bsock.protocolmessages import ProtocolMessages
 from bareos.bsock.protocolversions import ProtocolVersions
-from bareos.util.bareosbase64 import BareosBase64
 from bareos.util.password import Password
 import bareos.exceptions
 
@@ -121,7 +119,12 @@ class LowLevel(object):
         self.protocol_messages = ProtocolMessages()
         # identity_prefix have to be set in each class
         self.identity_prefix = "R_NONE"
-        self.receive_buffer = b""
+        self.receive_buffer = bytearray()
+        # Start of the last (possibly incomplete) line in receive_buffer.
+        # Only data from this offset on has to be checked
+        # for the end of message regex.
+        self.receive_buffer_line_start = 0
+        self.statistics = None
 
     def __del__(self):
         self.close()
@@ -279,10 +282,7 @@ class LowLevel(object):
         ciphers = "ALL:!ADH:!LOW:!EXP:!MD5:@STRENGTH"
 
         if getattr(ssl, "HAS_PSK", False):
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-            context.check_hostname = False
-            context.set_ciphers(ciphers)
-            context.set_psk_client_callback(lambda hint: (identity, password))
+            context = self.get_tls_psk_context(identity, password, ciphers)
             self.socket = context.wrap_socket(client_socket, server_side=False)
         else:
             try:
@@ -310,6 +310,28 @@ class LowLevel(object):
         )
         return bytes(bytearray(result, "utf-8"))
 
+    @staticmethod
+    def get_tls_psk_context(
+        identity, password, ciphers="ALL:!ADH:!LOW:!EXP:!MD5:@STRENGTH"
+    ):
+        """Create a SSL context for a TLS-PSK client connection.
+
+        Requires TLS-PSK support in the ssl module (Python >= 3.13).
+
+        Args:
+           identity (bytes): TLS-PSK identity, see :py:func:`get_tls_psk_identity`.
+           password (bytes): Pre-shared key.
+           ciphers (str): Allowed ciphers.
+
+        Returns:
+           ssl.SSLContext: Context to wrap the connection.
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.set_ciphers(ciphers)
+        context.set_psk_client_callback(lambda hint: (identity, password))
+        return context
+
     @staticmethod
     def is_tls_psk_available():
         """Checks if TLS-PSK is available."""
@@ -400,6 +422,29 @@ class LowLevel(object):
             self.socket.close()
         self.socket = None
 
+    def enable_statistics(self, enable=True):
+        """Enable (or disable) collecting connection statistics.
+
+        Collecting statistics is disabled by default,
+        as measuring the time spent in receiving data has a small overhead.
+
+        Example:
+           >>> statistics = directorconsole.enable_statistics()
+           >>> result = directorconsole.call('list jobs')
+           >>> print(statistics.as_dict())
+
+        Args:
+           enable (bool): Enable or disable statistics.
+
+        Returns:
+           ConnectionStatistics: The counters of this connection (or None, if disabled).
+        """
+        if not enable:
+            self.statistics = None
+        elif self.statistics is None:
+            self.statistics = ConnectionStatistics()
+        return self.statistics
+
     def reconnect(self):
         """
         Tries to reconnect.
@@ -409,12 +454,20 @@ class LowLevel(object):
         """
         result = False
         if self.max_reconnects > 0:
+            self.max_reconnects -= 1
+            self.close()
+            self._reset_receive_buffer()
             try:
-                self.max_reconnects -= 1
-                if self.__connect() and self._init_connection():
+                if self.__connect():
+                    self._init_connection()
                     result = True
-            except (socket.error, bareos.exceptions.ConnectionLostError):
-                self.logger.warning("failed to reconnect")
+            except (
+                socket.error,
+                bareos.exceptions.ConnectionError,
+                bareos.exceptions.ConnectionLostError,
+                bareos.exceptions.SocketEmptyHeader,
+            ) as e:
+                self.logger.warning("failed to reconnect: {0}".format(e))
         return result
 
     def call(self, command):
@@ -430,6 +483,112 @@ class LowLevel(object):
             command = " ".join(command)
         return self._send_a_command_and_receive_result(command)
 
+    def call_iter(self, command):
+        """Call a Bareos command and iterate over the result while it arrives.
+
+        In contrast to :py:func:`call`,
+        the result is not buffered as a whole,
+        so even very large results can be processed with constant memory.
+
+        The command is sent, when the iteration starts.
+        Once started, the result must be consumed (or the iterator closed),
+        before the next command can be called.
+
+        Args:
+           command (str or list): Command to execute. Best provided as a list.
+
+        Returns:
+            iterator: Iterator over the parts (bytes) of the result.
+        """
+        if isinstance(command, list):
+            command = " ".join(command)
+        return self._send_a_command_and_receive_iter(command)
+
+    def call_many(self, commands):
+        """Call multiple Bareos commands, without waiting for each result.
+
+        The commands are sent back-to-back (pipelining)
+        and the results are received afterwards.
+        Every result is terminated by a signal (see :py:func:`is_end_of_message`),
+        so the results can be separated again.
+        Compared to calling :py:func:`call` for every command,
+        this saves a network round trip per command.
+
+        Only use commands that do not require interactive input.
+        In contrast to :py:func:`call`,
+        no reconnect is tried if the connection gets lost,
+        as it is unknown which commands have already been executed.
+
+        Args:
+           commands (list): Commands to execute. Each command as str or list.
+
+        Returns:
+            list: Results (bytes) in the order of the commands.
+        """
+        commands = [
+            " ".join(command) if isinstance(command, list) else command
+            for command in commands
+        ]
+        return self._send_commands_and_receive_results(commands)
+
+    def _send_commands_and_receive_results(self, commands, max_pending_bytes=65536):
+        """Send commands without waiting for their results.
+
+        Not more than ``max_pending_bytes`` of commands are sent in advance
+        (at least one command),
+        so the sender can not block while the daemon waits for the results to be read.
+
+        Returns:
+            list: Results (bytes) in the order of the commands.
+        """
+        self.__check_socket_connection()
+        messages = [bytearray(command, "utf-8") for command in commands]
+        results = []
+        pending = collections.deque()
+        pending_bytes = 0
+        sent = 0
+        try:
+            while len(results) < len(messages):
+                frames = []
+                while sent < len(messages) and (
+                    not pending
+                    or pending_bytes + len(messages[sent]) + 4 <= max_pending_bytes
+                ):
+                    msg = messages[sent]
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("{0}".format(msg.rstrip()))
+                    frames.append(struct.pack("!i", len(msg)) + msg)
+                    pending.append(len(msg) + 4)
+                    pending_bytes += len(msg) + 4
+                    sent += 1
+                if frames:
+                    data = b"".join(frames)
+                    self.socket.sendall(data)
+                    if self.statistics is not None:
+                        self.statistics.messages_sent += len(frames)
+                        self.statistics.bytes_sent += len(data)
+                results.append(self.recv_msg())
+                pending_bytes -= pending.popleft()
+        except socket.error as e:
+            self._handleSocketError(e)
+            raise bareos.exceptions.ConnectionLostError(
+                "connection lost after {0} of {1} results: {2}".format(
+                    len(results), len(messages), e
+                )
+            )
+        return results
+
+    def _send_a_command_and_receive_iter(self, command, regex=b"^\\d\\d\\d\\d OK.*$"):
+        # The command is sent by the generator,
+        # so that a result is only expected, if it is also discarded on close.
+        self.send(bytearray(command, "utf-8"))
+        chunks = self.recv_msg_iter(regex)
+        try:
+            for data in chunks:
+                yield data
+        finally:
+            chunks.close()
+
     def _send_a_command_and_receive_result(self, command):
         """Send a command and receive the result.
 
@@ -447,22 +606,21 @@ class LowLevel(object):
             bareos.exceptions.ConnectionLostError:
                 if the connection is lost-
         """
-        result = b""
-        try:
-            self.send(bytearray(command, "utf-8"))
-            result = self.recv_msg()
-        except (
-            bareos.exceptions.SocketEmptyHeader,
-            bareos.exceptions.ConnectionLostError,
-        ) as e:
-            self.logger.error(
-                "connection problem (%s): %s" % (type(e).__name__, str(e))
-            )
-            if self.reconnect():
-                return self._send_a_command_and_receive_result(command, count + 1)
-            else:
-                raise
-        return result
+        while True:
+            try:
+                self.send(bytearray(command, "utf-8"))
+                return self.recv_msg()
+            except (
+                bareos.exceptions.SocketEmptyHeader,
+                bareos.exceptions.ConnectionLostError,
+            ) as e:
+                self.logger.error(
+                    "connection problem (%s): %s" % (type(e).__name__, str(e))
+                )
+                # reconnect() is limited by max_reconnects,
+                # so this loop terminates.
+                if not self.reconnect():
+                    raise
 
     def send_command(self, command):
         """Alias for :py:func:`call`.
@@ -482,8 +640,12 @@ class LowLevel(object):
 
         try:
             # convert to network flow
-            self.logger.debug("{0}".format(msg.rstrip()))
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("{0}".format(msg.rstrip()))
             self.socket.sendall(struct.pack("!i", msg_len) + msg)
+            if self.statistics is not None:
+                self.statistics.messages_sent += 1
+                self.statistics.bytes_sent += msg_len + 4
         except socket.error as e:
             self._handleSocketError(e)
 
@@ -502,17 +664,30 @@ class LowLevel(object):
                meaning no data received.
         """
         self.socket.settimeout(timeout)
-        msg = b""
+        msg = bytearray(length)
+        view = memoryview(msg)
+        received = 0
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        statistics = self.statistics
         # get the message
-        while length > 0:
-            self.logger.debug("expecting {0} bytes.".format(length))
-            submsg = self.socket.recv(length)
-            if len(submsg) == 0:
+        while received < length:
+            if debug:
+                self.logger.debug("expecting {0} bytes.".format(length - received))
+            if statistics is None:
+                nbytes = self.socket.recv_into(view[received:], length - received)
+            else:
+                start = time.perf_counter()
+                try:
+                    nbytes = self.socket.recv_into(view[received:], length - received)
+                finally:
+                    statistics.recv_time += time.perf_counter() - start
+                statistics.bytes_received += nbytes
+            if nbytes == 0:
                 errormsg = "Failed to retrieve data. Assuming the connection is lost."
                 self._handleSocketError(errormsg)
                 raise bareos.exceptions.ConnectionLostError(errormsg)
-            length -= len(submsg)
-            msg += submsg
+            received += nbytes
+        view.release()
         return msg
 
     def recv(self):
@@ -535,7 +710,8 @@ class LowLevel(object):
         # get the message header
         header = self.__get_header()
         if header <= 0:
-            self.logger.debug("header: " + str(header))
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("header: " + str(header))
             raise bareos.exceptions.SignalReceivedException(header)
         # get the message
         length = header
@@ -563,61 +739,143 @@ class LowLevel(object):
         """
         self.__check_socket_connection()
         try:
-            timeouts = 0
             while True:
                 # get the message header
-                try:
-                    header = self.__get_header()
-                except (socket.timeout, ssl.SSLError) as exception:
-                    # When using a SSL connection,
-                    # a timeout is raised as
-                    # ssl.SSLError exception with message: 'The read operation timed out'.
-                    # ssl.SSLError is inherited from socket.error.
-                    # Because we can't be sure,
-                    # that it is really a timeout, we log it.
-                    if isinstance(exception, ssl.SSLError) and self.logger.isEnabledFor(
-                        logging.DEBUG
-                    ):
-                        # self.logger.exception('On SSL connections, timeout are raised as ssl.SSLError exceptions:')
-                        self.logger.debug("{0}".format(repr(exception)))
-                    self.logger.debug("timeout (%i) on receiving header" % (timeouts))
-                    timeouts += 1
+                header = self.__get_header_retry_on_timeout()
+                if header <= 0:
+                    # header is a signal
+                    self.__set_status(header)
+                    if self.is_end_of_message(header):
+                        result = bytes(self.receive_buffer)
+                        self._reset_receive_buffer()
+                        return result
                 else:
-                    if header <= 0:
-                        # header is a signal
-                        self.__set_status(header)
-                        if self.is_end_of_message(header):
-                            result = self.receive_buffer
-                            self.receive_buffer = b""
-                            return result
-                    else:
-                        # header is the length of the next message
-                        length = header
-                        submsg = self.recv_submsg(length)
-                        # check for regex in new submsg
-                        # and last line in old message,
-                        # which might have been incomplete without new submsg.
-                        lastlineindex = self.receive_buffer.rfind(b"\n") + 1
-                        self.receive_buffer += submsg
-                        match = re.search(
-                            regex, self.receive_buffer[lastlineindex:], re.DOTALL
-                        )
-                        # Bareos indicates end of command result by line starting with 4 digits
-                        if match:
+                    # header is the length of the next message
+                    length = header
+                    submsg = self.recv_submsg(length)
+                    match_end = self._append_to_receive_buffer(submsg, regex)
+                    # Bareos indicates end of command result by line starting with 4 digits
+                    if match_end is not None:
+                        if self.logger.isEnabledFor(logging.DEBUG):
                             self.logger.debug(
                                 'msg "{0}" matches regex "{1}"'.format(
                                     self.receive_buffer.strip(), regex
                                 )
                             )
-                            result = self.receive_buffer[
-                                0 : lastlineindex + match.end()
-                            ]
-                            self.receive_buffer = self.receive_buffer[
-                                lastlineindex + match.end() + 1 :
-                            ]
-                            return result
+                        result = bytes(self.receive_buffer[0:match_end])
+                        self._reset_receive_buffer(self.receive_buffer[match_end + 1 :])
+                        return result
+        except socket.error as e:
+            self._handleSocketError(e)
+
+    def recv_msg_iter(self, regex=b"^\\d\\d\\d\\d OK.*$"):
+        """Receive a full message piece by piece.
+
+        Like :py:func:`recv_msg`,
+        but the data is yielded as soon as it arrives,
+        instead of returning the whole message at once.
+
+        If a regex is given,
+        data is yielded up to the last complete line,
+        as the incomplete last line might still match the regex.
+        If regex is None, the received sub messages are yielded unmodified
+        and only a signal ends the message.
+
+        If the iteration is stopped early,
+        the rest of the message is received and discarded,
+        so that the connection stays usable.
+        If the connection has been closed before,
+        nothing is received.
+
+        Args:
+          regex (bytes or None): Descripes the expected end of the message.
+
+        Yields:
+           bytes: Parts of the message retrieved via the connection.
+        """
+        self.__check_socket_connection()
+        pending = self.receive_buffer
+        self._reset_receive_buffer()
+        finished = False
+        try:
+            while True:
+                header = self.__get_header_retry_on_timeout()
+                if header <= 0:
+                    # header is a signal
+                    self.__set_status(header)
+                    if self.is_end_of_message(header):
+                        finished = True
+                        if pending:
+                            yield bytes(pending)
+                        return
+                    continue
+                submsg = self.recv_submsg(header)
+                if regex is None:
+                    if pending:
+                        yield bytes(pending)
+                        pending = bytearray()
+                    yield bytes(submsg)
+                    continue
+                pending += submsg
+                match = re.search(regex, pending, re.DOTALL)
+                if match:
+                    finished = True
+                    self._reset_receive_buffer(pending[match.end() + 1 :])
+                    yield bytes(pending[: match.end()])
+                    return
+                newline = pending.rfind(b"\n")
+                if newline >= 0:
+                    data = bytes(pending[: newline + 1])
+                    del pending[: newline + 1]
+                    yield data
         except socket.error as e:
+            finished = True
             self._handleSocketError(e)
+        except GeneratorExit:
+            if not finished and self.socket is not None:
+                self.logger.debug("discarding rest of message")
+                self._reset_receive_buffer(pending)
+                for data in self.recv_msg_iter(regex):
+                    pass
+            raise
+
+    def _append_to_receive_buffer(self, submsg, regex):
+        """Append a sub message to the receive buffer and check for the end of message.
+
+        Check for regex in new submsg
+        and last line in old message,
+        which might have been incomplete without new submsg.
+        Data before that line has already been checked,
+        so the costs only depend on the newly arrived data.
+
+        Args:
+           submsg (bytearray): Newly received data.
+           regex (bytes): Descripes the expected end of the message.
+
+        Returns:
+           int or None: Offset of the end of the match inside the receive buffer
+           or None, if the regex does not match.
+        """
+        lastlineindex = self.receive_buffer_line_start
+        self.receive_buffer += submsg
+        newline = submsg.rfind(b"\n")
+        if newline >= 0:
+            self.receive_buffer_line_start = (
+                len(self.receive_buffer) - len(submsg) + newline + 1
+            )
+        # Use memoryviews, so the tail does not have to be copied.
+        # They must be released before the buffer can be resized again.
+        with memoryview(self.receive_buffer) as view:
+            with view[lastlineindex:] as tail:
+                match = re.search(regex, tail, re.DOTALL)
+                if match:
+                    return lastlineindex + match.end()
+        return None
+
+    def _reset_receive_buffer(self, data=b""):
+        self.receive_buffer = bytearray(data)
+        newline = self.receive_buffer.rfind(b"\n")
+        self.receive_buffer_line_start = newline + 1
 
     def recv_submsg(self, length):
         """Retrieve a message of the specific length.
@@ -629,11 +887,8 @@ class LowLevel(object):
            bytearray: Retrieved message.
         """
         msg = self.recv_bytes(length)
-        if type(msg) is str:
-            msg = bytearray(msg.decode("utf-8", "replace"), "utf-8")
-        if type(msg) is bytes:
-            msg = bytearray(msg)
-        self.logger.debug(str(msg))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(str(msg))
         return msg
 
     def interactive(self):
@@ -678,9 +933,33 @@ class LowLevel(object):
             if msg[-2] != ord(b"\n"):
                 sys.stdout.write("\n")
 
+    def __get_header_retry_on_timeout(self):
+        timeouts = 0
+        while True:
+            try:
+                return self.__get_header()
+            except (socket.timeout, ssl.SSLError) as exception:
+                # When using a SSL connection,
+                # a timeout is raised as
+                # ssl.SSLError exception with message: 'The read operation timed out'.
+                # ssl.SSLError is inherited from socket.error.
+                # Because we can't be sure,
+                # that it is really a timeout, we log it.
+                if isinstance(exception, ssl.SSLError) and self.logger.isEnabledFor(
+                    logging.DEBUG
+                ):
+                    # self.logger.exception('On SSL connections, timeout are raised as ssl.SSLError exceptions:')
+                    self.logger.debug("{0}".format(repr(exception)))
+                self.logger.debug("timeout (%i) on receiving header", timeouts)
+                timeouts += 1
+                if self.statistics is not None:
+                    self.statistics.recv_timeouts += 1
+
     def __get_header(self, timeout=10):
-        header = self.recv_bytes(4, timeout)
-        return self.__get_header_data(header)
+        header = self.__get_header_data(self.recv_bytes(4, timeout))
+        if self.statistics is not None:
+            self.statistics.add_header(header)
+        return header
 
     def __get_header_data(self, header):
         # struct.unpack:
@@ -725,10 +1004,7 @@ class LowLevel(object):
         # get the timestamp
         # here is the console
         # to confirm the director so can do this on bconsole`way
-        rand = random.randint(1000000000, 9999999999)
-        # chal = "<%u.%u@%s>" %(rand, int(time.time()), self.dirname)
-        chal = "<%u.%u@%s>" % (rand, int(time.time()), clientname)
-        msg = bytearray("auth cram-md5 %s ssl=%d\n" % (chal, tls_local_need), "utf-8")
+        (chal, msg) = ProtocolMessages.cram_md5_challenge(clientname, tls_local_need)
         # send the confirmation
         self.send(msg)
         # get the response
@@ -738,14 +1014,9 @@ class LowLevel(object):
         self.logger.debug("received: " + str(msg))
 
         # hash with password
-        hmac_md5 = hmac.new(password, None, hashlib.md5)
-        hmac_md5.update(bytes(bytearray(chal, "utf-8")))
-        bbase64compatible = BareosBase64().string_to_base64(
-            bytearray(hmac_md5.digest()), True
-        )
-        bbase64notcompatible = BareosBase64().string_to_base64(
-            bytearray(hmac_md5.digest()), False
-        )
+        chal = bytearray(chal, "utf-8")
+        bbase64compatible = ProtocolMessages.cram_md5_hash(password, chal, True)
+        bbase64notcompatible = ProtocolMessages.cram_md5_hash(password, chal, False)
         self.logger.debug("string_to_base64, compatible:     " + str(bbase64compatible))
         self.logger.debug(
             "string_to_base64, not compatible: " + str(bbase64notcompatible)
@@ -795,11 +1066,8 @@ class LowLevel(object):
         ssl = int(msg_list[3][4])
         compatible = True
         # hmac chal and the password
-        hmac_md5 = hmac.new((password), None, hashlib.md5)
-        hmac_md5.update(bytes(chal))
-
-        # base64 encoding
-        msg = BareosBase64().string_to_base64(bytearray(hmac_md5.digest()))
+        # and base64 encoding
+        msg = ProtocolMessages.cram_md5_hash(password, chal)
 
         # send the base64 encoding to director
         self.send(msg)
@@ -812,8 +1080,9 @@ class LowLevel(object):
 
     def __set_status(self, status):
         self.status = status
-        status_text = Constants.get_description(status)
-        self.logger.debug(str(status_text) + " (" + str(status) + ")")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            status_text = Constants.get_description(status)
+            self.logger.debug(str(status_text) + " (" + str(status) + ")")
 
     def has_data(self):
         """Is readable data available?
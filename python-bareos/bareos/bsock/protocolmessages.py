@@ -21,11 +21,17 @@
 Protocol messages between bareos-director and user-agent.
 """
 
+import hashlib
+import hmac
+import random
+import time
+
 from bareos import __version__
 from bareos.bsock.connectiontype import ConnectionType
 from bareos.bsock.constants import Constants
 from bareos.bsock.protocolmessageids import ProtocolMessageIds
 from bareos.bsock.protocolversions import ProtocolVersions
+from bareos.util.bareosbase64 import BareosBase64
 
 
 class ProtocolMessages:
@@ -92,3 +98,34 @@ class ProtocolMessages:
             ),
             "utf-8",
         )
+
+    @staticmethod
+    def cram_md5_challenge(clientname, tls_local_need=0):
+        """
+        Create a CRAM-MD5 challenge.
+
+        Returns:
+           2-tuple: (challenge (str), message to send (bytearray)).
+        """
+        rand = random.randint(1000000000, 9999999999)
+        chal = "<%u.%u@%s>" % (rand, int(time.time()), clientname)
+        msg = bytearray("auth cram-md5 %s ssl=%d\n" % (chal, tls_local_need), "utf-8")
+        return (chal, msg)
+
+    @staticmethod
+    def cram_md5_hash(password, challenge, compatible=False):
+        """
+        Hash a CRAM-MD5 challenge with the password
+        and encode it with Bareos base64.
+
+        Args:
+           password (bytes): MD5 hash of the password.
+           challenge (bytes): The challenge.
+           compatible (bool): Use the Bacula compatible base64 variant.
+
+        Returns:
+           bytearray: base 64 representation of the hash.
+        """
+        hmac_md5 = hmac.new(password, None, hashlib.md5)
+        hmac_md5.update(bytes(challenge))
+        return bytearray(BareosBase64.bin_to_base64(hmac_md5.digest(), compatible))
@@ -1,6 +1,6 @@
 #   BAREOS - Backup Archiving REcovery Open Sourced
 #
-#   Copyright (C) 2015-2021 Bareos GmbH & Co. KG
+#   Copyright (C) 2015-2024 Bareos GmbH & Co. KG
 #
 #   This program is Free Software; you can redistribute it and/or
 #   modify it under the terms of version three of the GNU Affero General Public
@@ -60,6 +60,12 @@ class PamAuthenticationError(AuthenticationError):
     pass
 
 
+class PoolTimeoutError(ConnectionError):
+    """No connection of a connection pool got available in time."""
+
+    pass
+
+
 class SignalReceivedException(Error):
     """Received a Bareos signal during a connection."""
 
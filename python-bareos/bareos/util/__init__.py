@@ -23,8 +23,19 @@ Bareos utility classes.
 
 from bareos.util.argparse import ArgumentParser
 from bareos.util.bareosbase64 import BareosBase64
+from bareos.util.jsonstream import JsonStreamParser
+from bareos.util.lstat import LStat, LStatColumns
 from bareos.util.password import Password
 from bareos.util.path import Path
 from bareos.util.version import Version
 
-__all__ = ["ArgumentParser", "BareosBase64", "Password", "Path", "Version"]
+__all__ = [
+    "ArgumentParser",
+    "BareosBase64",
+    "JsonStreamParser",
+    "LStat",
+    "LStatColumns",
+    "Password",
+    "Path",
+    "Version",
+]
@@ -1,6 +1,6 @@
 #   BAREOS - Backup Archiving REcovery Open Sourced
 #
-#   Copyright (C) 2015-2021 Bareos GmbH & Co. KG
+#   Copyright (C) 2015-2024 Bareos GmbH & Co. KG
 #
 #   This program is Free Software; you can redistribute it and/or
 #   modify it under the terms of version three of the GNU Affero General Public
@@ -21,19 +21,53 @@
 Bareos specific base64 implementation.
 
 Bacula and therefore Bareos specific implementation of a base64 decoder.
+
+In contrast to the standard base64 encoding,
+integers are encoded (e.g. in the lstat field of the catalog)
+as a sequence of base64 digits (most significant first),
+and binary data is encoded without padding.
 """
 
+BASE64_DIGITS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+# base64 digit (byte value) -> integer value
+BASE64_MAP = dict((digit, value) for value, digit in enumerate(BASE64_DIGITS))
+
+
+def _get_octal_translation_tables():
+    # Each base64 digit is represented by two octal digits.
+    # bytes.translate() converts only one byte into one byte,
+    # therefore one table for the high and one for the low octal digit.
+    # Whitespace is kept, a minus sign becomes "-0",
+    # other invalid characters count as 0 (as in the Bareos core).
+    high = bytearray(b"0" * 256)
+    low = bytearray(b"0" * 256)
+    for whitespace in b" \t\n\r":
+        high[whitespace] = whitespace
+        low[whitespace] = whitespace
+    high[ord("-")] = ord("-")
+    for digit, value in BASE64_MAP.items():
+        high[digit] = ord("0") + (value >> 3)
+        low[digit] = ord("0") + (value & 7)
+    return (bytes(high), bytes(low))
+
+
+_OCTAL_HIGH, _OCTAL_LOW = _get_octal_translation_tables()
+
 
 class BareosBase64(object):
     """Bareos specific base64 implementation."""
 
-    base64_digits = list(
-        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-    )
+    base64_digits = list(BASE64_DIGITS.decode("ascii"))
+
+    base64_map = dict((chr(digit), value) for digit, value in BASE64_MAP.items())
 
     def __init__(self):
-        """Initialize the Base 64 conversion routines."""
-        self.base64_map = dict(list(zip(self.base64_digits, list(range(0, 64)))))
+        """Initialize the Base 64 conversion routines.
+
+        The conversion tables are created once, at module level.
+        """
+        pass
 
     @staticmethod
     def twos_comp(val, bits):
@@ -42,6 +76,25 @@ class BareosBase64(object):
             val = val - (1 << bits)
         return val
 
+    @staticmethod
+    def from_base64(base64):
+        """Convert a base 64 string to integer.
+
+        Args:
+           base64 (str or bytes): base 64 string.
+
+        Returns:
+           int: Integer value of the base64 string.
+        """
+        if isinstance(base64, str):
+            base64 = base64.encode("ascii", "replace")
+        value = 0
+        neg = base64[:1] == b"-"
+        for digit in base64[1:] if neg else base64:
+            # like the Bareos core, treat invalid characters as 0
+            value = (value << 6) + BASE64_MAP.get(digit, 0)
+        return -value if neg else value
+
     def base64_to_int(self, base64):
         """Convert a base 64 string to integer.
 
@@ -51,22 +104,31 @@ class BareosBase64(object):
         Returns:
            int: Integer value of the base64 string.
         """
-        value = 0
-        first = 0
-        neg = False
+        return self.from_base64(base64)
 
-        if base64[0] == "-":
-            neg = True
-            first = 1
+    @staticmethod
+    def to_base64(value):
+        """Convert an integer to base 64.
 
-        for i in range(first, len(base64)):
-            value = value << 6
-            try:
-                value += self.base64_map[base64[i]]
-            except KeyError:
-                print("KeyError:", i)
+        Args:
+           value (int): integer value.
 
-        return -value if neg else value
+        Returns:
+           bytes: base 64 representation of value.
+        """
+        result = bytearray()
+        negative = value < 0
+        if negative:
+            value = -value
+        while True:
+            result.append(BASE64_DIGITS[value & 0x3F])
+            value >>= 6
+            if not value:
+                break
+        if negative:
+            result.append(ord("-"))
+        result.reverse()
+        return bytes(result)
 
     def int_to_base64(self, value):
         """Convert an integer to base 64.
@@ -77,53 +139,101 @@ class BareosBase64(object):
         Returns:
            str: base 64 representation of value.
         """
-        result = ""
-        if value < 0:
-            result = "-"
-            value = -value
-
-        while value:
-            charnumber = value % 0x3F
-            result += self.base64_digits[charnumber]
-            value = value >> 6
-        return result
+        return self.to_base64(value).decode("ascii")
 
-    def string_to_base64(self, string, compatible=False):
-        """Convert a string to base64.
+    @staticmethod
+    def bin_to_base64(data, compatible=False):
+        """Convert binary data to base64.
 
         Args:
-           string (str): string to be converted.
+           data (bytes or bytearray): data to be converted.
            compatible (bool): If True, generate Baculas broken version of base 64 strings.
 
         Returns:
-           bytearray: base 64 representation of the given string.
+           bytes: base 64 representation of the given data.
         """
-        buf = ""
+        result = bytearray()
         reg = 0
         rem = 0
-        char = 0
         i = 0
-        while i < len(string):
+        length = len(data)
+        while i < length:
             if rem < 6:
-                reg <<= 8
-                char = string[i]
-                if not compatible:
-                    if char >= 128:
-                        char = self.twos_comp(char, 8)
-                reg |= char
+                char = data[i]
+                if not compatible and char >= 128:
+                    # signed char, as uint32 (like the Bareos core)
+                    char |= 0xFFFFFF00
+                reg = ((reg << 8) | char) & 0xFFFFFFFF
                 i += 1
                 rem += 8
-
-            save = reg
-            reg >>= rem - 6
-            buf += self.base64_digits[reg & 0x3F]
-            reg = save
+            result.append(BASE64_DIGITS[(reg >> (rem - 6)) & 0x3F])
             rem -= 6
 
         if rem:
             mask = (1 << rem) - 1
             if compatible:
-                buf += self.base64_digits[(reg & mask) << (6 - rem)]
+                result.append(BASE64_DIGITS[(reg & mask) << (6 - rem)])
             else:
-                buf += self.base64_digits[reg & mask]
-        return bytearray(buf, "utf-8")
+                result.append(BASE64_DIGITS[reg & mask])
+        return bytes(result)
+
+    def string_to_base64(self, string, compatible=False):
+        """Convert a string to base64.
+
+        Args:
+           string (str): string to be converted.
+           compatible (bool): If True, generate Baculas broken version of base 64 strings.
+
+        Returns:
+           bytearray: base 64 representation of the given string.
+        """
+        return bytearray(self.bin_to_base64(string, compatible))
+
+    @staticmethod
+    def decode_fields(data):
+        """Convert a string of whitespace separated base 64 values to integers.
+
+        This is the format of the stat (lstat) field
+        of the catalog, ``list files`` and bvfs output.
+
+        Example:
+           >>> BareosBase64.decode_fields("A A IH/ B A A A BAA B BnM5qx BnM5qx BnM5qx A A C")
+           [0, 0, 33279, 1, 0, 0, 0, 4096, 1, 1731435185, 1731435185, 1731435185, 0, 0, 2]
+
+        Args:
+           data (str or bytes): whitespace separated base 64 values.
+
+        Returns:
+           list: Integer values.
+        """
+        return BareosBase64.decode_fields_many([data])[0]
+
+    @staticmethod
+    def decode_fields_many(strings):
+        """Convert many strings of whitespace separated base 64 values to integers.
+
+        Like :py:func:`decode_fields`,
+        but faster when converting many strings,
+        as all strings are translated at once.
+
+        Args:
+           strings (iterable): strings (str or bytes) of whitespace separated base 64 values.
+
+        Returns:
+           list: A list of integer values for every string.
+        """
+        strings = [
+            string.encode("ascii", "replace") if isinstance(string, str) else string
+            for string in strings
+        ]
+        if not strings:
+            return []
+        data = b"\n".join(strings)
+        # Convert every base 64 digit into two octal digits,
+        # so that int() can do the conversion.
+        octal = bytearray(2 * len(data))
+        octal[0::2] = data.translate(_OCTAL_HIGH)
+        octal[1::2] = data.translate(_OCTAL_LOW)
+        return [
+            [int(field, 8) for field in line.split()] for line in octal.split(b"\n\n")
+        ]
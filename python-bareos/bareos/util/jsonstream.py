@@ -0,0 +1,221 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Incremental parser for large JSON documents.
+"""
+
+import codecs
+import json
+import re
+
+
+class JsonStreamParser(object):
+    """Parse a JSON document while it arrives.
+
+    JSON objects are descended into,
+    the elements of arrays are decoded one by one.
+    Each array element and each other value is yielded as a ``(path, value)`` tuple.
+    The path is a tuple of object keys and array indexes.
+
+    Example:
+       >>> parser = JsonStreamParser([b'{"result": {"jobs": [{"jobid": "1"}, ', b'{"jobid": "2"}]}}'])
+       >>> for path, value in parser:
+       ...   print(path, value)
+       ...
+       ('result', 'jobs', 0) {'jobid': '1'}
+       ('result', 'jobs', 1) {'jobid': '2'}
+
+    Only a single array element has to be kept in memory at a time.
+    """
+
+    whitespace = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, chunks, encoding="utf-8"):
+        """\
+
+        Args:
+           chunks (iterable): Iterable of bytes, containing the JSON document.
+
+           encoding (str): Encoding of the JSON document.
+        """
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self):
+        if not self._skip_whitespace():
+            return
+        if self.buffer[self.pos] == "{":
+            for item in self._parse_object(()):
+                yield item
+        elif self.buffer[self.pos] == "[":
+            for item in self._parse_array(()):
+                yield item
+        else:
+            yield ((), self._decode_value())
+        if self._skip_whitespace():
+            self._raise("Extra data")
+
+    def _fill(self, minimum=1):
+        """Read at least minimum more characters into the buffer.
+
+        Returns:
+           bool: False, if the end of the data is reached.
+        """
+        data = []
+        length = 0
+        while length < minimum:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                data.append(self.decoder.decode(b"", True))
+                self.eof = True
+                break
+            text = self.decoder.decode(chunk)
+            data.append(text)
+            length += len(text)
+        self.buffer = self.buffer[self.pos :] + "".join(data)
+        self.pos = 0
+        return length > 0
+
+    def _skip_whitespace(self):
+        """Skip whitespace.
+
+        Returns:
+           bool: True, if there is more data.
+        """
+        while True:
+            self.pos = self.whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return True
+            if self.eof or not self._fill():
+                return self.pos < len(self.buffer)
+
+    def _next_char(self):
+        if not self._skip_whitespace():
+            self._raise("Unexpected end of data")
+        return self.buffer[self.pos]
+
+    def _expect(self, chars):
+        char = self._next_char()
+        if char not in chars:
+            self._raise("Expecting one of '{0}'".format(chars))
+        self.pos += 1
+        return char
+
+    def _decode_value(self):
+        """Decode a complete JSON value at the current position.
+
+        A value is only considered complete,
+        if it is followed by another character (or the end of data),
+        otherwise a number could be cut off.
+        When more data is required,
+        the buffer is at least doubled,
+        so that a large value is not decoded over and over again.
+        """
+        if self.pos >= len(self.buffer) or self.buffer[self.pos] in " \t\n\r":
+            self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except ValueError as exception:
+                if self.eof:
+                    self._raise(str(exception))
+            else:
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill(max(len(self.buffer) - self.pos, 1))
+
+    def _parse_object(self, path):
+        self._expect("{")
+        if self._next_char() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self._next_char() != '"':
+                self._raise("Expecting property name")
+            key = self._decode_value()
+            self._expect(":")
+            char = self._next_char()
+            if char == "{":
+                for item in self._parse_object(path + (key,)):
+                    yield item
+            elif char == "[":
+                for item in self._parse_array(path + (key,)):
+                    yield item
+            else:
+                yield (path + (key,), self._decode_value())
+            if self._expect(",}") == "}":
+                return
+
+    def _parse_array(self, path):
+        self._expect("[")
+        if self._next_char() == "]":
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield (path + (index,), self._decode_value())
+            index += 1
+            # shortcut for the common case of a directly following separator
+            if self.pos < len(self.buffer) and self.buffer[self.pos] == ",":
+                self.pos += 1
+            elif self._expect(",]") == "]":
+                return
+
+    def _raise(self, message):
+        raise ValueError(
+            "{0}: position {1}: {2!r}".format(
+                message, self.pos, self.buffer[self.pos : self.pos + 40]
+            )
+        )
+
+    @staticmethod
+    def set_path(data, path, value):
+        """Insert a value, retrieved by the parser, into a nested structure.
+
+        This can be used to reassemble (parts of) the parsed document.
+
+        Args:
+           data (dict): Structure to extend.
+
+           path (tuple): Path as returned by the parser.
+
+           value: Value as returned by the parser.
+        """
+        for key, next_key in zip(path, path[1:]):
+            if isinstance(next_key, int):
+                default = []
+            else:
+                default = {}
+            if isinstance(data, list):
+                if key >= len(data):
+                    data.append(default)
+                data = data[key]
+            else:
+                data = data.setdefault(key, default)
+        if isinstance(data, list):
+            data.append(value)
+        else:
+            data[path[-1]] = value
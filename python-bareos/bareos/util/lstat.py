@@ -0,0 +1,273 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Decode Bareos lstat strings.
+
+The lstat string (the ``lstat`` field of the File table,
+``list files`` and the bvfs commands)
+contains the stat information of a file,
+encoded as space separated Bareos base 64 values.
+"""
+
+from array import array
+from itertools import repeat
+
+from bareos.util.bareosbase64 import (
+    BASE64_MAP,
+    BareosBase64,
+    _OCTAL_HIGH,
+    _OCTAL_LOW,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class LStat(object):
+    """Decode a single lstat string.
+
+    Example:
+       >>> LStat.decode("A A IH/ B A A A BAA B BnM5qx BnM5qx BnM5qx A A C")["mode"]
+       33279
+    """
+
+    # Field order as written by EncodeStat() of the Bareos core.
+    # The last three fields are optional.
+    fields = (
+        "dev",
+        "ino",
+        "mode",
+        "nlink",
+        "uid",
+        "gid",
+        "rdev",
+        "size",
+        "blksize",
+        "blocks",
+        "atime",
+        "mtime",
+        "ctime",
+        "linkfi",
+        "flags",
+        "data_stream",
+    )
+
+    @classmethod
+    def decode(cls, lstat):
+        """Decode a lstat string.
+
+        Args:
+           lstat (str or bytes): lstat string.
+
+        Returns:
+           dict: field name -> value. Missing optional fields are 0.
+        """
+        values = BareosBase64.decode_fields(lstat)
+        values += [0] * (len(cls.fields) - len(values))
+        return dict(zip(cls.fields, values))
+
+
+class LStatColumns(object):
+    """Decode many lstat strings into columns.
+
+    Every field is stored in an ``array.array`` of 64 bit integers,
+    instead of a dict per file.
+    If NumPy is available, the strings are decoded vectorized.
+
+    Example:
+       >>> columns = LStatColumns(fields=["mode", "size"])
+       >>> columns.extend(["A A IH/ B A A A BAA B BnM5qx BnM5qx BnM5qx A A C"])
+       >>> len(columns), sum(columns["size"])
+       (1, 4096)
+    """
+
+    # Number of lstat strings decoded at once by NumPy,
+    # to limit the size of the temporary arrays.
+    numpy_batch_size = 100000
+
+    def __init__(self, fields=None, use_numpy=None):
+        """\
+
+        Args:
+           fields (list): Names of the fields to store (see :py:attr:`LStat.fields`). Default: all.
+
+           use_numpy (bool): Use NumPy for decoding. Default: if available.
+        """
+        if fields is None:
+            fields = LStat.fields
+        for field in fields:
+            if field not in LStat.fields:
+                raise ValueError("unknown lstat field {0}".format(field))
+        self.fields = tuple(fields)
+        self.indexes = tuple(LStat.fields.index(field) for field in self.fields)
+        self.columns = dict((field, array("q")) for field in self.fields)
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError("NumPy is not available")
+        self.use_numpy = use_numpy
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, field):
+        """
+        Returns:
+           array.array: The values of the field.
+        """
+        return self.columns[field]
+
+    def extend(self, lstats):
+        """Decode lstat strings and append them to the columns.
+
+        Args:
+           lstats (list): lstat strings (str or bytes).
+        """
+        lstats = [
+            lstat.encode("ascii", "replace") if isinstance(lstat, str) else lstat
+            for lstat in lstats
+        ]
+        if self.use_numpy:
+            for start in range(0, len(lstats), self.numpy_batch_size):
+                self._extend_numpy(lstats[start : start + self.numpy_batch_size])
+        else:
+            self._extend_python(lstats)
+        self.length += len(lstats)
+
+    def _extend_python(self, lstats):
+        if not lstats:
+            return
+        # Like BareosBase64.decode_fields_many(),
+        # but every row is terminated by the token "99" (not octal),
+        # so that all fields can be split at once.
+        data = b" \n ".join(lstats) + b" \n "
+        octal = bytearray(2 * len(data))
+        octal[0::2] = data.translate(_OCTAL_HIGH_ROWS)
+        octal[1::2] = data.translate(_OCTAL_LOW_ROWS)
+        tokens = octal.split()
+        rows = len(lstats)
+        width = tokens.index(b"99")
+        if (
+            len(tokens) != rows * (width + 1)
+            or tokens[width :: width + 1].count(b"99") != rows
+        ):
+            # rows with different number of fields
+            self._extend_python_rows(tokens)
+            return
+        for field, index in zip(self.fields, self.indexes):
+            if index < width:
+                self.columns[field].extend(
+                    map(int, tokens[index :: width + 1], repeat(8))
+                )
+            else:
+                self.columns[field].frombytes(bytes(8 * rows))
+
+    def _extend_python_rows(self, tokens):
+        nfields = len(LStat.fields)
+        start = 0
+        row = []
+        for end, token in enumerate(tokens):
+            if token == b"99":
+                row = [int(value, 8) for value in tokens[start:end]]
+                row = (row + [0] * nfields)[:nfields]
+                for field, index in zip(self.fields, self.indexes):
+                    self.columns[field].append(row[index])
+                start = end + 1
+
+    def _extend_numpy(self, lstats):
+        if not lstats:
+            return
+        data = numpy.frombuffer(b"\n".join(lstats) + b"\n", dtype=numpy.uint8)
+        separator = (data == ord(" ")) | (data == ord("\n"))
+        # first and last character of every field
+        is_start = ~separator & numpy.r_[True, separator[:-1]]
+        starts = numpy.flatnonzero(is_start)
+        rows = len(lstats)
+        if len(starts) == 0:
+            # only empty lstats
+            for field in self.fields:
+                self.columns[field].frombytes(bytes(8 * rows))
+            return
+        ends = numpy.flatnonzero(~separator & numpy.r_[separator[1:], True])
+        # Value of every character: digit * 64 ** (position from the end of its field).
+        # Separators and minus signs contribute 0.
+        field_of_character = numpy.cumsum(is_start) - 1
+        position = ends[field_of_character] - numpy.arange(len(data))
+        position[separator] = 0
+        numpy.clip(position, 0, 10, out=position)
+        digits = _NUMPY_BASE64_MAP[data] << (6 * position).astype(numpy.uint64)
+        values = numpy.add.reduceat(digits, starts).view(numpy.int64)
+        negative = data[starts] == ord("-")
+        values[negative] = -values[negative]
+        # row and column of every field
+        nfields = len(LStat.fields)
+        row = numpy.cumsum(data == ord("\n"))[starts]
+        counts = numpy.bincount(row, minlength=rows)
+        width = counts[0]
+        if (counts == width).all() and width <= nfields:
+            # all rows have the same number of fields
+            matrix = values.reshape(rows, width)
+        else:
+            first = numpy.cumsum(counts) - counts
+            column = numpy.arange(len(starts)) - numpy.repeat(first, counts)
+            matrix = numpy.zeros((rows, nfields), dtype=numpy.int64)
+            valid = column < nfields
+            matrix[row[valid], column[valid]] = values[valid]
+        for field, index in zip(self.fields, self.indexes):
+            if index < matrix.shape[1]:
+                column = numpy.ascontiguousarray(matrix[:, index])
+            else:
+                column = numpy.zeros(rows, dtype=numpy.int64)
+            self.columns[field].frombytes(column.tobytes())
+
+    def to_numpy(self):
+        """Get the columns as NumPy arrays.
+
+        The arrays share the memory with the columns.
+
+        Returns:
+           dict: field name -> numpy.ndarray (int64).
+        """
+        if numpy is None:
+            raise ImportError("NumPy is not available")
+        return dict(
+            (field, numpy.frombuffer(column, dtype=numpy.int64))
+            for field, column in self.columns.items()
+        )
+
+
+def _get_row_translation_tables():
+    # newline terminates a row and is translated to "99"
+    high = bytearray(_OCTAL_HIGH)
+    low = bytearray(_OCTAL_LOW)
+    high[ord("\n")] = ord("9")
+    low[ord("\n")] = ord("9")
+    return (bytes(high), bytes(low))
+
+
+_OCTAL_HIGH_ROWS, _OCTAL_LOW_ROWS = _get_row_translation_tables()
+
+if numpy is not None:
+    _NUMPY_BASE64_MAP = numpy.zeros(256, dtype=numpy.uint64)
+    for _digit, _value in BASE64_MAP.items():
+        _NUMPY_BASE64_MAP[_digit] = _value
@@ -79,7 +79,7 @@ setup(
     long_description_content_type="text/x-rst",
     # RHEL7: python-3.6
     python_requires=">=3.6",
-    extras_require={"configfile": ["configargparse"]},
+    extras_require={"configfile": ["configargparse"], "numpy": ["numpy"]},
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "License :: OSI Approved :: GNU Affero General Public License v3",
@@ -4,7 +4,7 @@
 #
 # BAREOS - Backup Archiving REcovery Open Sourced
 #
-# Copyright (C) 2020-2023 Bareos GmbH & Co. KG
+# Copyright (C) 2020-2024 Bareos GmbH & Co. KG
 #
 # This program is Free Software; you can redistribute it and/or
 # modify it under the terms of version three of the GNU Affero General Public
@@ -24,21 +24,46 @@
 # Author: Maik Aussendorf
 #
 
+import asyncio
+import base64
 import configparser
+import functools
 from datetime import datetime, timedelta
-from fastapi import Depends, FastAPI, HTTPException, status, Response, Path, Body, Query
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    status,
+    Request,
+    Response,
+    Path,
+    Body,
+    Query,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+import json
 import os
+import time
 from packaging import version
-from passlib.context import CryptContext
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import yaml
 
 import bareos.bsock
 import bareos.util
+from bareos_restapi import aggregate
+from bareos_restapi.bvfscache import BvfsCache, normalize_jobids
+from bareos_restapi.capabilities import DirectorCapabilities
+from bareos_restapi.jobfeed import JobFeed
+from bareos_restapi import metrics
 from bareos_restapi.models import *
+from bareos_restapi.responsecache import ResponseCache
+from bareos_restapi import responses
+from bareos_restapi.responses import FastJSONResponse, RawJSONResponse
+from bareos_restapi.sessionmanager import SessionManager
+from bareos_restapi.tokencache import TokenCache
 
 # Read config from api.ini
 config = configparser.ConfigParser()
@@ -47,13 +72,95 @@ config.read("api.ini")
 CONFIG_DIRECTOR_ADDRESS = config.get("Director", "Address")
 CONFIG_DIRECTOR_NAME = config.get("Director", "Name")
 CONFIG_DIRECTOR_PORT = config.getint("Director", "Port")
+# Every user gets a pool of director connections,
+# so that concurrent requests of the same user do not share a connection.
+CONFIG_DIRECTOR_POOL_SIZE = config.getint("Director", "PoolSize", fallback=4)
+CONFIG_DIRECTOR_POOL_TIMEOUT = config.getfloat("Director", "PoolTimeout", fallback=30)
+CONFIG_DIRECTOR_POOL_IDLE_TIMEOUT = config.getfloat(
+    "Director", "PoolIdleTimeout", fallback=300
+)
+
+
+def read_directors_config():
+    """
+    Director of the [Director] section (the default director)
+    and further directors, configured by [Director <name>] sections.
+    Settings missing in a [Director <name>] section are taken from [Director].
+    """
+    directors = {}
+    sections = ["Director"] + [
+        section for section in config.sections() if section.startswith("Director ")
+    ]
+    for section in sections:
+        name = config.get(section, "Name", fallback=section[len("Director ") :])
+        if name in directors:
+            raise configparser.Error("Director %s is configured twice." % name)
+        directors[name] = {
+            "address": config.get(section, "Address"),
+            "port": config.getint(section, "Port", fallback=CONFIG_DIRECTOR_PORT),
+            "poolSize": config.getint(
+                section, "PoolSize", fallback=CONFIG_DIRECTOR_POOL_SIZE
+            ),
+            "poolTimeout": config.getfloat(
+                section, "PoolTimeout", fallback=CONFIG_DIRECTOR_POOL_TIMEOUT
+            ),
+            "poolIdleTimeout": config.getfloat(
+                section, "PoolIdleTimeout", fallback=CONFIG_DIRECTOR_POOL_IDLE_TIMEOUT
+            ),
+        }
+    return directors
+
+
+# director name -> settings
+CONFIG_DIRECTORS = read_directors_config()
 
 SECRET_KEY = config.get("JWT", "secret_key")
 ALGORITHM = config.get("JWT", "algorithm")
 ACCESS_TOKEN_EXPIRE_MINUTES = config.getint("JWT", "access_token_expire_minutes")
+# Number of validated access tokens kept, so that they are not decoded
+# and verified on every request. 0 disables the cache.
+CONFIG_JWT_TOKEN_CACHE_SIZE = config.getint("JWT", "TokenCacheSize", fallback=1024)
+# Seconds after which the director connections of an unused session are closed.
+# Default: lifetime of the access tokens.
+CONFIG_DIRECTOR_SESSION_IDLE_TIMEOUT = config.getfloat(
+    "Director", "SessionIdleTimeout", fallback=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# Seconds results of the configuration endpoints are cached. 0 disables the cache.
+CONFIG_CACHE_CONFIGURATION_TTL = config.getfloat(
+    "Cache", "ConfigurationTTL", fallback=60
+)
+# Seconds the total number of catalog items (count commands) is cached.
+# 0 disables the cache.
+CONFIG_CACHE_COUNT_TTL = config.getfloat("Cache", "CountTTL", fallback=10)
+# Number of results of the configuration and count commands cached (per director).
+CONFIG_CACHE_SIZE = config.getint("Cache", "Size", fallback=1000)
+# Seconds and number of pages of BVFS directory listings are cached.
+# 0 disables the cache.
+CONFIG_CACHE_BVFS_TTL = config.getfloat("Cache", "BvfsTTL", fallback=300)
+CONFIG_CACHE_BVFS_SIZE = config.getint("Cache", "BvfsSize", fallback=1000)
+# Seconds the aggregate endpoints wait for the result of each director.
+CONFIG_AGGREGATE_TIMEOUT = config.getfloat("Aggregate", "Timeout", fallback=10)
+# Expose metrics in the Prometheus format on /metrics.
+CONFIG_METRICS_ENABLED = config.getboolean("Metrics", "Enabled", fallback=True)
+# Seconds between two queries of the running jobs for /control/jobs/running/events.
+CONFIG_JOBFEED_POLL_INTERVAL = config.getfloat("JobFeed", "PollInterval", fallback=2)
+# Seconds after which an event stream without changes gets a keepalive comment.
+CONFIG_JOBFEED_KEEPALIVE = config.getfloat("JobFeed", "Keepalive", fallback=15)
 
 userDirectors = {}
-users_db = {}
+# validated access tokens
+tokenCache = TokenCache(CONFIG_JWT_TOKEN_CACHE_SIZE)
+# director name -> ResponseCache of configuration (show) results
+configurationCaches = {}
+# director name -> ResponseCache of count results
+countCaches = {}
+# (director name, username) -> JobFeed
+jobFeeds = {}
+# director name -> BvfsCache
+bvfsCaches = {}
+# director name -> DirectorCapabilities
+directorCapabilities = {}
 
 # Load metatags.yaml from the same directory.
 with open(
@@ -61,8 +168,6 @@ with open(
 ) as stream:
     tags_metadata = yaml.safe_load(stream)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 app = FastAPI(
@@ -70,18 +175,81 @@ app = FastAPI(
     description="Bareos REST API built on python-bareos. Experimental and subject to enhancements and changes. **Note** swagger does not support GET methods with bodies, however, the CURL statements displayed by swagger do work.",
     version="0.0.1",
     openapi_tags=tags_metadata,
+    default_response_class=FastJSONResponse,
 )
 
 
+@app.middleware("http")
+async def check_etag(request: Request, call_next):
+    """
+    Answer conditional GET requests with 304 Not Modified,
+    if the ETag of the response matches the If-None-Match header.
+    """
+    response = await call_next(request)
+    etag = response.headers.get("etag")
+    if (
+        etag
+        and request.method == "GET"
+        and response.status_code == 200
+        and etag in request.headers.get("if-none-match", "")
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+    return response
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """
+    Record the duration of requests by endpoint
+    and return the timings of the request parts (authentication,
+    director commands, parsing, serialization) in the Server-Timing header.
+    """
+    timings = {}
+    timingsToken = metrics.requestTimings.set(timings)
+    metrics.requestsInFlight.inc()
+    start = time.perf_counter()
+    statusCode = 500
+    try:
+        response = await call_next(request)
+        statusCode = response.status_code
+    finally:
+        duration = time.perf_counter() - start
+        metrics.requestsInFlight.dec()
+        metrics.requestTimings.reset(timingsToken)
+        # use the path of the route (e.g. /control/jobs/{job_id}) to limit the number of endpoints
+        route = request.scope.get("route")
+        metrics.requestDuration.observe(
+            duration,
+            (
+                request.method,
+                route.path if route is not None else "unmatched",
+                str(statusCode),
+            ),
+        )
+    timings["total"] = duration
+    response.headers["Server-Timing"] = metrics.server_timing(timings)
+    return response
+
+
+responses.encodingObserver = metrics.observe_serialization
+
+
 class UserObject(object):
-    def __init__(self, username, password):
+    def __init__(self, username, password, directorName=CONFIG_DIRECTOR_NAME):
         # self.id = id
         self.username = username
         self.password = password
-        self.directorName = CONFIG_DIRECTOR_NAME
+        self.directorName = directorName
         self.director = bareos.bsock.BSock
-        self.jsonDirector = bareos.bsock.DirectorConsoleJson
-        self.directorVersion = ""  # Format: xx.yy.zz, example: 19.02.06
+        self.directorPool = bareos.bsock.AsyncDirectorConsolePool
+
+    @property
+    def directorVersion(self):
+        # Format: xx.yy.zz, example: 19.02.06. Empty, if not read yet.
+        capabilities = directorCapabilities.get(self.directorName)
+        if capabilities is None:
+            return ""
+        return capabilities.version
 
     def __str__(self):
         return "User(username='%s')" % (self.username)
@@ -95,42 +263,194 @@ class UserObject(object):
         return self.directorVersion
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_director_capabilities(directorName: str, directorPool):
+    """
+    Returns the DirectorCapabilities of a director.
+    Only the first call per director (or after invalidate_director_capabilities)
+    queries the director.
+    """
+    capabilities = directorCapabilities.get(directorName)
+    if capabilities is None:
+        result = await directorPool.call("version")
+        capabilities = DirectorCapabilities(result["version"])
+        directorCapabilities[directorName] = capabilities
+    return capabilities
+
+
+def invalidate_director_capabilities(directorName: str):
+    directorCapabilities.pop(directorName, None)
+
+
+def get_configuration_cache(directorName: str):
+    if directorName not in configurationCaches:
+        configurationCaches[directorName] = ResponseCache(
+            ttl=CONFIG_CACHE_CONFIGURATION_TTL, max_size=CONFIG_CACHE_SIZE
+        )
+    return configurationCaches[directorName]
+
+
+def invalidate_configuration_cache(directorName: str):
+    get_configuration_cache(directorName).invalidate()
+
+
+def get_count_cache(directorName: str):
+    if directorName not in countCaches:
+        countCaches[directorName] = ResponseCache(
+            ttl=CONFIG_CACHE_COUNT_TTL, max_size=CONFIG_CACHE_SIZE
+        )
+    return countCaches[directorName]
+
+
+def get_bvfs_cache(directorName: str):
+    if directorName not in bvfsCaches:
+        bvfsCaches[directorName] = BvfsCache(
+            ttl=CONFIG_CACHE_BVFS_TTL, max_size=CONFIG_CACHE_BVFS_SIZE
+        )
+    return bvfsCaches[directorName]
+
+
+def invalidate_bvfs_cache(directorName: str):
+    get_bvfs_cache(directorName).invalidate()
+
+
+async def call_count_command(current_user, countCommand: str):
+    """
+    Execute a count command. The result is cached per user for CountTTL seconds,
+    so paging through a large catalog does not count all items for every page.
+    """
+    cache = get_count_cache(current_user.directorName)
+    cacheKey = (current_user.username, countCommand)
+    entry = cache.get(cacheKey)
+    if entry is None:
+        entry = cache.put(cacheKey, await current_user.directorPool.call(countCommand))
+    return entry.value
+
+
+def get_keyset_start(
+    itemType: str, offset: Optional[int], afterId: Optional[int], cursor: Optional[str]
+):
+    """
+    Returns the id to start keyset pagination after,
+    or None if keyset pagination is not requested.
+    """
+    if offset is not None and (afterId is not None or cursor is not None):
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "offset can not be combined with keyset pagination."},
+        )
+    if cursor is not None:
+        return decode_cursor(itemType, cursor)
+    return afterId
+
+
+def encode_cursor(itemType: str, lastId: int):
+    """
+    Opaque continuation token, pointing behind the item with lastId.
+    """
+    data = json.dumps({"type": itemType, "after": lastId}, separators=(",", ":"))
+    data = data.encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(itemType: str, cursor: str):
+    """
+    Returns the id encoded by encode_cursor.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        token = json.loads(data)
+        if token["type"] == itemType and isinstance(token["after"], int):
+            return token["after"]
+    except (ValueError, TypeError, KeyError):
+        pass
+    raise HTTPException(
+        status_code=400, detail={"message": "Invalid cursor for %s." % itemType}
+    )
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def get_user(username: str, directorName: str = CONFIG_DIRECTOR_NAME):
+    return sessionManagers[directorName].get(username)
+
+
+async def connect_user(directorName: str, username: str, password: str):
+    directorConfig = CONFIG_DIRECTORS[directorName]
+    # min_size=1: the first connection is established immediately,
+    # which verifies the credentials.
+    directorPool = metrics.InstrumentedDirectorConsolePool(
+        console_class=metrics.InstrumentedDirectorConsole,
+        min_size=1,
+        max_size=directorConfig["poolSize"],
+        idle_timeout=directorConfig["poolIdleTimeout"],
+        checkout_timeout=directorConfig["poolTimeout"],
+        address=directorConfig["address"],
+        port=directorConfig["port"],
+        dirname=directorName,
+        name=username,
+        password=bareos.bsock.Password(password),
+    )
+    await directorPool.open()
+    user = UserObject(username, password, directorName)
+    user.directorPool = directorPool
+    # A new connection without other open sessions might be to an updated director.
+    if not sessionManagers[directorName].sessions:
+        invalidate_director_capabilities(user.directorName)
+    try:
+        await get_director_capabilities(user.directorName, directorPool)
+    except Exception as e:
+        # read again, when required
+        print("Could not read version of director %s. %s" % (user.directorName, e))
+    return user
 
 
-def get_user(username: str):
-    if username in users_db:
-        # print(users_db[username])
-        # return {'username':username, 'directorName': users_db[username].directorName}
-        return users_db[username]
+# director name -> SessionManager
+sessionManagers = {
+    directorName: SessionManager(
+        functools.partial(connect_user, directorName),
+        idle_timeout=CONFIG_DIRECTOR_SESSION_IDLE_TIMEOUT,
+    )
+    for directorName in CONFIG_DIRECTORS
+}
 
 
-def authenticate_user(username: str, password: str):
-    jsonDirector = None
+async def authenticate_user(
+    username: str, password: str, expires: float, directorName: str
+):
     try:
-        jsonDirector = bareos.bsock.DirectorConsoleJson(
-            address=CONFIG_DIRECTOR_ADDRESS,
-            port=CONFIG_DIRECTOR_PORT,
-            dirname=CONFIG_DIRECTOR_NAME,
-            name=username,
-            password=bareos.bsock.Password(password),
+        return await sessionManagers[directorName].login(username, password, expires)
+    except Exception as e:
+        print("Could not authorize %s at director %s. %s" % (username, directorName, e))
+        return False
+
+
+async def get_director_user(user: UserObject, directorName: str):
+    """
+    Returns the user object (session) of user for another director.
+    The director is logged in with the credentials of user,
+    the session lasts as long as the session of user.
+    """
+    if directorName not in sessionManagers:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Director %s is not configured." % directorName},
         )
+    if directorName == user.directorName:
+        return user
+    sessionManager = sessionManagers[directorName]
+    directorUser = sessionManager.get(user.username)
+    if directorUser is not None and directorUser.password == user.password:
+        return directorUser
+    session = sessionManagers[user.directorName].sessions.get(user.username)
+    expires = session.expires if session is not None else time.time()
+    try:
+        return await sessionManager.login(user.username, user.password, expires)
     except Exception as e:
-        print(
-            "Could not authorize %s at director %s. %s"
-            % (username, CONFIG_DIRECTOR_NAME, e)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Could not connect to director %s. Message: '%s'"
+                % (directorName, e)
+            },
         )
-        return False
-    user = UserObject(username, password)
-    user.jsonDirector = jsonDirector
-    user.username = username
-    users_db[username] = user
-    return user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -144,38 +464,102 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    director: Optional[str] = Query(
+        None,
+        title="Name of the director to send the request to. Default: the director of the login",
+    ),
+):
+    start = time.perf_counter()
+    try:
+        user = validate_access_token(token)
+    finally:
+        metrics.observe_auth(time.perf_counter() - start)
+    if director is None:
+        return user
+    return await get_director_user(user, director)
+
+
+def validate_access_token(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    claims = tokenCache.get(token)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(
+                username=username,
+                director=payload.get("director", CONFIG_DIRECTOR_NAME),
+            )
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = get_user(username=token_data.username)
+        if token_data.director not in sessionManagers:
+            raise credentials_exception
+        claims = (token_data.username, token_data.director)
+        # tokens without expiration time are not cached
+        if isinstance(payload.get("exp"), (int, float)):
+            tokenCache.put(token, claims, payload["exp"])
+    user = get_user(username=claims[0], directorName=claims[1])
     if user is None:
         raise credentials_exception
     return user
 
 
+@app.on_event("startup")
+async def start_session_manager():
+    app.state.sessionTasks = [
+        asyncio.create_task(
+            sessionManager.run(min(60, CONFIG_DIRECTOR_SESSION_IDLE_TIMEOUT / 2))
+        )
+        for sessionManager in sessionManagers.values()
+    ]
+
+
+@app.on_event("shutdown")
+async def close_director_connections():
+    for task in app.state.sessionTasks:
+        task.cancel()
+    for feed in jobFeeds.values():
+        feed.close()
+    for sessionManager in sessionManagers.values():
+        await sessionManager.close()
+
+
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    director: Optional[str] = Query(
+        CONFIG_DIRECTOR_NAME, title="Name of the director to log in"
+    ),
+):
+    if director not in sessionManagers:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Director %s is not configured." % director},
+        )
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    user = await authenticate_user(
+        form_data.username,
+        form_data.password,
+        time.time() + access_token_expires.total_seconds(),
+        director,
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "director": user.directorName},
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -185,35 +569,103 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+def read_session_metrics_by_director(key: str):
+    return {
+        (directorName,): sessionManager.metrics()[key]
+        for directorName, sessionManager in sessionManagers.items()
+    }
+
+
+for name, key, documentation in [
+    ("bareos_restapi_sessions", "sessions", "Open director sessions."),
+    ("bareos_restapi_director_connections", "connections", "Director connections."),
+    (
+        "bareos_restapi_director_idle_connections",
+        "idleConnections",
+        "Idle director connections.",
+    ),
+]:
+    metrics.registry.register(
+        metrics.Gauge(
+            name,
+            documentation,
+            ("director",),
+            function=functools.partial(read_session_metrics_by_director, key),
+        )
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["directors"])
+async def read_metrics():
+    """
+    Metrics of the REST API in the Prometheus text format:
+    request durations by endpoint, requests in flight,
+    duration of authentication, director commands (by command verb),
+    parsing, serialization and of waiting for a director connection.
+
+    The timings of each request are also returned in its _Server-Timing_ header.
+    """
+    if not CONFIG_METRICS_ENABLED:
+        raise HTTPException(
+            status_code=404, detail={"message": "Metrics are disabled."}
+        )
+    return PlainTextResponse(
+        metrics.registry.expose(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/sessions/metrics", tags=["directors"])
+async def read_session_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Number of open director sessions and connections of the REST API
+    and login statistics, in total and by director.
+    """
+    directors = {
+        directorName: sessionManager.metrics()
+        for directorName, sessionManager in sessionManagers.items()
+    }
+    totals = {}
+    for directorMetrics in directors.values():
+        for key, value in directorMetrics.items():
+            totals[key] = totals.get(key, 0) + value
+    return {
+        **totals,
+        "directors": directors,
+        "tokenCache": tokenCache.metrics(),
+        "bvfsCaches": {
+            directorName: cache.metrics() for directorName, cache in bvfsCaches.items()
+        },
+        "jobFeeds": [feed.metrics() for feed in jobFeeds.values()],
+    }
+
+
 ## Generic Methods
 
 
-def versionCheck(
+async def versionCheck(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
     minVersion: Optional[str] = "16.1.1",
 ):
-    myVersion = ""
-    if current_user.directorVersion > "":
-        myVersion = current_user.directorVersion
-    else:
-        result = read_director_version(response=response, current_user=current_user)
-        if "version" in result:
-            myVersion = bareos.util.Version(result["version"]).as_python_version()
-            current_user.directorVersion = myVersion
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail="Could not read version from director. Need at least version %s"
-                % (minVersion),
-            )
     try:
-        if not (version.parse(myVersion) >= version.parse(minVersion)):
+        capabilities = await get_director_capabilities(
+            current_user.directorName, current_user.directorPool
+        )
+    except version.InvalidVersion as exception:
+        raise HTTPException(status_code=500, detail=str(exception))
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Could not read version from director. Need at least version %s"
+            % (minVersion),
+        )
+    try:
+        if not capabilities.supports(minVersion):
             raise HTTPException(
                 status_code=501,
                 detail="Not implemented in Bareos %s. Need at least version %s"
-                % (myVersion, minVersion),
+                % (capabilities.version, minVersion),
             )
         else:
             return True
@@ -221,7 +673,7 @@ def versionCheck(
         raise HTTPException(status_code=500, detail=str(exception))
 
 
-def configure_add_standard_component(
+async def configure_add_standard_component(
     *,
     componentDef: BaseModel,
     response: Response,
@@ -246,13 +698,15 @@ def configure_add_standard_component(
     # print(addCommand)
     # print(current_user)
     try:
-        result = current_user.jsonDirector.call(addCommand)
+        result = await current_user.directorPool.call(addCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not add %s with command '%s'. Message: '%s'"
             % (componentType, addCommand, e)
         }
+    finally:
+        invalidate_configuration_cache(current_user.directorName)
 
     if "configure" in result and "add" in result["configure"]:
         return result
@@ -264,7 +718,7 @@ def configure_add_standard_component(
         }
 
 
-def switch_resource(
+async def switch_resource(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -284,16 +738,19 @@ def switch_resource(
     command += "%s=%s" % (componentType, resourceName)
     # print(command)
     try:
-        responseDict = current_user.jsonDirector.call(command)
+        responseDict = await current_user.directorPool.call(command)
     except Exception as e:
         response.status_code = 500
         return (
             False,
             {
                 "message": "Could not en/disable %s %s on director %s. Message: '%s'"
-                % (componentType, resourceName, CONFIG_DIRECTOR_NAME, e)
+                % (componentType, resourceName, current_user.directorName, e)
             },
         )
+    finally:
+        # enabled state is part of the configuration
+        invalidate_configuration_cache(current_user.directorName)
     response.status_code = 200
     return (True, responseDict)
 
@@ -310,7 +767,166 @@ def parseCommandOptions(queryDict):
     return optionString
 
 
-def show_configuration_items(
+async def select_bulk_jobs(
+    *,
+    current_user: User,
+    selection: bulkJobSelection,
+):
+    """
+    Returns the job ids given in selection,
+    followed by the ids of the jobs matching its query (without duplicates).
+    """
+    jobIds = list(selection.jobids or [])
+    if selection.query is not None:
+        queryOptions = parseCommandOptions(selection.query.dict())
+        if not queryOptions:
+            # an empty query would select all jobs
+            raise HTTPException(
+                status_code=400,
+                detail={"message": "query requires at least one field."},
+            )
+        listCommand = "list jobs" + queryOptions
+        try:
+            responseDict = await current_user.directorPool.call(listCommand)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Could not read jobs list from director %s. Message: '%s'"
+                    % (current_user.directorName, e)
+                },
+            )
+        jobIds += [int(job["jobid"]) for job in responseDict.get("jobs", [])]
+    if selection.jobids is None and selection.query is None:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Either jobids or query is required."},
+        )
+    return list(dict.fromkeys(jobIds))
+
+
+async def select_bulk_volumes(
+    *,
+    current_user: User,
+    selection: bulkVolumeSelection,
+):
+    """
+    Returns the volume names given in selection,
+    followed by the names of the volumes of pool matching filter (without duplicates).
+    """
+    volumeNames = list(selection.volumes or [])
+    if selection.filter is not None and not selection.filter:
+        # an empty filter would select all volumes
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "filter requires at least one property."},
+        )
+    if selection.pool is not None or selection.filter is not None:
+        if selection.pool is not None:
+            listCommand = "llist volumes pool=%s" % selection.pool
+        else:
+            listCommand = "llist volumes all"
+        try:
+            responseDict = await current_user.directorPool.call(listCommand)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Could not read volume list from director %s. Message: '%s'"
+                    % (current_user.directorName, e)
+                },
+            )
+        volumes = responseDict.get("volumes", [])
+        if isinstance(volumes, dict):
+            volumes = [volume for pool in volumes.values() for volume in pool]
+        volumeFilter = {
+            key.lower(): value.lower()
+            for key, value in (selection.filter or {}).items()
+        }
+        volumeNames += [
+            volume["volumename"]
+            for volume in volumes
+            if all(
+                str(volume.get(key, "")).lower() == value
+                for key, value in volumeFilter.items()
+            )
+        ]
+    if (
+        selection.volumes is None
+        and selection.pool is None
+        and selection.filter is None
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Either volumes, pool or filter is required."},
+        )
+    return list(dict.fromkeys(volumeNames))
+
+
+def bulk_results(items, results):
+    """
+    Combines the items of a bulk operation with the results of their commands
+    (from call_many with return_exceptions=True).
+    """
+    itemResults = []
+    for item, result in zip(items, results):
+        if isinstance(result, Exception):
+            itemResults.append({"item": item, "success": False, "message": str(result)})
+        else:
+            itemResults.append({"item": item, "success": True, "result": result})
+    failed = len([r for r in itemResults if not r["success"]])
+    return {
+        "totalItems": len(itemResults),
+        "succeeded": len(itemResults) - failed,
+        "failed": failed,
+        "results": itemResults,
+    }
+
+
+async def call_bulk_commands(
+    *,
+    current_user: User,
+    items: list,
+    commands: list,
+    checkCommands: Optional[list] = None,
+):
+    """
+    Executes one command per item and returns the result of every item.
+
+    All commands are sent over a single director connection without waiting
+    for the individual results (see call_many of python-bareos).
+    If checkCommands are given, they are executed first (one per item)
+    and only items with a non-empty check result are processed,
+    as some commands (e.g. delete) do not report missing items.
+    """
+    try:
+        async with current_user.directorPool.connection() as director:
+            if checkCommands is not None:
+                checks = await director.call_many(checkCommands, return_exceptions=True)
+                missing = {}
+                for item, check in zip(items, checks):
+                    if isinstance(check, Exception):
+                        missing[item] = check
+                    elif not any(check.values()):
+                        missing[item] = Exception("%s not found in the catalog." % item)
+                commands = [c for i, c in zip(items, commands) if i not in missing]
+            results = iter(await director.call_many(commands, return_exceptions=True))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Bulk operation failed on director %s. Message: '%s'"
+                % (current_user.directorName, e)
+            },
+        )
+    if checkCommands is not None:
+        results = [
+            missing[item] if item in missing else next(results) for item in items
+        ]
+    return bulk_results(items, list(results))
+
+
+async def show_configuration_items(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -321,7 +937,7 @@ def show_configuration_items(
     """
     Uses _show_ command to provide configuration setting
     """
-    versionCheck(
+    await versionCheck(
         response=response,
         current_user=current_user,
         minVersion="20.0.1",
@@ -339,14 +955,23 @@ def show_configuration_items(
     if verbose:
         # print ("verbose on")
         showCommand += " verbose"
-    try:
-        responseDict = current_user.jsonDirector.call(showCommand)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail="Could not read %s from director %s. Message: '%s'"
-            % (itemType, CONFIG_DIRECTOR_NAME, e),
-        )
+    # The result depends on the ACLs of the user.
+    cache = get_configuration_cache(current_user.directorName)
+    cacheKey = (current_user.username, showCommand)
+    cacheEntry = cache.get(cacheKey)
+    if cacheEntry is None:
+        generation = cache.generation
+        try:
+            responseDict = await current_user.directorPool.call(showCommand)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail="Could not read %s from director %s. Message: '%s'"
+                % (itemType, current_user.directorName, e),
+            )
+        cacheEntry = cache.put(cacheKey, responseDict, generation)
+    responseDict = cacheEntry.value
+    response.headers["ETag"] = cacheEntry.etag
     # print(responseDict)
     if itemKey in responseDict:
         foundItems = len(responseDict[itemKey])
@@ -358,17 +983,51 @@ def show_configuration_items(
         raise HTTPException(status_code=404, detail="No %s found." % itemKey)
 
 
-def list_catalog_items(
+# catalog item type -> (argument of the list command, id field,
+# id of the last row read by the director) for keyset pagination
+keysetColumns = {
+    "jobs": ("after_jobid", "jobid", "lastjobid"),
+    "volumes": ("after_mediaid", "mediaid", "lastmediaid"),
+}
+
+
+def get_keyset_next_cursor(itemType: str, responseDict: dict, items: list, limit: int):
+    """
+    Returns the cursor of the page following items or None, if there is none.
+
+    The director reads limit rows from the catalog,
+    but does not return the rows denied by the ACLs of the user
+    (counted in meta.range.filtered).
+    So the cursor points behind the last row read by the director.
+    """
+    filtered = responseDict.get("meta", {}).get("range", {}).get("filtered", 0)
+    lastId = responseDict.get(keysetColumns[itemType][2])
+    if lastId is None or len(items) + int(filtered) < limit:
+        return None
+    return encode_cursor(itemType, int(lastId))
+
+
+async def list_catalog_items(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
     itemType: str,
     limit: Optional[int] = None,
     offset: Optional[int] = None,
+    afterId: Optional[int] = None,
     jobQuery: Optional[jobQuery] = None,
     verbose: Optional[bareosBool] = "yes",
     hasCountOption: Optional[bareosBool] = "no",
 ):
+    """
+    List catalog items.
+
+    If afterId is given (keyset pagination), only items with a higher id are listed,
+    ordered by id. If the page is full, nextCursor points to the next page.
+
+    Otherwise, if the number of items is known from the count command,
+    the result of the director is passed on without decoding it.
+    """
     itemKey = itemType
     itemTypeKeyMap = {"files": "filenames"}
     if itemType in itemTypeKeyMap:
@@ -392,25 +1051,44 @@ def list_catalog_items(
         listCommand += " limit=%d" % limit
     if offset is not None:
         listCommand += " offset=%d" % offset
+    if afterId is not None:
+        listCommand += " %s=%d" % (keysetColumns[itemType][0], afterId)
     countCommand += " count"
+    rawResult = None
     try:
-        responseDict = current_user.jsonDirector.call(listCommand)
+        if afterId is None:
+            async with current_user.directorPool.connection() as director:
+                rawResult = await director.call_raw(listCommand)
+        else:
+            responseDict = await current_user.directorPool.call(listCommand)
         if hasCountOption:
-            countDict = current_user.jsonDirector.call(countCommand)
+            countDict = await call_count_command(current_user, countCommand)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail={
                 "message": "Could not read %s list from director %s. Message: '%s'"
-                % (itemType, CONFIG_DIRECTOR_NAME, e)
+                % (itemType, current_user.directorName, e)
             },
         )
-    foundItems = len(responseDict)
-    if (
+    hasCount = (
         hasCountOption == "yes"
         and itemKey in countDict
         and "count" in countDict[itemKey][0]
-    ):
+    )
+    if rawResult is not None:
+        if hasCount:
+            results["totalItems"] = countDict[itemKey][0]["count"]
+            if limit is not None:
+                results["limit"] = limit
+            if offset is not None:
+                results["offset"] = offset
+            rawResponse = RawJSONResponse.from_director_result(rawResult, results)
+            if rawResponse is not None:
+                return rawResponse
+        responseDict = json.loads(rawResult)
+    foundItems = len(responseDict)
+    if hasCount:
         results["totalItems"] = countDict[itemKey][0]["count"]
     else:
         results["totalItems"] = foundItems
@@ -420,7 +1098,12 @@ def list_catalog_items(
             results["limit"] = limit
         if offset is not None:
             results["offset"] = offset
-        return {**results, itemKey: responseDict[itemKey]}
+        items = responseDict[itemKey]
+        if afterId is not None and limit is not None:
+            nextCursor = get_keyset_next_cursor(itemType, responseDict, items, limit)
+            if nextCursor is not None:
+                results["nextCursor"] = nextCursor
+        return FastJSONResponse({**results, itemKey: items})
     else:
         raise HTTPException(
             status_code=404, detail={"message": "No %s found." % itemType}
@@ -429,7 +1112,7 @@ def list_catalog_items(
 
 ### Clients ###
 @app.get("/control/clients", status_code=200, tags=["clients", "control"])
-def read_catalog_info_for_all_clients(
+async def read_catalog_info_for_all_clients(
     response: Response,
     current_user: User = Depends(get_current_user),
     name: Optional[str] = None,
@@ -443,12 +1126,12 @@ def read_catalog_info_for_all_clients(
     else:
         listCommand = "llist clients"
     try:
-        responseDict = current_user.jsonDirector.call(listCommand)
+        responseDict = await current_user.directorPool.call(listCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not read client list from director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     if "clients" in responseDict:
         totalItems = len(responseDict["clients"])
@@ -459,7 +1142,7 @@ def read_catalog_info_for_all_clients(
 
 
 @app.get("/control/clients/{client_id}", tags=["clients", "control"])
-def read_catalog_info_for_particular_client(
+async def read_catalog_info_for_particular_client(
     *,
     client_id: int = Path(..., title="The ID of client to get", ge=1),
     response: Response,
@@ -472,7 +1155,7 @@ def read_catalog_info_for_particular_client(
     **Warning** Director does not support direct query by _id_ we query all clients and filter the result.
     Maybe more time consuming than expected in large settings.
     """
-    allClients = read_catalog_info_for_all_clients(response, current_user)
+    allClients = await read_catalog_info_for_all_clients(response, current_user)
     result = None
     for c in allClients["clients"]:
         if c["clientid"] == str(client_id):
@@ -495,13 +1178,13 @@ def read_catalog_info_for_particular_client(
     status_code=204,
     tags=["clients", "control"],
 )
-def enable_client(
+async def enable_client(
     *,
     client_name: str = Path(..., title="The client (name) to enable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=client_name,
@@ -516,13 +1199,13 @@ def enable_client(
     status_code=204,
     tags=["clients", "control"],
 )
-def disable_client(
+async def disable_client(
     *,
     client_name: str = Path(..., title="The client (name) to disable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=client_name,
@@ -533,7 +1216,7 @@ def disable_client(
 
 
 @app.get("/configuration/clients", tags=["clients", "configuration"])
-def read_all_clients(
+async def read_all_clients(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -544,7 +1227,7 @@ def read_all_clients(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="clients",
@@ -553,7 +1236,7 @@ def read_all_clients(
 
 
 @app.get("/configuration/clients/{clients_name}", tags=["clients", "configuration"])
-def read_client_by_name(
+async def read_client_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -565,7 +1248,7 @@ def read_client_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="clients",
@@ -575,13 +1258,13 @@ def read_client_by_name(
 
 
 @app.post("/configuration/clients", tags=["clients", "configuration"])
-def post_client(
+async def post_client(
     *,
     clientDef: clientResource = Body(..., title="The client to create"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         componentDef=clientDef,
         response=response,
         current_user=current_user,
@@ -593,7 +1276,7 @@ def post_client(
 
 
 @app.get("/configuration/filesets", tags=["filesets", "configuration"])
-def read_all_filesets(
+async def read_all_filesets(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -604,7 +1287,7 @@ def read_all_filesets(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="filesets",
@@ -613,7 +1296,7 @@ def read_all_filesets(
 
 
 @app.get("/configuration/filesets/{filesets_name}", tags=["filesets", "configuration"])
-def read_fileset_by_name(
+async def read_fileset_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -625,7 +1308,7 @@ def read_fileset_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="filesets",
@@ -638,7 +1321,7 @@ def read_fileset_by_name(
 
 
 @app.post("/control/jobs/run", tags=["jobcontrol", "control", "jobs"])
-def runJob(
+async def runJob(
     *,
     jobControl: jobControl = Body(..., title="Job control information", embed=True),
     response: Response,
@@ -658,7 +1341,7 @@ def runJob(
             jobCommand += " %s=%s" % (a, str(args[a]))
     # print(jobCommand)
     try:
-        result = current_user.jsonDirector.call(jobCommand)
+        result = await current_user.directorPool.call(jobCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -673,7 +1356,7 @@ def runJob(
 
 
 @app.post("/control/jobs/rerun/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def rerun_Job_by_jobid(
+async def rerun_Job_by_jobid(
     *,
     job_id: int = Path(..., title="The ID of job to rerun", ge=1),
     response: Response,
@@ -685,7 +1368,7 @@ def rerun_Job_by_jobid(
     result = None
     rerunCommand = "rerun jobid=%d" % job_id
     try:
-        result = current_user.jsonDirector.call(rerunCommand)
+        result = await current_user.directorPool.call(rerunCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -700,7 +1383,7 @@ def rerun_Job_by_jobid(
 
 
 @app.post("/control/jobs/rerun", tags=["jobcontrol", "control", "jobs"])
-def rerun_Job(
+async def rerun_Job(
     *,
     job_range: jobRange = Body(..., title="Job range to rerun"),
     response: Response,
@@ -724,7 +1407,7 @@ def rerun_Job(
             rerunCommand += " %s=%s" % (a, args[a])
     rerunCommand += " yes"
     try:
-        result = current_user.jsonDirector.call(rerunCommand)
+        result = await current_user.directorPool.call(rerunCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -740,7 +1423,7 @@ def rerun_Job(
 
 
 @app.post("/control/jobs/restore", tags=["jobcontrol", "control", "jobs"])
-def runRestoreJob(
+async def runRestoreJob(
     *,
     jobControl: restoreJobControl = Body(
         ..., title="Restore Job control information", embed=True
@@ -764,7 +1447,7 @@ def runRestoreJob(
                 jobCommand += " select all done"
     # print(jobCommand)
     try:
-        result = current_user.jsonDirector.call(jobCommand)
+        result = await current_user.directorPool.call(jobCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -779,7 +1462,7 @@ def runRestoreJob(
 
 
 @app.put("/control/jobs/cancel/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def cancelJob(
+async def cancelJob(
     *,
     job_id: int = Path(..., title="The ID of job to cancel", ge=1),
     response: Response,
@@ -792,7 +1475,7 @@ def cancelJob(
     cancelCommand = "cancel jobid=%d" % job_id
     result = None
     try:
-        result = current_user.jsonDirector.call(cancelCommand)
+        result = await current_user.directorPool.call(cancelCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -807,13 +1490,13 @@ def cancelJob(
     status_code=204,
     tags=["jobcontrol", "jobs", "control"],
 )
-def enable_job(
+async def enable_job(
     *,
     job_name: str = Path(..., title="The job (name) to enable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=job_name,
@@ -828,13 +1511,13 @@ def enable_job(
     status_code=204,
     tags=["jobcontrol", "jobs", "control"],
 )
-def disable_job(
+async def disable_job(
     *,
     job_name: str = Path(..., title="The job (name) to disable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=job_name,
@@ -848,18 +1531,18 @@ def disable_job(
 
 
 @app.get("/control/jobs/totals", tags=["jobcontrol", "control", "jobs"])
-def read_all_jobs_totals(
+async def read_all_jobs_totals(
     *, response: Response, current_user: User = Depends(get_current_user)
 ):
     listCommand = "llist jobtotals"
     results = {}
     try:
-        responseDict = current_user.jsonDirector.call(listCommand)
+        responseDict = await current_user.directorPool.call(listCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not read job totals from director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     if "jobtotals" in responseDict:
         return responseDict
@@ -869,162 +1552,780 @@ def read_all_jobs_totals(
 
 
 @app.get("/control/jobs/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def read_job_status(
+async def read_job_status(
     *,
     job_id: int = Path(..., title="The ID of job to get", ge=1),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
     """
-    Read information about a specific job defined by jobid
-    Returns output of command _llist jobid=id_
+    Read information about a specific job defined by jobid
+    Returns output of command _llist jobid=id_
+    """
+    result = None
+    listCommand = "llist jobid=%d" % job_id
+    try:
+        result = await current_user.directorPool.call(listCommand)
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not query jobs on director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    if result and "jobs" in result:
+        return result["jobs"][0]
+    else:
+        response.status_code = 404
+        return {"message": "Job with Job ID {jobid} not found".format(jobid=job_id)}
+
+
+@app.get("/control/jobs", tags=["jobcontrol", "control", "jobs"])
+async def read_all_jobs_status(
+    *,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    limit: Optional[int] = Query(None, title="Result items limit", gt=1),
+    offset: Optional[int] = Query(None, title="Result items offset", gt=0),
+    after_jobid: Optional[int] = Query(
+        None, title="List jobs with a higher Job ID, ordered by Job ID", ge=0
+    ),
+    cursor: Optional[str] = Query(
+        None, title="Continuation token (nextCursor of the previous page)"
+    ),
+    jobQuery: Optional[jobQuery] = Body(None, title="Query parameter"),
+):
+    """
+    List jobs from the catalog. Built on console command _llist jobs_.
+
+    Paging with _offset_ gets slower the deeper the page.
+    For large catalogs use keyset pagination instead:
+    start with _after_jobid=0_ and a _limit_,
+    then pass _nextCursor_ of the result as _cursor_ to get the next page.
+    _nextCursor_ is missing on the last page.
+    """
+    afterId = get_keyset_start("jobs", offset, after_jobid, cursor)
+    return await list_catalog_items(
+        itemType="jobs",
+        current_user=current_user,
+        response=response,
+        limit=limit,
+        offset=offset,
+        afterId=afterId,
+        jobQuery=jobQuery,
+        hasCountOption="yes",
+    )
+
+
+async def list_running_jobs(directorName: str, username: str):
+    """
+    Running jobs, as seen by the director session of username
+    """
+    user = get_user(username, directorName)
+    if user is None:
+        raise bareos.exceptions.Error("Session of user %s is closed." % username)
+    result = await user.directorPool.call("list jobs jobstatus=R")
+    return result.get("jobs", [])
+
+
+async def list_job_records(directorName: str, username: str, jobIds: list):
+    user = get_user(username, directorName)
+    if user is None:
+        raise bareos.exceptions.Error("Session of user %s is closed." % username)
+    async with user.directorPool.connection() as director:
+        results = await director.call_many(["list jobid=%d" % j for j in jobIds])
+    return [job for result in results for job in result.get("jobs", [])]
+
+
+def get_job_feed(current_user):
+    """
+    The feed of running jobs is shared by all requests of the same user,
+    as the visible jobs depend on the ACLs of the console.
+    """
+    key = (current_user.directorName, current_user.username)
+    if key not in jobFeeds:
+        jobFeeds[key] = JobFeed(
+            functools.partial(
+                list_running_jobs, current_user.directorName, current_user.username
+            ),
+            functools.partial(
+                list_job_records, current_user.directorName, current_user.username
+            ),
+            interval=CONFIG_JOBFEED_POLL_INTERVAL,
+        )
+    return jobFeeds[key]
+
+
+def release_job_feed(current_user, feed: JobFeed, queue):
+    """
+    Unsubscribe queue from feed.
+    After the last subscriber, the feed is stopped and removed.
+    """
+    feed.unsubscribe(queue)
+    if not feed.subscribers:
+        feed.close()
+        key = (current_user.directorName, current_user.username)
+        if jobFeeds.get(key) is feed:
+            del jobFeeds[key]
+
+
+async def stream_job_events(current_user):
+    """
+    Generator yielding the events of the job feed of the user as server-sent events.
+    """
+    # get the feed only when the stream starts,
+    # as it is removed when its last subscriber is gone
+    feed = get_job_feed(current_user)
+    queue = feed.subscribe()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), CONFIG_JOBFEED_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            yield "event: %s\ndata: %s\n\n" % (event[0], json.dumps(event[1]))
+    finally:
+        release_job_feed(current_user, feed, queue)
+
+
+@app.get("/control/jobs/running/events", tags=["jobcontrol", "control", "jobs"])
+async def stream_running_jobs(
+    *,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-sent events (_text/event-stream_) about running jobs,
+    instead of polling _/control/jobs_.
+
+    The running jobs are queried by one shared loop
+    (console command _list jobs jobstatus=R_ every _PollInterval_ seconds),
+    no matter how many clients are connected.
+
+    - **snapshot**: all running jobs. Sent first and when a client could not keep up
+    - **started**: a job has started
+    - **updated**: the record of a running job has changed
+    - **finished**: a job has ended, with its final record
+    - **error**: the director could not be queried, the stream ends
+    """
+    return StreamingResponse(
+        stream_job_events(current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/control/jobs/{job_id}", tags=["jobcontrol", "control", "jobs"])
+async def delete_job(
+    *,
+    job_id: int = Path(..., title="The ID of job to delete", ge=1),
+    response: Response,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delete job record from catalog
+    """
+    # Director gives no success nor failed information
+    # We implemente validation here (check if job exists before and after deletion)
+    jobStatusResponse = await read_job_status(
+        job_id=job_id, response=response, current_user=current_user
+    )
+    if not "jobid" in jobStatusResponse:
+        response.status_code = 404
+        return {
+            "message": "No job with id %d found on director %s."
+            % (job_id, current_user.directorName)
+        }
+    # delete a specific job record given bei jobid
+    deleteCommand = "delete jobid=%d" % job_id
+    try:
+        result = await current_user.directorPool.call(deleteCommand)
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not delete jobid %d on director %s. Message: '%s'"
+            % (job_id, current_identity.directorName, e)
+        }
+    finally:
+        invalidate_bvfs_cache(current_user.directorName)
+    jobStatusResponse = await read_job_status(
+        job_id=job_id, response=response, current_user=current_user
+    )
+    if "jobid" in jobStatusResponse:
+        response.status_code = 500
+        return {
+            "message": "Job with id %d still exists on director %s. Delete failed"
+            % (job_id, current_user.directorName)
+        }
+    response.status_code = 200
+    return {"message": "Job %d succesfully deleted." % job_id}
+
+
+@app.post("/control/jobs/bulk/cancel", tags=["jobcontrol", "control", "jobs"])
+async def cancel_jobs(
+    *,
+    selection: bulkJobSelection = Body(..., title="Jobs to cancel"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cancel multiple jobs, given by _jobids_ and/or selected by _query_.
+    Returns the result of each job.
+    """
+    jobIds = await select_bulk_jobs(current_user=current_user, selection=selection)
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=jobIds,
+        commands=["cancel jobid=%d" % jobId for jobId in jobIds],
+    )
+
+
+@app.post("/control/jobs/bulk/rerun", tags=["jobcontrol", "control", "jobs"])
+async def rerun_jobs(
+    *,
+    selection: bulkJobSelection = Body(..., title="Jobs to rerun"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Rerun multiple jobs, given by _jobids_ and/or selected by _query_.
+    Returns the result of each job, containing the id of the new job.
+    """
+    jobIds = await select_bulk_jobs(current_user=current_user, selection=selection)
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=jobIds,
+        commands=["rerun jobid=%d" % jobId for jobId in jobIds],
+    )
+
+
+@app.post("/control/jobs/bulk/delete", tags=["jobcontrol", "control", "jobs"])
+async def delete_jobs(
+    *,
+    selection: bulkJobSelection = Body(..., title="Jobs to delete"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Delete multiple job records from catalog,
+    given by _jobids_ and/or selected by _query_.
+    Returns the result of each job. Jobs not found in the catalog are reported as failed.
+    """
+    jobIds = await select_bulk_jobs(current_user=current_user, selection=selection)
+    try:
+        return await call_bulk_commands(
+            current_user=current_user,
+            items=jobIds,
+            commands=["delete jobid=%d" % jobId for jobId in jobIds],
+            checkCommands=["list jobid=%d" % jobId for jobId in jobIds],
+        )
+    finally:
+        invalidate_bvfs_cache(current_user.directorName)
+
+
+@app.get("/control/jobs/logs/{job_id}", tags=["jobcontrol", "control", "jobs"])
+async def read_one_job_log(
+    *,
+    job_id: int = Path(..., title="The ID of job to get the logs", ge=1),
+    response: Response,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Read logs from a specific job defined by jobid
+    Returns output of command _list joblog jobid=id_
+    """
+    result = None
+    listCommand = "list joblog jobid=%d" % job_id
+    try:
+        result = await current_user.directorPool.call(listCommand)
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not read joblogs on director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    if result and "joblog" in result:
+        totalItems = len(result["joblog"])
+        return {"totalItems": totalItems, "joblog": result["joblog"]}
+    else:
+        response.status_code = 404
+        return {"message": "Joblogs Job with ID {jobid} not found".format(jobid=job_id)}
+
+
+@app.get("/control/jobs/files/{job_id}", tags=["jobcontrol", "control", "jobs"])
+async def read_files_of_job(
+    *,
+    job_id: int = Path(..., title="The ID of job to get the files", ge=1),
+    response: Response,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Read files from a specific job defined by jobid
+    Returns output of command _list joblog jobid=id_
+    """
+    result = None
+    listCommand = "list files jobid=%d" % job_id
+    try:
+        result = await current_user.directorPool.call(listCommand)
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not read jobfiles on director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    if result and "filenames" in result:
+        totalItems = len(result["filenames"])
+        return FastJSONResponse(
+            {"totalItems": totalItems, "filenames": result["filenames"]}
+        )
+    else:
+        response.status_code = 404
+        return {
+            "message": "Files for job with ID {jobid} not found".format(jobid=job_id)
+        }
+
+
+async def stream_list_items(
+    directorPool, director, listCommand, itemKey, ndjson=True, offset=0, limit=None
+):
+    """
+    Async generator running listCommand and yielding the elements
+    of the result array itemKey as NDJSON or JSON array,
+    while they are received from the director.
+
+    director is a connection checked out of directorPool
+    before the response is started.
+    It is checked in again at the end.
+    The first item is empty. The caller takes it,
+    so that the generator is started and its cleanup runs,
+    even if the response is never sent.
+    """
+    # chunks of about this size are passed to the web server
+    chunkSize = 65536
+    items = director.call_stream(listCommand)
+    complete = False
+    try:
+        yield ""
+        chunk = [] if ndjson else ["["]
+        chunkLength = 0
+        index = 0
+        sent = 0
+        async for path, value in items:
+            if len(path) != 2 or path[0] != itemKey:
+                continue
+            index += 1
+            if index <= offset:
+                continue
+            if limit is not None and sent >= limit:
+                # The connection is closed below,
+                # instead of receiving the rest of a possibly huge result.
+                break
+            line = json.dumps(value)
+            if ndjson:
+                line += "\n"
+            elif sent > 0:
+                line = "," + line
+            sent += 1
+            chunk.append(line)
+            chunkLength += len(line)
+            if chunkLength >= chunkSize:
+                yield "".join(chunk)
+                chunk = []
+                chunkLength = 0
+        else:
+            complete = True
+        if not ndjson:
+            chunk.append("]\n")
+        yield "".join(chunk)
+    finally:
+        # in a separate task, so that the connection is checked in,
+        # even if the request gets cancelled again
+        await asyncio.shield(
+            asyncio.ensure_future(
+                close_list_items(directorPool, director, items, complete)
+            )
+        )
+
+
+async def close_list_items(directorPool, director, items, complete):
+    if not complete:
+        # close the connection first,
+        # so that closing items does not receive the rest of the result
+        await director.close()
+    await items.aclose()
+    await directorPool.checkin(director, discard=not complete)
+
+
+@app.get("/control/jobs/files/{job_id}/stream", tags=["jobcontrol", "control", "jobs"])
+async def stream_files_of_job(
+    *,
+    job_id: int = Path(..., title="The ID of job to get the files", ge=1),
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    format: Optional[streamFormat] = Query("ndjson", title="Output format"),
+    limit: Optional[int] = Query(None, title="Result items limit", gt=0),
+    offset: Optional[int] = Query(0, title="Result items offset", ge=0),
+):
+    """
+    Stream files from a specific job defined by jobid,
+    while they are received from the director.
+    Built on console command _list files jobid=id_
+
+    Unlike _/control/jobs/files/{job_id}_, the file list is never held in memory as a whole,
+    which makes it suitable for jobs with millions of files.
+
+    - **format**=_ndjson_ - one JSON object per line (default)
+    - **format**=_json_ - a JSON array, sent in chunks
+
+    The total number of files of the job (as stored in the job record)
+    is returned in the _X-Total-Count_ header.
+    If a _limit_ is given and more files are available,
+    the _X-Next-Offset_ header contains the offset of the next page.
+    """
+    listCommand = "list files jobid=%d" % job_id
+    countCommand = "list jobid=%d" % job_id
+    try:
+        countDict = await current_user.directorPool.call(countCommand)
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not read jobfiles on director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    if not countDict or not countDict.get("jobs"):
+        response.status_code = 404
+        return {"message": "Job with Job ID {jobid} not found".format(jobid=job_id)}
+    totalItems = int(countDict["jobs"][0].get("jobfiles", 0))
+    headers = {"X-Total-Count": str(totalItems)}
+    if limit is not None and offset + limit < totalItems:
+        headers["X-Next-Offset"] = str(offset + limit)
+    try:
+        # connect before the response is started, to be able to report errors
+        director = await current_user.directorPool.checkout()
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not read jobfiles on director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    ndjson = format == streamFormat.ndjson
+    body = stream_list_items(
+        current_user.directorPool,
+        director,
+        listCommand,
+        "filenames",
+        ndjson=ndjson,
+        offset=offset,
+        limit=limit,
+    )
+    await body.__anext__()
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson" if ndjson else "application/json",
+        headers=headers,
+    )
+
+
+### BVFS (browsing backups for restores)
+
+
+def quote_argument(value: str):
+    """
+    Console command argument value, quoted and escaped.
+    """
+    return '"%s"' % value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def parse_jobids(jobids: str):
+    """
+    jobids parameter ("1,2,3") as normalized jobid set.
+    """
+    try:
+        jobIds = [int(jobId) for jobId in jobids.split(",")]
+    except ValueError:
+        jobIds = []
+    if not jobIds or min(jobIds) < 1:
+        raise HTTPException(
+            status_code=400, detail={"message": "Invalid jobids '%s'." % jobids}
+        )
+    return normalize_jobids(jobIds)
+
+
+async def update_bvfs(current_user, jobids: str):
+    """
+    Runs .bvfs_update for the jobid set, unless it has already been done.
+    Returns True, if the update has been run by this call.
+    """
+
+    async def run_update():
+        await current_user.directorPool.call(".bvfs_update jobid=%s" % jobids)
+
+    try:
+        return await get_bvfs_cache(current_user.directorName).update(
+            jobids, run_update
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Could not update BVFS cache for jobids %s on director %s. Message: '%s'"
+                % (jobids, current_user.directorName, e)
+            },
+        )
+
+
+async def list_bvfs_items(
+    *,
+    current_user: User,
+    itemType: str,
+    jobids: str,
+    path: Optional[str],
+    pathid: Optional[int],
+    pattern: Optional[str] = None,
+    limit: int,
+    offset: int,
+):
+    """
+    Page of a directory listing (itemType "directories" or "files").
+    Pages are cached per user (the result depends on the ACLs) and jobid set.
+    """
+    if path is None and pathid is None:
+        raise HTTPException(
+            status_code=400, detail={"message": "path or pathid is required."}
+        )
+    jobids = parse_jobids(jobids)
+    cache = get_bvfs_cache(current_user.directorName)
+    cacheKey = (
+        current_user.username,
+        itemType,
+        jobids,
+        pathid,
+        path,
+        pattern,
+        limit,
+        offset,
+    )
+
+    async def load():
+        await update_bvfs(current_user, jobids)
+        bvfsCommand = ".bvfs_%s jobid=%s" % (
+            "lsdirs" if itemType == "directories" else "lsfiles",
+            jobids,
+        )
+        if pathid is not None:
+            bvfsCommand += " pathid=%d" % pathid
+        else:
+            bvfsCommand += " path=%s" % quote_argument(path)
+        if pattern:
+            bvfsCommand += " pattern=%s" % quote_argument(pattern)
+        bvfsCommand += " limit=%d offset=%d" % (limit, offset)
+        try:
+            result = await current_user.directorPool.call(bvfsCommand)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Could not read %s from director %s. Message: '%s'"
+                    % (itemType, current_user.directorName, e)
+                },
+            )
+        return (result or {}).get(itemType, [])
+
+    items = await cache.listing(cacheKey, load)
+    results = {"jobids": jobids, "limit": limit, "offset": offset}
+    # limit and offset apply to the rows of the catalog query.
+    # The rows of directory listings include the entries . and ..
+    # and the same directory once per job,
+    # duplicates are only removed by the director after the limit.
+    rows = len(items)
+    if itemType == "directories":
+        rows *= len(jobids.split(","))
+    if rows >= limit:
+        results["nextOffset"] = offset + limit
+    # (keys of the JSON output of the director are lowercase)
+    entries = [item for item in items if item.get("name") not in (".", "..")]
+    return FastJSONResponse({**results, itemType: entries})
+
+
+@app.get("/control/bvfs/jobids/{job_id}", tags=["bvfs", "control", "jobs"])
+async def read_bvfs_jobids(
+    *,
+    job_id: int = Path(..., title="The ID of the job to restore", ge=1),
+    all: Optional[bareosBool] = Query(
+        "no", title="Include the jobs of all filesets of the client"
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Job IDs required to restore the state of a job (the full backup and
+    following differential and incremental backups).
+    Command used: _.bvfs_get_jobids_
     """
-    result = None
-    listCommand = "llist jobid=%d" % job_id
+    bvfsCommand = ".bvfs_get_jobids jobid=%d" % job_id
+    if all == "yes":
+        bvfsCommand += " all"
     try:
-        result = current_user.jsonDirector.call(listCommand)
+        result = await current_user.directorPool.call(bvfsCommand)
     except Exception as e:
-        response.status_code = 500
-        return {
-            "message": "Could not query jobs on director %s. Message: '%s'"
-            % (current_user.directorName, e)
-        }
-    if result and "jobs" in result:
-        return result["jobs"][0]
-    else:
-        response.status_code = 404
-        return {"message": "Job with Job ID {jobid} not found".format(jobid=job_id)}
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Could not read jobids from director %s. Message: '%s'"
+                % (current_user.directorName, e)
+            },
+        )
+    jobIds = [int(job["id"]) for job in (result or {}).get("jobids", [])]
+    if not jobIds:
+        raise HTTPException(
+            status_code=404, detail={"message": "No jobs found for jobid %d." % job_id}
+        )
+    return {"jobids": normalize_jobids(jobIds)}
 
 
-@app.get("/control/jobs", tags=["jobcontrol", "control", "jobs"])
-def read_all_jobs_status(
+@app.put("/control/bvfs/update", tags=["bvfs", "control", "jobs"])
+async def update_bvfs_cache(
     *,
-    response: Response,
+    jobids: str = Query(..., title="Job IDs, separated by commas", example="1,2,3"),
     current_user: User = Depends(get_current_user),
-    limit: Optional[int] = Query(None, title="Result items limit", gt=1),
-    offset: Optional[int] = Query(None, title="Result items offset", gt=0),
-    jobQuery: Optional[jobQuery] = Body(None, title="Query parameter"),
 ):
-    return list_catalog_items(
-        itemType="jobs",
-        current_user=current_user,
-        response=response,
-        limit=limit,
-        offset=offset,
-        jobQuery=jobQuery,
-        hasCountOption="yes",
-    )
+    """
+    Update the BVFS cache of the catalog for a set of jobs.
+    Command used: _.bvfs_update_
+
+    The update only runs once per jobid set,
+    the listing endpoints run it when required.
+    """
+    jobids = parse_jobids(jobids)
+    return {"jobids": jobids, "updated": await update_bvfs(current_user, jobids)}
 
 
-@app.delete("/control/jobs/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def delete_job(
+@app.get("/control/bvfs/directories", tags=["bvfs", "control", "jobs"])
+async def read_bvfs_directories(
     *,
-    job_id: int = Path(..., title="The ID of job to delete", ge=1),
-    response: Response,
+    jobids: str = Query(..., title="Job IDs, separated by commas", example="1,2,3"),
+    path: Optional[str] = Query(
+        None, title="Directory to list. Use an empty path for the root"
+    ),
+    pathid: Optional[int] = Query(None, title="PathId of the directory to list", ge=1),
+    limit: int = Query(1000, title="Result items limit", ge=1),
+    offset: int = Query(0, title="Result items offset", ge=0),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Delete job record from catalog
+    Subdirectories of a directory of the backup of a jobid set.
+    Command used: _.bvfs_lsdirs_
+
+    Continue with _nextOffset_ as _offset_ to get the next page,
+    it is missing on the last page.
+    The entries _._ and _.._ are not returned,
+    so pages can contain less than _limit_ directories.
+    Pages are cached for _BvfsTTL_ seconds (section _Cache_).
     """
-    # Director gives no success nor failed information
-    # We implemente validation here (check if job exists before and after deletion)
-    jobStatusResponse = read_job_status(
-        job_id=job_id, response=response, current_user=current_user
-    )
-    if not "jobid" in jobStatusResponse:
-        response.status_code = 404
-        return {
-            "message": "No job with id %d found on director %s."
-            % (job_id, current_user.directorName)
-        }
-    # delete a specific job record given bei jobid
-    deleteCommand = "delete jobid=%d" % job_id
-    try:
-        result = current_user.jsonDirector.call(deleteCommand)
-    except Exception as e:
-        response.status_code = 500
-        return {
-            "message": "Could not delete jobid %d on director %s. Message: '%s'"
-            % (job_id, current_identity.directorName, e)
-        }
-    jobStatusResponse = read_job_status(
-        job_id=job_id, response=response, current_user=current_user
+    return await list_bvfs_items(
+        current_user=current_user,
+        itemType="directories",
+        jobids=jobids,
+        path=path,
+        pathid=pathid,
+        limit=limit,
+        offset=offset,
     )
-    if "jobid" in jobStatusResponse:
-        response.status_code = 500
-        return {
-            "message": "Job with id %d still exists on director %s. Delete failed"
-            % (job_id, current_user.directorName)
-        }
-    response.status_code = 200
-    return {"message": "Job %d succesfully deleted." % job_id}
 
 
-@app.get("/control/jobs/logs/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def read_one_job_log(
+@app.get("/control/bvfs/files", tags=["bvfs", "control", "jobs"])
+async def read_bvfs_files(
     *,
-    job_id: int = Path(..., title="The ID of job to get the logs", ge=1),
-    response: Response,
+    jobids: str = Query(..., title="Job IDs, separated by commas", example="1,2,3"),
+    path: Optional[str] = Query(None, title="Directory to list"),
+    pathid: Optional[int] = Query(None, title="PathId of the directory to list", ge=1),
+    pattern: Optional[str] = Query(None, title="Only list files matching pattern"),
+    limit: int = Query(1000, title="Result items limit", ge=1),
+    offset: int = Query(0, title="Result items offset", ge=0),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Read logs from a specific job defined by jobid
-    Returns output of command _list joblog jobid=id_
+    Files of a directory of the backup of a jobid set.
+    Command used: _.bvfs_lsfiles_
+
+    Continue with _nextOffset_ as _offset_ to get the next page,
+    it is missing on the last page.
+    Pages are cached for _BvfsTTL_ seconds (section _Cache_).
     """
-    result = None
-    listCommand = "list joblog jobid=%d" % job_id
-    try:
-        result = current_user.jsonDirector.call(listCommand)
-    except Exception as e:
-        response.status_code = 500
-        return {
-            "message": "Could not read joblogs on director %s. Message: '%s'"
-            % (current_user.directorName, e)
-        }
-    if result and "joblog" in result:
-        totalItems = len(result["joblog"])
-        return {"totalItems": totalItems, "joblog": result["joblog"]}
-    else:
-        response.status_code = 404
-        return {"message": "Joblogs Job with ID {jobid} not found".format(jobid=job_id)}
+    return await list_bvfs_items(
+        current_user=current_user,
+        itemType="files",
+        jobids=jobids,
+        path=path,
+        pathid=pathid,
+        pattern=pattern,
+        limit=limit,
+        offset=offset,
+    )
 
 
-@app.get("/control/jobs/files/{job_id}", tags=["jobcontrol", "control", "jobs"])
-def read_files_of_job(
+@app.post("/control/bvfs/restore", tags=["bvfs", "control", "jobs"])
+async def run_bvfs_restore(
     *,
-    job_id: int = Path(..., title="The ID of job to get the files", ge=1),
+    restore: bvfsRestore = Body(..., title="Files and directories to restore"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
     """
-    Read files from a specific job defined by jobid
-    Returns output of command _list joblog jobid=id_
+    Restore files (_fileid_) and directories (_dirid_) selected by browsing.
+    Commands used: _.bvfs_restore_, _restore file=?_ and _.bvfs_cleanup_
     """
-    result = None
-    listCommand = "list files jobid=%d" % job_id
+    if not (restore.fileid or restore.dirid or restore.hardlink):
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Select at least one of fileid, dirid or hardlink."},
+        )
+    jobids = normalize_jobids(restore.jobids)
+    # name of the temporary table of the selection
+    restoreList = "b2%d%d" % (os.getpid(), time.monotonic_ns())
+    bvfsCommand = ".bvfs_restore path=%s jobid=%s" % (restoreList, jobids)
+    for argument in ["fileid", "dirid", "hardlink"]:
+        ids = getattr(restore, argument)
+        if ids:
+            bvfsCommand += " %s=%s" % (argument, ",".join(str(i) for i in ids))
+    restoreCommand = "restore file=?%s client=%s" % (
+        restoreList,
+        quote_argument(restore.client),
+    )
+    for argument in [
+        "restoreclient",
+        "restorejob",
+        "where",
+        "replace",
+        "pluginoptions",
+    ]:
+        value = getattr(restore, argument)
+        if value is not None:
+            restoreCommand += " %s=%s" % (argument, quote_argument(str(value)))
+    restoreCommand += " yes"
+    await update_bvfs(current_user, jobids)
     try:
-        result = current_user.jsonDirector.call(listCommand)
+        async with current_user.directorPool.connection() as director:
+            try:
+                await director.call(bvfsCommand)
+                result = await director.call(restoreCommand)
+            finally:
+                await director.call(".bvfs_cleanup path=%s" % restoreList)
     except Exception as e:
         response.status_code = 500
         return {
-            "message": "Could not read jobfiles on director %s. Message: '%s'"
+            "message": "Could not start restore on director %s. Message: '%s'"
             % (current_user.directorName, e)
         }
-    if result and "filenames" in result:
-        totalItems = len(result["filenames"])
-        return {"totalItems": totalItems, "filenames": result["filenames"]}
+    if "run" in result and "jobid" in result["run"]:
+        return {"jobid": int(result["run"]["jobid"])}
     else:
-        response.status_code = 404
-        return {
-            "message": "Files for job with ID {jobid} not found".format(jobid=job_id)
-        }
+        response.status_code = 500
+        return {"message": "Restore triggered but no jobId returned"}
 
 
 #### JobDefs
 
 
 @app.post("/confguration/jobdefs", tags=["jobdefs", "configuration"])
-def post_jobdef(
+async def post_jobdef(
     *,
     jobDef: jobDefs = Body(..., title="Jobdef resource"),
     response: Response,
@@ -1034,7 +2335,7 @@ def post_jobdef(
     Create a new jobdefs resource.
     Console command used: _configure add jobdefs_
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         componentDef=jobDef,
         response=response,
         current_user=current_user,
@@ -1043,7 +2344,7 @@ def post_jobdef(
 
 
 @app.get("/configuration/jobdefs", tags=["jobdefs", "configuration"])
-def read_all_jobdefs(
+async def read_all_jobdefs(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1054,7 +2355,7 @@ def read_all_jobdefs(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="jobdefs",
@@ -1063,7 +2364,7 @@ def read_all_jobdefs(
 
 
 @app.get("/configuration/jobdefs/{jobdefs_name}", tags=["jobdefs", "configuration"])
-def read_jobdef_by_name(
+async def read_jobdef_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1075,7 +2376,7 @@ def read_jobdef_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="jobdefs",
@@ -1088,7 +2389,7 @@ def read_jobdef_by_name(
 
 
 @app.get("/configuration/jobs", tags=["jobs", "configuration"])
-def read_all_jobs(
+async def read_all_jobs(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1099,13 +2400,13 @@ def read_all_jobs(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response, current_user=current_user, itemType="jobs", verbose=verbose
     )
 
 
 @app.get("/configuration/jobs/{jobs_name}", tags=["jobs", "configuration"])
-def read_job_by_name(
+async def read_job_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1117,7 +2418,7 @@ def read_job_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="jobs",
@@ -1127,7 +2428,7 @@ def read_job_by_name(
 
 
 @app.post("/configuration/jobs", tags=["jobs", "configuration"])
-def post_job(
+async def post_job(
     *,
     jobDef: jobResource = Body(..., title="Job resource"),
     response: Response,
@@ -1138,7 +2439,7 @@ def post_job(
     Console command used: _configure add job_
 
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         componentDef=jobDef,
         response=response,
         current_user=current_user,
@@ -1150,14 +2451,27 @@ def post_job(
 
 
 @app.get("/control/volumes", tags=["volumes", "control"])
-def read_volumes(
+async def read_volumes(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
     limit: Optional[int] = Query(None, title="Result items limit", gt=0),
     offset: Optional[int] = Query(None, title="Result items offset", gt=0),
+    after_mediaid: Optional[int] = Query(
+        None, title="List volumes with a higher Media ID, ordered by Media ID", ge=0
+    ),
+    cursor: Optional[str] = Query(
+        None, title="Continuation token (nextCursor of the previous page)"
+    ),
     myQuery: Optional[volumeQuery] = Body(None, title="Query parameter"),
 ):
+    """
+    List volumes, grouped by pool. Built on console command _llist volumes_.
+
+    For keyset pagination start with _after_mediaid=0_ and a _limit_,
+    then pass _nextCursor_ of the result as _cursor_ to get the next page.
+    """
+    afterId = get_keyset_start("volumes", offset, after_mediaid, cursor)
     queryDict = {}
     countDict = {}
     responseDict = {}
@@ -1177,6 +2491,11 @@ def read_volumes(
         volumeCommand += " limit=%d" % limit
     if offset is not None:
         volumeCommand += " offset=%d" % offset
+    if afterId is not None:
+        if "pool" not in queryDict or queryDict["pool"] is None:
+            # list all volumes ordered by MediaId, instead of pool by pool
+            volumeCommand += " all"
+        volumeCommand += " after_mediaid=%d" % afterId
     # if volume name is in queryDict, we have to remove the other filters
     # and use a different comman
     if "volume" in queryDict and queryDict["volume"] is not None:
@@ -1184,30 +2503,37 @@ def read_volumes(
         volumeCommand = "llist volume=%s" % queryDict["volume"]
         countCommand = None
     try:
-        responseDict = current_user.jsonDirector.call(volumeCommand)
+        responseDict = await current_user.directorPool.call(volumeCommand)
         if countCommand is not None:
-            countDict = current_user.jsonDirector.call(countCommand)
+            countDict = await call_count_command(current_user, countCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not read volume list from director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     if "volumes" in responseDict:
         counter = 0
         # countDict/response dict has different structures, if filtered by pool or not
-        if isinstance(countDict["volumes"], dict):
+        if isinstance(responseDict[volumeKeyName], dict):
             results["volumes"] = responseDict[volumeKeyName]
-            for p in countDict["volumes"]:
-                counter += int(countDict["volumes"][p][0]["count"])
         else:
-            # check for empty pool
-            if len(responseDict[volumeKeyName]) == 0:
+            # check for empty pool (an empty page is fine for keyset pagination)
+            if len(responseDict[volumeKeyName]) == 0 and afterId is None:
                 response.status_code = 404
                 return {"message": "Nothing found. Command: %s" % volumeCommand}
-            poolName = responseDict[volumeKeyName][0]["pool"]
-            # print(responseDict[volumeKeyName])
-            results["volumes"][poolName] = responseDict[volumeKeyName]
+            for volume in responseDict[volumeKeyName]:
+                results["volumes"].setdefault(volume["pool"], []).append(volume)
+            if afterId is not None and limit is not None:
+                nextCursor = get_keyset_next_cursor(
+                    "volumes", responseDict, responseDict[volumeKeyName], limit
+                )
+                if nextCursor is not None:
+                    results["nextCursor"] = nextCursor
+        if isinstance(countDict["volumes"], dict):
+            for p in countDict["volumes"]:
+                counter += int(countDict["volumes"][p][0]["count"])
+        else:
             counter = int(countDict["volumes"][0]["count"])
         results["totalItems"] = counter
         foundItems = len(responseDict)
@@ -1233,7 +2559,7 @@ def read_volumes(
 
 
 @app.get("/control/volumes/{volume_id}", tags=["volumes", "control"])
-def read_volume(
+async def read_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1242,12 +2568,12 @@ def read_volume(
 ):
     volumeCommand = "llist volumes"
     try:
-        responseDict = current_user.jsonDirector.call(volumeCommand)
+        responseDict = await current_user.directorPool.call(volumeCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not read volume list from director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     if "volumes" in responseDict:
         for p in responseDict["volumes"]:
@@ -1260,7 +2586,7 @@ def read_volume(
 
 
 @app.post("/control/volumes", status_code=200, tags=["volumes", "control"])
-def label_volume(
+async def label_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1273,18 +2599,18 @@ def label_volume(
     labelCommand = "label"
     labelCommand += parseCommandOptions(volumeLabel.dict())
     try:
-        responseDict = current_user.jsonDirector.call(labelCommand)
+        responseDict = await current_user.directorPool.call(labelCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not label volume on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     return responseDict
 
 
 @app.patch("/control/volumes/{volume_name}", tags=["volumes", "control"])
-def update_volume(
+async def update_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1300,17 +2626,17 @@ def update_volume(
     updateCommand += parseCommandOptions(volumeProps.dict())
     # print(updateCommand)
     try:
-        responseDict = current_user.jsonDirector.call(updateCommand)
+        responseDict = await current_user.directorPool.call(updateCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not update volume on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response, we want to return the changed volume's properties
     volQuery = volumeQuery()
     volQuery.volume = volume_name
-    responseDict = read_volumes(
+    responseDict = await read_volumes(
         response=response,
         current_user=current_user,
         myQuery=volQuery,
@@ -1322,7 +2648,7 @@ def update_volume(
 
 
 @app.put("/control/volumes/move", status_code=200, tags=["volumes", "control"])
-def move_volume(
+async def move_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1337,19 +2663,19 @@ def move_volume(
     updateCommand += parseCommandOptions(moveParams.dict())
     # print (updateCommand)
     try:
-        responseDict = current_user.jsonDirector.call(updateCommand)
+        responseDict = await current_user.directorPool.call(updateCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not move volumes on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response
     return responseDict
 
 
 @app.put("/control/volumes/export", status_code=200, tags=["volumes", "control"])
-def export_volume(
+async def export_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1363,12 +2689,12 @@ def export_volume(
     updateCommand += parseCommandOptions(exportParams.dict())
     # print(updateCommand)
     try:
-        responseDict = current_user.jsonDirector.call(updateCommand)
+        responseDict = await current_user.directorPool.call(updateCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not export volumes on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response
     response.status_code = 200
@@ -1376,7 +2702,7 @@ def export_volume(
 
 
 @app.put("/control/volumes/import", status_code=200, tags=["volumes", "control"])
-def import_volume(
+async def import_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1390,12 +2716,12 @@ def import_volume(
     updateCommand += parseCommandOptions(importParams.dict())
     # print(updateCommand)
     try:
-        responseDict = current_user.jsonDirector.call(updateCommand)
+        responseDict = await current_user.directorPool.call(updateCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not import volumes on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response
     response.status_code = 200
@@ -1403,7 +2729,7 @@ def import_volume(
 
 
 @app.put("/control/volumes/{volume_name}", status_code=200, tags=["volumes", "control"])
-def relabel_volume(
+async def relabel_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1421,12 +2747,12 @@ def relabel_volume(
     updateCommand += parseCommandOptions(volumeRelabel.dict())
     # print(updateCommand)
     try:
-        responseDict = current_user.jsonDirector.call(updateCommand)
+        responseDict = await current_user.directorPool.call(updateCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not relabel volume on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response
     response.status_code = 200
@@ -1436,7 +2762,7 @@ def relabel_volume(
 @app.delete(
     "/control/volumes/{volume_name}", status_code=204, tags=["volumes", "control"]
 )
-def delete_volume(
+async def delete_volume(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1448,23 +2774,104 @@ def delete_volume(
     responseDict = {}
     deleteCommand = "delete volume=%s yes" % volume_name
     try:
-        responseDict = current_user.jsonDirector.call(deleteCommand)
+        responseDict = await current_user.directorPool.call(deleteCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not delete volume on director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     # Director delivers empty response
     response.status_code = 204
     return responseDict
 
 
+@app.post("/control/volumes/bulk/update", tags=["volumes", "control"])
+async def update_volumes(
+    *,
+    current_user: User = Depends(get_current_user),
+    bulkUpdate: volumeBulkUpdate = Body(..., title="Volumes and properties to set"),
+):
+    """
+    Update multiple volumes, given by name and/or selected by _pool_ and _filter_.
+    _filter_ matches the properties of _llist volumes_, e.g. _{"volstatus": "Used"}_.
+    Returns the result of each volume.
+    """
+    volumeNames = await select_bulk_volumes(
+        current_user=current_user, selection=bulkUpdate
+    )
+    options = parseCommandOptions(bulkUpdate.properties.dict())
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=volumeNames,
+        commands=["update volume=%s%s" % (name, options) for name in volumeNames],
+    )
+
+
+@app.post("/control/volumes/bulk/delete", tags=["volumes", "control"])
+async def delete_volumes(
+    *,
+    current_user: User = Depends(get_current_user),
+    selection: bulkVolumeSelection = Body(..., title="Volumes to delete"),
+):
+    """
+    Delete multiple volumes from catalog,
+    given by name and/or selected by _pool_ and _filter_.
+    Returns the result of each volume.
+    """
+    volumeNames = await select_bulk_volumes(
+        current_user=current_user, selection=selection
+    )
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=volumeNames,
+        commands=["delete volume=%s yes" % name for name in volumeNames],
+    )
+
+
+@app.post("/control/volumes/bulk/relabel", tags=["volumes", "control"])
+async def relabel_volumes(
+    *,
+    current_user: User = Depends(get_current_user),
+    bulkRelabel: volumeBulkRelabel = Body(..., title="Volumes to relabel"),
+):
+    """
+    Relabel multiple volumes, using the _relabel_ command.
+    Returns the result of each volume.
+    """
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=[relabel.oldvolume for relabel in bulkRelabel.relabels],
+        commands=[
+            "relabel oldvolume=%s" % relabel.oldvolume
+            + parseCommandOptions(relabel.dict(exclude={"oldvolume"}))
+            for relabel in bulkRelabel.relabels
+        ],
+    )
+
+
+@app.post("/control/volumes/bulk/move", tags=["volumes", "control"])
+async def move_volumes(
+    *,
+    current_user: User = Depends(get_current_user),
+    bulkMove: volumeBulkMove = Body(..., title="Move operations"),
+):
+    """
+    Execute multiple _move_ commands.
+    Returns the result of each move operation (identified by its source slots).
+    """
+    return await call_bulk_commands(
+        current_user=current_user,
+        items=["%s:%s" % (move.storage, move.srcslots) for move in bulkMove.moves],
+        commands=["move" + parseCommandOptions(move.dict()) for move in bulkMove.moves],
+    )
+
+
 ### Pools
 
 
 @app.get("/configuration/pools", tags=["pools", "configuration"])
-def read_all_pools(
+async def read_all_pools(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1475,13 +2882,13 @@ def read_all_pools(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response, current_user=current_user, itemType="pools", verbose=verbose
     )
 
 
 @app.get("/configuration/pools/{pools_name}", tags=["pools", "configuration"])
-def read_pool_by_name(
+async def read_pool_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1493,7 +2900,7 @@ def read_pool_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="pools",
@@ -1503,7 +2910,7 @@ def read_pool_by_name(
 
 
 @app.post("/configuration/pools", tags=["pools", "configuration"])
-def post_pool(
+async def post_pool(
     *,
     poolDef: poolResource = Body(..., title="pool resource"),
     response: Response,
@@ -1513,7 +2920,7 @@ def post_pool(
     Create a new pool resource.
     Console command used: _configure add pool_
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         componentDef=poolDef,
         response=response,
         current_user=current_user,
@@ -1522,7 +2929,7 @@ def post_pool(
 
 
 @app.get("/control/pools", status_code=200, tags=["pools", "control"])
-def read_all_pools(
+async def read_all_pools(
     response: Response,
     current_user: User = Depends(get_current_user),
     name: Optional[str] = None,
@@ -1538,12 +2945,12 @@ def read_all_pools(
         listCommand = "llist pools"
     # print(listCommand)
     try:
-        responseDict = current_user.jsonDirector.call(listCommand)
+        responseDict = await current_user.directorPool.call(listCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not read pool list from director %s. Message: '%s'"
-            % (CONFIG_DIRECTOR_NAME, e)
+            % (current_user.directorName, e)
         }
     if "pools" in responseDict:
         totalItems = len(responseDict["pools"])
@@ -1554,7 +2961,7 @@ def read_all_pools(
 
 
 @app.get("/control/pools/{pool_id}", tags=["pools", "control"])
-def read_pool(
+async def read_pool(
     *,
     pool_id: int = Path(..., title="The ID of pool to get", ge=1),
     response: Response,
@@ -1567,7 +2974,7 @@ def read_pool(
     **Warning** Director does not support direct query by _id_ we query all pools and filter the result.
     Maybe more time consuming than expected in large settings.
     """
-    allpools = read_all_pools(response, current_user)
+    allpools = await read_all_pools(response, current_user)
     result = None
     for c in allpools["pools"]:
         if c["poolid"] == str(pool_id):
@@ -1587,7 +2994,7 @@ def read_pool(
 
 
 @app.get("/configuration/schedules", tags=["schedules", "configuration"])
-def read_all_schedules(
+async def read_all_schedules(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1598,7 +3005,7 @@ def read_all_schedules(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="schedules",
@@ -1609,7 +3016,7 @@ def read_all_schedules(
 @app.get(
     "/configuration/schedules/{schedules_name}", tags=["schedules", "configuration"]
 )
-def read_schedule_by_name(
+async def read_schedule_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1621,7 +3028,7 @@ def read_schedule_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="schedules",
@@ -1631,7 +3038,7 @@ def read_schedule_by_name(
 
 
 @app.post("/configuration/schedules", tags=["schedules", "configuration"])
-def create_schedule(
+async def create_schedule(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1641,7 +3048,7 @@ def create_schedule(
     Create a new schedule resource.
     Console command used _configure add schedule_
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         response=response,
         componentDef=scheduleDef,
         componentType="schedule",
@@ -1654,13 +3061,13 @@ def create_schedule(
     status_code=204,
     tags=["schedules", "control"],
 )
-def enable_schedule(
+async def enable_schedule(
     *,
     schedule_name: str = Path(..., title="The schedule (name) to enable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=schedule_name,
@@ -1675,13 +3082,13 @@ def enable_schedule(
     status_code=204,
     tags=["schedules", "control"],
 )
-def disable_schedule(
+async def disable_schedule(
     *,
     schedule_name: str = Path(..., title="The schedule (name) to disable"),
     response: Response,
     current_user: User = Depends(get_current_user),
 ):
-    (result, jsonMessage) = switch_resource(
+    (result, jsonMessage) = await switch_resource(
         response=response,
         current_user=current_user,
         resourceName=schedule_name,
@@ -1695,7 +3102,7 @@ def disable_schedule(
 
 
 @app.get("/configuration/storages", tags=["storages", "configuration"])
-def read_all_storages(
+async def read_all_storages(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1706,7 +3113,7 @@ def read_all_storages(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="storages",
@@ -1715,7 +3122,7 @@ def read_all_storages(
 
 
 @app.get("/configuration/storages/{storages_name}", tags=["storages", "configuration"])
-def read_storage_by_name(
+async def read_storage_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1727,7 +3134,7 @@ def read_storage_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="storages",
@@ -1737,7 +3144,7 @@ def read_storage_by_name(
 
 
 @app.post("/configuration/storage", tags=["storages", "configuration"])
-def post_storage(
+async def post_storage(
     *,
     storageDef: storageResource = Body(..., title="storage resource"),
     response: Response,
@@ -1747,7 +3154,7 @@ def post_storage(
     Create a new storage resource.
     Console command used: _configure add storage_
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         response=response,
         componentDef=storageDef,
         componentType="storage",
@@ -1759,7 +3166,7 @@ def post_storage(
 
 
 @app.get("/configuration/users", tags=["users", "configuration"])
-def read_all_users(
+async def read_all_users(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1770,13 +3177,13 @@ def read_all_users(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response, current_user=current_user, itemType="users", verbose=verbose
     )
 
 
 @app.get("/configuration/users/{users_name}", tags=["users", "configuration"])
-def read_user_by_name(
+async def read_user_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1788,7 +3195,7 @@ def read_user_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="users",
@@ -1798,7 +3205,7 @@ def read_user_by_name(
 
 
 @app.post("/configuration/users", tags=["users", "configuration"])
-def post_user(
+async def post_user(
     *,
     userDef: userResource = Body(..., title="user resource"),
     response: Response,
@@ -1809,7 +3216,7 @@ def post_user(
     Console command used: _configure add user_
 
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         response=response,
         componentDef=userDef,
         componentType="user",
@@ -1818,7 +3225,7 @@ def post_user(
 
 
 @app.get("/configuration/profiles", tags=["profiles", "configuration"])
-def read_all_profiles(
+async def read_all_profiles(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1829,7 +3236,7 @@ def read_all_profiles(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="profiles",
@@ -1838,7 +3245,7 @@ def read_all_profiles(
 
 
 @app.get("/configuration/profiles/{profiles_name}", tags=["profiles", "configuration"])
-def read_client_by_name(
+async def read_client_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1850,7 +3257,7 @@ def read_client_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="profiles",
@@ -1860,7 +3267,7 @@ def read_client_by_name(
 
 
 @app.post("/configuration/profiles", tags=["users", "configuration"])
-def post_profile(
+async def post_profile(
     *,
     profileDef: profileResource = Body(..., title="profile resource"),
     response: Response,
@@ -1871,7 +3278,7 @@ def post_profile(
     Console command used: _configure add profile_
 
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         response=response,
         componentDef=profileDef,
         componentType="profile",
@@ -1880,7 +3287,7 @@ def post_profile(
 
 
 @app.get("/configuration/consoles", tags=["consoles", "configuration"])
-def read_all_consoles(
+async def read_all_consoles(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1891,7 +3298,7 @@ def read_all_consoles(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="consoles",
@@ -1900,7 +3307,7 @@ def read_all_consoles(
 
 
 @app.get("/configuration/consoles/{consoles_name}", tags=["consoles", "configuration"])
-def read_console_by_name(
+async def read_console_by_name(
     *,
     response: Response,
     current_user: User = Depends(get_current_user),
@@ -1912,7 +3319,7 @@ def read_console_by_name(
 
     Needs at least Bareos Version >= 20.0.0
     """
-    return show_configuration_items(
+    return await show_configuration_items(
         response=response,
         current_user=current_user,
         itemType="consoles",
@@ -1922,7 +3329,7 @@ def read_console_by_name(
 
 
 @app.post("/configuration/consoles", tags=["users", "configuration"])
-def post_console(
+async def post_console(
     *,
     consoleDef: consoleResource = Body(..., title="console resource"),
     response: Response,
@@ -1933,7 +3340,7 @@ def post_console(
     Console command used: _configure add console_
 
     """
-    return configure_add_standard_component(
+    return await configure_add_standard_component(
         response=response,
         componentDef=consoleDef,
         componentType="console",
@@ -1945,29 +3352,52 @@ def post_console(
 
 
 @app.get("/control/directors/version", tags=["directors", "control"])
-def read_director_version(
+async def read_director_version(
     *, response: Response, current_user: User = Depends(get_current_user)
 ):
     """
     Read director version. Command used: _version_
+
+    The version is read once per director
+    and again after a reload or when the director has been reconnected.
     """
-    result = None
-    dirCommand = "version"
     try:
-        result = current_user.jsonDirector.call(dirCommand)
+        capabilities = await get_director_capabilities(
+            current_user.directorName, current_user.directorPool
+        )
+    except (KeyError, TypeError):
+        response.status_code = 404
+        return {"message": "No version info returned"}
     except Exception as e:
         raise HTTPException(
             status_code=500, detail="Could not read version from director"
         )
-    if result and "version" in result:
-        return result["version"]
-    else:
-        response.status_code = 404
-        return {"message": "No version info returned"}
+    return capabilities.versionInfo
+
+
+@app.get("/control/directors/capabilities", tags=["directors", "control"])
+async def read_director_capabilities(
+    *, response: Response, current_user: User = Depends(get_current_user)
+):
+    """
+    Version of the director and the REST API features it supports
+    (feature name -> true/false). Uses the cached result of the _version_ command.
+    """
+    try:
+        capabilities = await get_director_capabilities(
+            current_user.directorName, current_user.directorPool
+        )
+    except Exception as e:
+        response.status_code = 500
+        return {
+            "message": "Could not read version of director %s. Message: '%s'"
+            % (current_user.directorName, e)
+        }
+    return capabilities.as_dict()
 
 
 @app.get("/control/directors/time", tags=["directors", "control"])
-def read_director_time(
+async def read_director_time(
     *, response: Response, current_user: User = Depends(get_current_user)
 ):
     """
@@ -1976,7 +3406,7 @@ def read_director_time(
     result = None
     dirCommand = "time"
     try:
-        result = current_user.jsonDirector.call(dirCommand)
+        result = await current_user.directorPool.call(dirCommand)
     except Exception as e:
         response.status_code = 500
         return {
@@ -1991,7 +3421,7 @@ def read_director_time(
 
 
 @app.put("/control/directors/reload", tags=["directors", "control"])
-def read_director_time(
+async def read_director_time(
     *, response: Response, current_user: User = Depends(get_current_user)
 ):
     """
@@ -2000,15 +3430,180 @@ def read_director_time(
     result = None
     dirCommand = "reload"
     try:
-        result = current_user.jsonDirector.call(dirCommand)
+        result = await current_user.directorPool.call(dirCommand)
     except Exception as e:
         response.status_code = 500
         return {
             "message": "Could not reload director %s. Message: '%s'"
             % (current_user.directorName, e)
         }
+    finally:
+        invalidate_configuration_cache(current_user.directorName)
+        invalidate_director_capabilities(current_user.directorName)
     if result and "reload" in result:
         return result["reload"]
     else:
         response.status_code = 500
         return result
+
+
+@app.get("/control/directors", tags=["directors", "control"])
+async def read_directors(current_user: User = Depends(get_current_user)):
+    """
+    Configured directors. Requests are sent to another director
+    than the one of the login by the query parameter _director_.
+    """
+    return {
+        "totalItems": len(CONFIG_DIRECTORS),
+        "default": CONFIG_DIRECTOR_NAME,
+        "directors": list(CONFIG_DIRECTORS),
+    }
+
+
+### Aggregate
+
+
+def select_directors(directors: Optional[List[str]]):
+    if not directors:
+        return list(CONFIG_DIRECTORS)
+    unknown = [d for d in directors if d not in CONFIG_DIRECTORS]
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail={"message": "Directors not configured: %s" % ", ".join(unknown)},
+        )
+    # without duplicates
+    return list(dict.fromkeys(directors))
+
+
+async def call_directors(
+    current_user, command: str, directors: Optional[List[str]], timeout: float
+):
+    """
+    Sends command to all selected directors concurrently,
+    with the credentials of current_user.
+    Returns a dict director name -> aggregate.Outcome.
+    """
+
+    async def call(directorName):
+        directorUser = await get_director_user(current_user, directorName)
+        return await directorUser.directorPool.call(command)
+
+    return await aggregate.fan_out(
+        {
+            directorName: functools.partial(call, directorName)
+            for directorName in select_directors(directors)
+        },
+        timeout,
+    )
+
+
+def merge_director_items(outcomes: dict, itemKey: str):
+    """
+    Concatenates the items of the director results,
+    each item gets a member "director".
+    The member "directors" shows the outcome of each director.
+    """
+    items = []
+    directors = {}
+    for directorName, outcome in outcomes.items():
+        if outcome.error is not None:
+            message = str(outcome.error)
+            if isinstance(outcome.error, HTTPException):
+                message = outcome.error.detail["message"]
+            directors[directorName] = {
+                "success": False,
+                "message": message,
+                "duration": round(outcome.duration, 3),
+            }
+            continue
+        directorItems = (outcome.result or {}).get(itemKey, [])
+        items += [{"director": directorName, **item} for item in directorItems]
+        directors[directorName] = {
+            "success": True,
+            "totalItems": len(directorItems),
+            "duration": round(outcome.duration, 3),
+        }
+    return FastJSONResponse(
+        {"totalItems": len(items), itemKey: items, "directors": directors}
+    )
+
+
+@app.get("/aggregate/jobs", tags=["aggregate", "jobs"])
+async def read_jobs_of_all_directors(
+    *,
+    current_user: User = Depends(get_current_user),
+    directors: Optional[List[str]] = Query(
+        None, title="Directors to query. Default: all configured directors"
+    ),
+    timeout: Optional[float] = Query(
+        None, title="Seconds to wait for each director", gt=0
+    ),
+    limit: Optional[int] = Query(None, title="Result items limit per director", gt=0),
+    jobQuery: Optional[jobQuery] = Body(None, title="Query parameter"),
+):
+    """
+    List jobs of all directors (or of the selected directors).
+    Built on console command _llist jobs_, sent to all directors concurrently.
+
+    Directors not answering within _timeout_ seconds
+    (default: _Timeout_ in the _Aggregate_ section)
+    are reported as failed in _directors_, the other results are returned.
+    """
+    listCommand = "llist jobs"
+    if jobQuery is not None:
+        listCommand += parseCommandOptions(jobQuery.dict())
+    if limit is not None:
+        listCommand += " limit=%d" % limit
+    outcomes = await call_directors(
+        current_user, listCommand, directors, timeout or CONFIG_AGGREGATE_TIMEOUT
+    )
+    return merge_director_items(outcomes, "jobs")
+
+
+@app.get("/aggregate/volumes", tags=["aggregate", "volumes"])
+async def read_volumes_of_all_directors(
+    *,
+    current_user: User = Depends(get_current_user),
+    directors: Optional[List[str]] = Query(
+        None, title="Directors to query. Default: all configured directors"
+    ),
+    timeout: Optional[float] = Query(
+        None, title="Seconds to wait for each director", gt=0
+    ),
+):
+    """
+    List volumes of all directors (or of the selected directors).
+    Built on console command _llist volumes all_, sent to all directors concurrently.
+    """
+    outcomes = await call_directors(
+        current_user,
+        "llist volumes all",
+        directors,
+        timeout or CONFIG_AGGREGATE_TIMEOUT,
+    )
+    return merge_director_items(outcomes, "volumes")
+
+
+@app.get("/aggregate/clients", tags=["aggregate", "clients"])
+async def read_clients_of_all_directors(
+    *,
+    current_user: User = Depends(get_current_user),
+    directors: Optional[List[str]] = Query(
+        None, title="Directors to query. Default: all configured directors"
+    ),
+    timeout: Optional[float] = Query(
+        None, title="Seconds to wait for each director", gt=0
+    ),
+):
+    """
+    List clients of all directors (or of the selected directors).
+    Built on console command _llist clients_, sent to all directors concurrently.
+    """
+    outcomes = await call_directors(
+        current_user,
+        "llist clients",
+        directors,
+        timeout or CONFIG_AGGREGATE_TIMEOUT,
+    )
+    return merge_director_items(outcomes, "clients")
@@ -0,0 +1,60 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import asyncio
+import time
+
+
+class Outcome(object):
+    """
+    Result of one call of fan_out: either result or error is set.
+    """
+
+    def __init__(self, result=None, error=None, duration=0.0):
+        self.result = result
+        self.error = error
+        self.duration = duration
+
+
+async def timed_call(call, timeout):
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(call(), timeout)
+    except asyncio.TimeoutError:
+        return Outcome(
+            error=TimeoutError("No result within %g seconds." % timeout),
+            duration=time.perf_counter() - start,
+        )
+    except Exception as e:
+        return Outcome(error=e, duration=time.perf_counter() - start)
+    return Outcome(result=result, duration=time.perf_counter() - start)
+
+
+async def fan_out(calls, timeout):
+    """
+    Runs the coroutine functions of calls (dict key -> coroutine function)
+    concurrently. Each call is cancelled after timeout seconds,
+    so the total duration is bound by the slowest call, not by their sum.
+
+    Returns a dict key -> Outcome, in the order of calls.
+    A failing call does not affect the others.
+    """
+    keys = list(calls)
+    outcomes = await asyncio.gather(*[timed_call(calls[key], timeout) for key in keys])
+    return dict(zip(keys, outcomes))
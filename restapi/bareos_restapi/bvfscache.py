@@ -0,0 +1,140 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import asyncio
+from collections import OrderedDict
+import time
+
+
+def normalize_jobids(jobids):
+    """
+    Jobid set as string for BVFS commands (sorted, without duplicates),
+    e.g. [3, 1, 3] -> "1,3"
+    """
+    return ",".join(str(jobid) for jobid in sorted(set(jobids)))
+
+
+class BvfsCache(object):
+    """
+    BVFS state of a director:
+
+    - the jobid sets, for which the BVFS cache of the catalog has been updated
+      (.bvfs_update). Concurrent requests for the same set share one update.
+    - LRU cache of directory listings (pages of .bvfs_lsdirs and .bvfs_lsfiles)
+      with a time to live (in seconds). A max_size of 0 disables this cache.
+      Concurrent requests for the same listing share one query.
+
+    Only used by the event loop, therefore no locking is done.
+    """
+
+    def __init__(self, ttl=300, max_size=1000, max_updated=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_updated = max_updated
+        # key -> (expiration time, listing)
+        self.listings = OrderedDict()
+        # key -> task loading the listing
+        self.loading = {}
+        # jobid set -> task running or having run .bvfs_update
+        self.updates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def update(self, jobids, run_update):
+        """
+        Runs the coroutine function run_update,
+        unless it already ran successfully for the jobid set jobids.
+
+        Returns True, if this call started the update.
+        """
+        task = self.updates.get(jobids)
+        # retry failed updates
+        started = task is None or (
+            task.done() and (task.cancelled() or task.exception() is not None)
+        )
+        if started:
+            task = asyncio.ensure_future(run_update())
+            self.updates[jobids] = task
+            while len(self.updates) > self.max_updated:
+                self.updates.popitem(last=False)
+        self.updates.move_to_end(jobids)
+        # a cancelled request must not cancel the update of other requests
+        await asyncio.shield(task)
+        return started
+
+    async def listing(self, key, load):
+        """
+        Returns the listing for key,
+        from the cache or by calling the coroutine function load.
+        """
+        listing = self.get(key)
+        if listing is not None:
+            return listing
+        task = self.loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self.loading[key] = task
+            task.add_done_callback(lambda task: self.loaded(key, task))
+        return await asyncio.shield(task)
+
+    def loaded(self, key, task):
+        # not stored, if invalidated while loading
+        if self.loading.get(key) is not task:
+            return
+        del self.loading[key]
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    def get(self, key):
+        """
+        Returns the cached listing or None.
+        """
+        entry = self.listings.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.listings[key]
+            self.misses += 1
+            return None
+        self.listings.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, listing):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        self.listings[key] = (time.monotonic() + self.ttl, listing)
+        self.listings.move_to_end(key)
+        while len(self.listings) > self.max_size:
+            self.listings.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Forget all listings and updates, e.g. after jobs have been deleted.
+        """
+        self.listings.clear()
+        self.loading.clear()
+        self.updates.clear()
+
+    def metrics(self):
+        return {
+            "listings": len(self.listings),
+            "updatedJobidSets": len(self.updates),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,66 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import functools
+
+from packaging import version
+
+import bareos.util
+
+# Features of the REST API depending on the director -> minimum director version
+FEATURES = {
+    # show command with JSON output (/configuration endpoints)
+    "showConfiguration": "20.0.1",
+}
+
+
+@functools.lru_cache(maxsize=64)
+def parse_version(versionString):
+    """
+    Parsed PEP 440 version. Raises packaging.version.InvalidVersion.
+    """
+    return version.parse(versionString)
+
+
+class DirectorCapabilities(object):
+    """
+    Version and feature map of a director, derived from the result of its
+    _version_ command. Read once per director and shared by all users.
+    """
+
+    def __init__(self, versionInfo):
+        """
+        versionInfo: "version" member of the result of the _version_ command.
+        Raises packaging.version.InvalidVersion.
+        """
+        self.versionInfo = versionInfo
+        self.version = bareos.util.Version(versionInfo["version"]).as_python_version()
+        self.parsedVersion = parse_version(self.version)
+        self.features = {
+            name: self.supports(minVersion) for name, minVersion in FEATURES.items()
+        }
+
+    def supports(self, minVersion):
+        """
+        True, if the director has at least version minVersion.
+        """
+        return self.parsedVersion >= parse_version(minVersion)
+
+    def as_dict(self):
+        return {"version": self.version, "features": self.features}
@@ -0,0 +1,157 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import asyncio
+
+
+class JobFeed(object):
+    """
+    Shared poller of the running jobs of a director.
+
+    All subscribers share one polling loop,
+    so the director is queried once per interval,
+    independent of the number of subscribers.
+    The loop runs only while there are subscribers.
+
+    Subscribers get events as (event, data) tuples from their queue:
+
+    - ("snapshot", [jobs]): all running jobs, sent first
+      and again if the subscriber could not keep up with the events
+    - ("started", job): a job is running
+    - ("updated", job): the record of a running job has changed
+    - ("finished", job): a job is not running anymore (with its final record)
+    - ("error", {"message": ...}): polling failed. The feed is closed afterwards.
+
+    None marks the end of the feed.
+    """
+
+    def __init__(self, list_running, list_jobs, interval=2, queue_size=100):
+        """
+        list_running: coroutine function returning the list of running jobs.
+        list_jobs: coroutine function (list of jobids),
+        returning the list of the job records, used for finished jobs.
+        """
+        self.list_running = list_running
+        self.list_jobs = list_jobs
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscribers = set()
+        # jobid -> job record of the running jobs, None before the first poll
+        self.jobs = None
+        self.task = None
+        self.polls = 0
+
+    def subscribe(self):
+        """
+        Returns a new subscriber queue. Must be released by unsubscribe.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        if self.jobs is not None:
+            queue.put_nowait(("snapshot", list(self.jobs.values())))
+        self.subscribers.add(queue)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, events):
+        for queue in list(self.subscribers):
+            if queue.qsize() + len(events) > self.queue_size:
+                # the subscriber is too slow,
+                # replace its outstanding events by the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", list(self.jobs.values())))
+            else:
+                for event in events:
+                    queue.put_nowait(event)
+
+    async def poll(self):
+        """
+        Query the running jobs once and publish the changes.
+        """
+        running = await self.list_running()
+        self.polls += 1
+        jobs = {job["jobid"]: job for job in running}
+        if self.jobs is None:
+            self.jobs = jobs
+            self.publish([("snapshot", list(jobs.values()))])
+            return
+        events = []
+        for jobid, job in jobs.items():
+            if jobid not in self.jobs:
+                events.append(("started", job))
+            elif job != self.jobs[jobid]:
+                events.append(("updated", job))
+        finished = [jobid for jobid in self.jobs if jobid not in jobs]
+        if finished:
+            records = {
+                job["jobid"]: job
+                for job in await self.list_jobs([int(jobid) for jobid in finished])
+            }
+            for jobid in finished:
+                events.append(("finished", records.get(jobid, self.jobs[jobid])))
+        self.jobs = jobs
+        if events:
+            self.publish(events)
+
+    async def run(self):
+        """
+        Poll every interval seconds, while there are subscribers.
+        """
+        try:
+            while self.subscribers:
+                try:
+                    await self.poll()
+                except Exception as e:
+                    self.close(("error", {"message": str(e)}))
+                    break
+                await asyncio.sleep(self.interval)
+        finally:
+            # after close(), a new subscriber might have started a new loop
+            if self.task is asyncio.current_task():
+                self.task = None
+                self.jobs = None
+
+    def close(self, event=None):
+        """
+        End the feed of all subscribers, optionally after sending event.
+        """
+        subscribers = list(self.subscribers)
+        self.subscribers.clear()
+        for queue in subscribers:
+            # the end of the feed must always fit into the queue
+            while queue.qsize() >= self.queue_size - 1:
+                queue.get_nowait()
+            if event is not None:
+                queue.put_nowait(event)
+            queue.put_nowait(None)
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
+            self.task = None
+            self.jobs = None
+
+    def metrics(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "runningJobs": len(self.jobs or {}),
+            "polls": self.polls,
+        }
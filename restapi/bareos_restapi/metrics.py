@@ -0,0 +1,359 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Metrics in the Prometheus text format
+and timings of the current request (Server-Timing header).
+
+Metrics are only updated by the event loop, therefore no locking is done.
+"""
+
+import bisect
+from contextvars import ContextVar
+import time
+
+from bareos.bsock import AsyncDirectorConsoleJson, AsyncDirectorConsolePool
+from bareos.bsock.directorconsolejson import DirectorConsoleJson
+import bareos.exceptions
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+# Timings (name -> seconds) of the current request, None outside of requests.
+requestTimings = ContextVar("requestTimings", default=None)
+
+
+def add_request_timing(name, seconds):
+    timings = requestTimings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing(timings):
+    """
+    Value of the Server-Timing header for timings.
+    """
+    return ", ".join(
+        "%s;dur=%.3f" % (name, seconds * 1000) for name, seconds in timings.items()
+    )
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    labels = list(zip(names, values)) + list(extra)
+    if not labels:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (name, escape(v)) for name, v in labels)
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> value
+        self.values = {}
+
+    def expose(self):
+        lines = [
+            "# HELP %s %s" % (self.name, self.documentation),
+            "# TYPE %s %s" % (self.name, self.type),
+        ]
+        lines += self.samples()
+        return lines
+
+    def samples(self):
+        return [
+            "%s%s %s" % (self.name, format_labels(self.labelnames, labels), value)
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Gauge, either set directly or read by function when exposed.
+    function returns the value or,
+    for gauges with labels, a dict of label values -> value.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super(Gauge, self).__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def samples(self):
+        if self.function is not None:
+            values = self.function()
+            self.values = values if isinstance(values, dict) else {(): values}
+        return super(Gauge, self).samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        if labels not in self.values:
+            # counts per bucket (not cumulative), +Inf, sum
+            self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts, total = self.values[labels]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values[labels][1] = total + value
+
+    def samples(self):
+        lines = []
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    "%s_bucket%s %d"
+                    % (
+                        self.name,
+                        format_labels(self.labelnames, labels, [("le", bound)]),
+                        cumulative,
+                    )
+                )
+            labelString = format_labels(self.labelnames, labels)
+            lines.append("%s_sum%s %s" % (self.name, labelString, total))
+            lines.append("%s_count%s %d" % (self.name, labelString, cumulative))
+        return lines
+
+
+class Registry(object):
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def expose(self):
+        """
+        All metrics in the Prometheus text format.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines += metric.expose()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+requestsInFlight = registry.register(
+    Gauge("bareos_restapi_requests_in_flight", "Requests currently processed.")
+)
+requestDuration = registry.register(
+    Histogram(
+        "bareos_restapi_request_duration_seconds",
+        "Duration of requests by endpoint.",
+        ("method", "endpoint", "status"),
+    )
+)
+authDuration = registry.register(
+    Histogram(
+        "bareos_restapi_auth_duration_seconds",
+        "Duration of the validation of access tokens.",
+    )
+)
+serializeDuration = registry.register(
+    Histogram(
+        "bareos_restapi_serialize_duration_seconds",
+        "Duration of the JSON encoding of responses.",
+    )
+)
+directorCommandDuration = registry.register(
+    Histogram(
+        "bareos_restapi_director_command_duration_seconds",
+        "Duration of director commands (round trip, without parsing the result).",
+        ("verb",),
+    )
+)
+directorParseDuration = registry.register(
+    Histogram(
+        "bareos_restapi_director_parse_duration_seconds",
+        "Duration of parsing director results.",
+        ("verb",),
+    )
+)
+directorReceivedBytes = registry.register(
+    Counter(
+        "bareos_restapi_director_received_bytes_total",
+        "Bytes of director results.",
+        ("verb",),
+    )
+)
+directorErrors = registry.register(
+    Counter(
+        "bareos_restapi_director_errors_total",
+        "Director commands failed with an error.",
+        ("verb",),
+    )
+)
+poolWaitDuration = registry.register(
+    Histogram(
+        "bareos_restapi_pool_wait_duration_seconds",
+        "Time waiting for a director connection of the pool of a user.",
+    )
+)
+
+
+def observe_auth(seconds):
+    authDuration.observe(seconds)
+    add_request_timing("auth", seconds)
+
+
+def observe_serialization(seconds):
+    serializeDuration.observe(seconds)
+    add_request_timing("serialize", seconds)
+
+
+def command_verb(command):
+    if isinstance(command, list):
+        command = " ".join(command)
+    return command.split(" ", 1)[0]
+
+
+class InstrumentedDirectorConsole(AsyncDirectorConsoleJson):
+    """
+    Director connection recording the timing and size of command results.
+    """
+
+    async def _call_timed(self, command):
+        verb = command_verb(command)
+        start = time.perf_counter()
+        try:
+            resultstring = await super(AsyncDirectorConsoleJson, self).call(command)
+        except BaseException:
+            directorErrors.inc((verb,))
+            raise
+        duration = time.perf_counter() - start
+        directorCommandDuration.observe(duration, (verb,))
+        directorReceivedBytes.inc((verb,), len(resultstring or b""))
+        add_request_timing("director", duration)
+        return verb, resultstring
+
+    def _parse_timed(self, verb, parse, resultstring):
+        start = time.perf_counter()
+        try:
+            return parse(resultstring)
+        except bareos.exceptions.Error:
+            directorErrors.inc((verb,))
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            directorParseDuration.observe(duration, (verb,))
+            add_request_timing("parse", duration)
+
+    @staticmethod
+    def _parse(resultstring):
+        return DirectorConsoleJson._get_result(
+            DirectorConsoleJson._parse_fullresult(resultstring)
+        )
+
+    async def call(self, command):
+        verb, resultstring = await self._call_timed(command)
+        return self._parse_timed(verb, self._parse, resultstring)
+
+    async def call_raw(self, command):
+        verb, resultstring = await self._call_timed(command)
+        return self._parse_timed(
+            verb, DirectorConsoleJson._get_raw_result, resultstring
+        )
+
+    async def call_many(self, commands, return_exceptions=False):
+        """
+        The commands are pipelined, so their round trips overlap.
+        Every command is recorded with its share of the total duration.
+        """
+        verbs = [command_verb(command) for command in commands]
+        start = time.perf_counter()
+        try:
+            resultstrings = await super(AsyncDirectorConsoleJson, self).call_many(
+                commands
+            )
+        except BaseException:
+            for verb in verbs:
+                directorErrors.inc((verb,))
+            raise
+        duration = time.perf_counter() - start
+        for verb, resultstring in zip(verbs, resultstrings):
+            directorCommandDuration.observe(duration / len(verbs), (verb,))
+            directorReceivedBytes.inc((verb,), len(resultstring or b""))
+        add_request_timing("director", duration)
+        results = []
+        for verb, resultstring in zip(verbs, resultstrings):
+            try:
+                results.append(self._parse_timed(verb, self._parse, resultstring))
+            except bareos.exceptions.JsonRpcErrorReceivedException as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+
+class InstrumentedDirectorConsolePool(AsyncDirectorConsolePool):
+    """
+    Pool of director connections recording the time waiting for a connection.
+    """
+
+    async def checkout(self, timeout=-1):
+        start = time.perf_counter()
+        try:
+            return await super(InstrumentedDirectorConsolePool, self).checkout(timeout)
+        finally:
+            duration = time.perf_counter() - start
+            poolWaitDuration.observe(duration)
+            add_request_timing("pool", duration)
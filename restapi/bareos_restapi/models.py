@@ -1,6 +1,6 @@
 #   BAREOS - Backup Archiving REcovery Open Sourced
 #
-#   Copyright (C) 2020-2023 Bareos GmbH & Co. KG
+#   Copyright (C) 2020-2024 Bareos GmbH & Co. KG
 #
 #   This program is Free Software; you can redistribute it and/or
 #   modify it under the terms of version three of the GNU Affero General Public
@@ -20,7 +20,7 @@
 from pydantic import BaseModel, Field, PositiveInt
 from enum import Enum
 import pathlib
-from typing import Optional, List
+from typing import Optional, List, Dict
 from typing_extensions import Annotated
 from fastapi import Depends, FastAPI, HTTPException, status, Response, Path, Body, Query
 
@@ -32,6 +32,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    director: Optional[str] = None
 
 
 class User(BaseModel):
@@ -83,6 +84,18 @@ class bareosReplaceOption(str, Enum):
         return self.name
 
 
+class streamFormat(str, Enum):
+    """
+    Formats of streamed lists
+    """
+
+    ndjson = "ndjson"
+    json = "json"
+
+    def __str__(self):
+        return self.name
+
+
 # TODO: define this. Samples: "20 days" or "1 months"
 bareosTime = Annotated[str, Field()]
 bareosSpeed = Annotated[str, Field()]
@@ -640,3 +653,77 @@ class jobQuery(BaseModel):
     hours: Optional[int] = Field(
         None, title="Query jobs run max hours ago", gt=1, example=12
     )
+
+
+class bulkJobSelection(BaseModel):
+    """
+    Jobs for bulk operations, given by ID and/or selected by a query
+    """
+
+    jobids: Optional[List[int]] = Field(None, title="Job IDs", example=[1, 2, 3])
+    query: Optional[jobQuery] = Field(None, title="Select jobs matching this query")
+
+
+class bulkVolumeSelection(BaseModel):
+    """
+    Volumes for bulk operations, given by name and/or selected by pool and properties
+    """
+
+    volumes: Optional[List[str]] = Field(
+        None, title="Volume names", example=["Full-0001", "Full-0002"]
+    )
+    pool: Optional[str] = Field(
+        None, title="Select volumes of this pool", example="Full"
+    )
+    filter: Optional[Dict[str, str]] = Field(
+        None,
+        title="Select volumes with these properties (as returned by llist volumes, values are compared case insensitive)",
+        example={"volstatus": "Used", "mediatype": "File"},
+    )
+
+
+class volumeBulkUpdate(bulkVolumeSelection):
+    properties: volumeProperties = Field(..., title="Volume properties to set")
+
+
+class volumeBulkRelabelItem(volumeRelabelDef):
+    oldvolume: str = Field(..., title="Old Volume Name to relabel", example="Full-1742")
+
+
+class volumeBulkRelabel(BaseModel):
+    relabels: List[volumeBulkRelabelItem] = Field(..., title="Volumes to relabel")
+
+
+class volumeBulkMove(BaseModel):
+    moves: List[volumeMove] = Field(..., title="Move operations")
+
+
+class bvfsRestore(BaseModel):
+    """
+    Files and directories selected by BVFS browsing, to be restored
+    """
+
+    jobids: List[int] = Field(
+        ...,
+        title="Job IDs of the browsed backup (see .bvfs_get_jobids)",
+        example=[1, 2],
+    )
+    fileid: Optional[List[int]] = Field(
+        None, title="FileIds of files to restore", example=[12, 13]
+    )
+    dirid: Optional[List[int]] = Field(
+        None, title="PathIds of directories to restore", example=[3]
+    )
+    hardlink: Optional[List[int]] = Field(
+        None, title="JobId, FileIndex pairs of hard links to restore"
+    )
+    client: str = Field(..., title="Restore data from this client")
+    restoreclient: Optional[str] = Field(None, title="Restore data to this client")
+    restorejob: Optional[str] = Field(None, title="Restore job to use")
+    where: Optional[str] = Field(
+        None, title="Filesystem prefix. Use _/_ for original location", example="/"
+    )
+    replace: Optional[bareosReplaceOption] = Field(
+        None, title="Set file-replace options", example="ifnewer"
+    )
+    pluginoptions: Optional[str] = Field(None, title="")
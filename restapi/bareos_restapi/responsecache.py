@@ -0,0 +1,105 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+
+class CacheEntry(object):
+    def __init__(self, value, expires):
+        self.value = value
+        self.expires = expires
+        self._etag = None
+
+    @property
+    def etag(self):
+        """
+        Hash of the value, computed on first use,
+        as only some users of the cache send an ETag header.
+        """
+        if self._etag is None:
+            digest = hashlib.sha1(
+                json.dumps(self.value, sort_keys=True).encode("utf-8")
+            )
+            self._etag = '"%s"' % digest.hexdigest()
+        return self._etag
+
+
+class ResponseCache(object):
+    """
+    Thread-safe LRU cache of director results with a time to live (in seconds).
+    A ttl or max_size of 0 disables the cache.
+    """
+
+    def __init__(self, ttl=60, max_size=1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # incremented by invalidate(),
+        # to drop results requested before the invalidation
+        self.generation = 0
+
+    def get(self, key):
+        """
+        Returns the CacheEntry for key or None, if not cached or expired.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value, generation=None):
+        """
+        Stores value and returns its CacheEntry.
+        If generation is given (value of self.generation before requesting the value)
+        and the cache has been invalidated since, the value is not stored.
+        """
+        now = time.monotonic()
+        entry = CacheEntry(value, now + self.ttl)
+        if self.ttl > 0 and self.max_size > 0:
+            with self.lock:
+                if generation is None or generation == self.generation:
+                    # get() only removes the expired entry it is asked for,
+                    # so remove all expired entries here
+                    for expiredKey in [
+                        k for k, e in self.entries.items() if e.expires <= now
+                    ]:
+                        del self.entries[expiredKey]
+                    self.entries[key] = entry
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        """
+        Removes all entries, e.g. after the director configuration has changed.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
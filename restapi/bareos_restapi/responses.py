@@ -0,0 +1,102 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import json
+import re
+import time
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Non-empty JSON object
+RAW_OBJECT_PREFIX = re.compile(rb'\{\s*"')
+# Range information, added as last member to the result of list commands
+# by the Director, when the result has been limited or filtered by ACLs.
+RAW_META_SUFFIX = re.compile(
+    rb',\s*"meta"\s*:\s*\{\s*"range"\s*:\s*\{[^{}]*\}\s*\}\s*\}$'
+)
+
+# Function called with the seconds each encoding took (see metrics.py).
+encodingObserver = None
+
+
+def dumps(content):
+    """
+    Encodes content as JSON (bytes), using orjson, if available.
+    """
+    start = time.perf_counter()
+    if orjson is not None:
+        data = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    if encodingObserver is not None:
+        encodingObserver(time.perf_counter() - start)
+    return data
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded by orjson, if available.
+
+    The content must only consist of JSON types (as director results do).
+    When returned by an endpoint,
+    the content is not converted by FastAPI's jsonable_encoder.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """
+    Response with content, that is already encoded as JSON.
+    """
+
+    media_type = "application/json"
+
+    @classmethod
+    def from_director_result(cls, rawResult, fields, **kwargs):
+        """
+        Response containing fields
+        followed by the members of a director result object (see call_raw),
+        without decoding the result.
+        The range information of list results (member "meta") is removed.
+
+        Returns None, if rawResult is not a non-empty JSON object.
+        """
+        if not RAW_OBJECT_PREFIX.match(rawResult):
+            return None
+        end = len(rawResult)
+        # the range information is small, only search the end of the result
+        match = RAW_META_SUFFIX.search(rawResult, max(0, end - 256))
+        if match:
+            end = match.start()
+        content = dumps(fields)[:-1]
+        if content != b"{":
+            content += b","
+        parts = [content, memoryview(rawResult)[1:end]]
+        if match:
+            parts.append(b"}")
+        return cls(b"".join(parts), **kwargs)
@@ -0,0 +1,158 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+import asyncio
+import hmac
+import time
+
+
+class Session(object):
+    def __init__(self, user, expires):
+        self.user = user
+        self.last_used = time.monotonic()
+        # wall clock time, after which all access tokens of this session are expired
+        self.expires = expires
+
+    def matches(self, password):
+        return hmac.compare_digest(
+            self.user.password.encode("utf-8"), password.encode("utf-8")
+        )
+
+
+class SessionManager(object):
+    """
+    Director sessions of the logged in users.
+
+    A session is a user object with a pool of director connections
+    (attribute directorPool).
+    Logins of a user with the same password reuse the session,
+    instead of connecting to the director again.
+    Sessions are closed, when they are replaced by a login with another password,
+    when they have not been used for idle_timeout seconds
+    or when all access tokens issued for them are expired.
+    """
+
+    def __init__(self, connect, idle_timeout=1800):
+        """
+        connect: coroutine function (username, password),
+        returning a new user object with an opened directorPool.
+        It raises an exception, if the login is not accepted by the director.
+        """
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.logins = 0
+        self.reused = 0
+        self.replaced = 0
+        self.expired = 0
+
+    def get(self, username):
+        """
+        Returns the user object of the session or None.
+        """
+        session = self.sessions.get(username)
+        if session is None:
+            return None
+        session.last_used = time.monotonic()
+        return session.user
+
+    async def login(self, username, password, expires):
+        """
+        Returns the user object of the session for username,
+        reusing the existing session, if the password matches.
+
+        expires: wall clock time, when the access token of this login expires.
+        """
+        self.logins += 1
+        session = self.sessions.get(username)
+        if (
+            session is not None
+            and session.matches(password)
+            and not session.user.directorPool.closed
+        ):
+            self.reused += 1
+            session.last_used = time.monotonic()
+            session.expires = max(session.expires, expires)
+            return session.user
+
+        user = await self.connect(username, password)
+        # the previous session might have been replaced while connecting
+        previous = self.sessions.get(username)
+        self.sessions[username] = Session(user, expires)
+        if previous is not None:
+            self.replaced += 1
+            # connections still in use are closed when they are returned
+            await previous.user.directorPool.close()
+        return user
+
+    async def close_idle(self):
+        """
+        Close sessions not used for idle_timeout seconds
+        or without valid access tokens,
+        and idle connections of the remaining sessions.
+
+        Returns the number of closed sessions.
+        """
+        now = time.monotonic()
+        expired = [
+            username
+            for username, session in self.sessions.items()
+            if (
+                self.idle_timeout is not None
+                and now - session.last_used > self.idle_timeout
+            )
+            or time.time() > session.expires
+        ]
+        # remove all before closing, as logins can happen while closing
+        expired = [self.sessions.pop(username) for username in expired]
+        self.expired += len(expired)
+        for session in expired:
+            await session.user.directorPool.close()
+        for session in list(self.sessions.values()):
+            await session.user.directorPool.evict_idle()
+        return len(expired)
+
+    async def run(self, interval=60):
+        """
+        Call close_idle every interval seconds, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.close_idle()
+
+    async def close(self):
+        """
+        Close all sessions.
+        """
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        for session in sessions:
+            await session.user.directorPool.close()
+
+    def metrics(self):
+        pools = [session.user.directorPool for session in self.sessions.values()]
+        return {
+            "sessions": len(pools),
+            "connections": sum(pool.size for pool in pools),
+            "idleConnections": sum(len(pool.idle) for pool in pools),
+            "logins": self.logins,
+            "reusedSessions": self.reused,
+            "replacedSessions": self.replaced,
+            "expiredSessions": self.expired,
+        }
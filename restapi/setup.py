@@ -75,7 +75,6 @@ setup(
     install_requires=[
         "fastapi",
         "packaging",
-        "passlib",
         "pydantic",
         "python-bareos",
         "python-jose",
@@ -84,6 +83,7 @@ setup(
         "pyyaml",
         "uvicorn",
     ],
+    extras_require={"orjson": ["orjson"]},
     classifiers=[
         "Development Status :: 3 - Alpha",
         "License :: OSI Approved :: GNU Affero General Public License v3",
@@ -23,3 +23,5 @@
 
 from bareos_unittest.base import Base
 from bareos_unittest.json import Json
+from bareos_unittest.fakesocket import FakeSocket
+from bareos_unittest.fakedirector import FakeDirector
@@ -0,0 +1,236 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Minimal Bareos Director console server for tests without a running Bareos Director.
+"""
+
+import asyncio
+import json
+import struct
+import threading
+
+from bareos.bsock.constants import Constants
+from bareos.bsock.protocolmessages import ProtocolMessages
+from bareos.util.password import Password
+
+
+class FakeDirector(object):
+    """Minimal Bareos Director console server.
+
+    It authenticates consoles (plain connections only),
+    and answers commands from a dictionary of JSON results.
+    Commands not found in the dictionary are answered with a JSON-RPC error.
+
+    Example:
+       >>> director = FakeDirector(password="secret", results={"list jobs": {"jobs": []}})
+       >>> port = director.start()
+       >>> console = bareos.bsock.DirectorConsoleJson(port=port, password="secret", tls_psk_enable=False)
+       >>> director.stop()
+    """
+
+    def __init__(self, password="secret", results=None, delay=0, name="bareos-dir"):
+        """\
+
+        Args:
+           password (str): Password of the consoles.
+           results (dict or callable):
+              Command -> result (dict or callable returning a dict),
+              or a callable returning the result for a command.
+              A result of None is answered as invalid command.
+           delay (float): Seconds to wait, before answering a command.
+           name (str): Name of the Director.
+        """
+        self.password = Password(password)
+        self.results = results if results is not None else {}
+        self.delay = delay
+        self.name = name
+        self.commands = []
+        self.connections = 0
+        # writer -> task of the connected clients
+        self.clients = {}
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.port = None
+
+    @staticmethod
+    def message(payload):
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = bytearray(payload, "utf-8")
+        return struct.pack("!i", len(payload)) + bytes(payload)
+
+    @staticmethod
+    def signal(signal=Constants.BNET_EOD):
+        return struct.pack("!i", signal)
+
+    @staticmethod
+    async def recv(reader):
+        header = struct.unpack("!i", await reader.readexactly(4))[0]
+        if header <= 0:
+            return header
+        return await reader.readexactly(header)
+
+    def get_result(self, command):
+        result = None
+        if callable(self.results):
+            result = self.results(command)
+        elif command in self.results:
+            result = self.results[command]
+            if callable(result):
+                result = result(command)
+        if result is not None:
+            return {"jsonrpc": "2.0", "id": None, "result": result}
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {
+                "code": 1,
+                "message": "failed",
+                "data": {
+                    "result": {},
+                    "messages": {
+                        "error": ["{}: is an invalid command.\n".format(command)]
+                    },
+                },
+            },
+        }
+
+    async def authenticate(self, reader, writer):
+        password = self.password.md5()
+        hello = await self.recv(reader)
+        # the director verifies the console
+        (chal, msg) = ProtocolMessages.cram_md5_challenge(self.name)
+        writer.write(self.message(msg))
+        response = await self.recv(reader)
+        if response != ProtocolMessages.cram_md5_hash(
+            password, bytearray(chal, "utf-8")
+        ):
+            writer.write(self.message(ProtocolMessages.auth_failed()))
+            return False
+        writer.write(self.message(ProtocolMessages.auth_ok()))
+        # the console verifies the director
+        challenge = await self.recv(reader)
+        chal = challenge.split(b" ")[2]
+        writer.write(self.message(ProtocolMessages.cram_md5_hash(password, chal)))
+        if await self.recv(reader) != ProtocolMessages.auth_ok():
+            return False
+        writer.write(self.message("1000 OK: {} Version: 24.0.0\n".format(self.name)))
+        if b"calling version" in hello:
+            writer.write(self.message("1002 You are logged in as: console\n"))
+        await writer.drain()
+        return True
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.clients[writer] = asyncio.current_task()
+        api = 0
+        try:
+            if not await self.authenticate(reader, writer):
+                return
+            while True:
+                data = await self.recv(reader)
+                if isinstance(data, int):
+                    continue
+                command = data.decode("utf-8")
+                self.commands.append(command)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                if command.startswith(".api"):
+                    api = 0 if command.split()[1] in ["0", "off"] else 2
+                    response = {"jsonrpc": "2.0", "id": None, "result": {"api": api}}
+                elif api:
+                    response = self.get_result(command)
+                else:
+                    response = None
+                if response is None:
+                    writer.write(self.message("{}: ok\n".format(command)))
+                else:
+                    writer.write(
+                        self.message(json.dumps(response, separators=(",", ":")))
+                    )
+                # like the Director: in API mode,
+                # the end of a result is indicated by the prompt
+                # for the next command.
+                if api:
+                    writer.write(self.signal(Constants.BNET_MAIN_PROMPT))
+                else:
+                    writer.write(self.signal(Constants.BNET_EOD))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            self.clients.pop(writer, None)
+            writer.close()
+
+    async def start_server(self, address="127.0.0.1", port=0):
+        """Start the server in the running event loop.
+
+        Returns:
+           int: The port the server is listening on.
+        """
+        self.server = await asyncio.start_server(self.handle, address, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    def start(self, address="127.0.0.1", port=0):
+        """Start the server in a background thread.
+
+        Returns:
+           int: The port the server is listening on.
+        """
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.start_server(address, port))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+        return self.port
+
+    async def disconnect_clients(self):
+        """Close all client connections, like a restarted Director."""
+        tasks = list(self.clients.values())
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stop_server(self):
+        """Stop the server and close all client connections."""
+        self.server.close()
+        await self.disconnect_clients()
+
+    def disconnect(self):
+        """Close all client connections of a server started by :py:func:`start`."""
+        asyncio.run_coroutine_threadsafe(self.disconnect_clients(), self.loop).result()
+
+    def stop(self):
+        """Stop a server started by :py:func:`start`."""
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.stop_server(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
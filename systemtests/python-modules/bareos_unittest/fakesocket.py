@@ -0,0 +1,85 @@
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Replay Bareos network data without a running daemon.
+"""
+
+import struct
+
+from bareos.bsock.constants import Constants
+
+
+class FakeSocket(object):
+    """Socket replacement, that replays prerecorded data.
+
+    Data written by the client is collected in ``sent``.
+    """
+
+    def __init__(self, data=b"", max_chunk=65536):
+        self.data = memoryview(bytes(data))
+        self.offset = 0
+        self.max_chunk = max_chunk
+        self.sent = bytearray()
+        self.timeout = None
+
+    @staticmethod
+    def message(payload):
+        """Frame a payload as Bareos network message."""
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = bytearray(payload, "utf-8")
+        return struct.pack("!i", len(payload)) + bytes(payload)
+
+    @staticmethod
+    def signal(signal=Constants.BNET_EOD):
+        """Frame a Bareos signal."""
+        return struct.pack("!i", signal)
+
+    @classmethod
+    def response(cls, payload, chunk_size=65536, signal=Constants.BNET_EOD):
+        """Split payload into Bareos network messages, terminated by a signal."""
+        result = bytearray()
+        for start in range(0, len(payload), chunk_size):
+            result += cls.message(payload[start : start + chunk_size])
+        if signal is not None:
+            result += cls.signal(signal)
+        return bytes(result)
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self, bufsize):
+        length = min(bufsize, self.max_chunk, len(self.data) - self.offset)
+        result = bytes(self.data[self.offset : self.offset + length])
+        self.offset += length
+        return result
+
+    def recv_into(self, buffer, nbytes=0):
+        if not nbytes:
+            nbytes = len(buffer)
+        length = min(nbytes, self.max_chunk, len(self.data) - self.offset)
+        buffer[:length] = self.data[self.offset : self.offset + length]
+        self.offset += length
+        return length
+
+    def sendall(self, data):
+        self.sent += data
+
+    def close(self):
+        pass
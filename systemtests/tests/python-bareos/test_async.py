@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+import unittest
+
+import bareos.bsock
+import bareos.exceptions
+
+import bareos_unittest
+from bareos_unittest import FakeDirector
+
+
+class PythonBareosAsyncTest(bareos_unittest.Base):
+    """
+    Tests the asyncio classes against a fake director.
+    No running Bareos daemon is required.
+    """
+
+    results = {"list jobs": {"jobs": [{"jobid": "1"}, {"jobid": "2"}]}}
+
+    def test_async_login_and_call(self):
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            async with bareos.bsock.AsyncDirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False
+            ) as console:
+                result = await console.call("list jobs")
+                with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                    await console.call("invalid command")
+            await director.stop_server()
+            return result
+
+        result = asyncio.run(run())
+        self.assertEqual(self.results["list jobs"], result)
+
+    def test_async_timeout(self):
+        """
+        If the result does not arrive within recv_timeout,
+        the connection is closed.
+        """
+
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            console = bareos.bsock.AsyncDirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False, recv_timeout=0.2
+            )
+            await console.open()
+            director.delay = 1
+            try:
+                with self.assertRaises(bareos.exceptions.ConnectionLostError):
+                    await console.call("list jobs")
+                self.assertIsNone(console.writer)
+            finally:
+                await console.close()
+                await director.stop_server()
+
+        asyncio.run(run())
+
+    def test_async_slow_command(self):
+        """
+        The connect timeout does not apply to command results.
+        """
+
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            try:
+                async with bareos.bsock.AsyncDirectorConsoleJson(
+                    port=port, password="secret", tls_psk_enable=False, timeout=0.2
+                ) as console:
+                    director.delay = 0.5
+                    return await console.call("list jobs")
+            finally:
+                await director.stop_server()
+
+        self.assertEqual(self.results["list jobs"], asyncio.run(run()))
+
+    def test_async_wrong_password(self):
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            try:
+                with self.assertRaises(bareos.exceptions.AuthenticationError):
+                    await bareos.bsock.AsyncDirectorConsoleJson(
+                        port=port, password="wrong", tls_psk_enable=False
+                    ).open()
+            finally:
+                await director.stop_server()
+
+        asyncio.run(run())
+
+    def test_async_concurrent_sessions(self):
+        """
+        Commands on multiple connections are executed concurrently,
+        commands on the same connection are serialized.
+        """
+        delay = 0.2
+        sessions = 10
+
+        async def run():
+            director = FakeDirector(results=self.results, delay=delay)
+            port = await director.start_server()
+            consoles = [
+                bareos.bsock.AsyncDirectorConsoleJson(
+                    port=port, password="secret", tls_psk_enable=False
+                )
+                for i in range(sessions)
+            ]
+            await asyncio.gather(*[console.open() for console in consoles])
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *[console.call("list jobs") for console in consoles],
+                # two commands on the same connection
+                consoles[0].call("list jobs"),
+            )
+            duration = time.perf_counter() - start
+            await asyncio.gather(*[console.close() for console in consoles])
+            await director.stop_server()
+            return (results, duration)
+
+        results, duration = asyncio.run(run())
+        self.assertEqual(sessions + 1, len(results))
+        for result in results:
+            self.assertEqual(self.results["list jobs"], result)
+        self.assertGreaterEqual(duration, 2 * delay)
+        self.assertLess(duration, sessions * delay)
+
+    def test_async_pool(self):
+        """
+        Concurrent calls on a pool are executed in parallel (up to max_size).
+        """
+        delay = 0.2
+        calls = 8
+
+        async def run():
+            director = FakeDirector(results=self.results, delay=delay)
+            port = await director.start_server()
+            async with bareos.bsock.AsyncDirectorConsolePool(
+                min_size=1,
+                max_size=4,
+                port=port,
+                password="secret",
+                tls_psk_enable=False,
+            ) as pool:
+                self.assertEqual(1, pool.size)
+                start = time.perf_counter()
+                results = await asyncio.gather(
+                    *[pool.call("list jobs") for i in range(calls)]
+                )
+                duration = time.perf_counter() - start
+                self.assertEqual(4, pool.size)
+                self.assertEqual(4, len(pool.idle))
+                with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                    await pool.call("invalid command")
+                self.assertEqual(4, len(pool.idle))
+
+                consoles = [await pool.checkout() for i in range(4)]
+                with self.assertRaises(bareos.exceptions.PoolTimeoutError):
+                    await pool.checkout(timeout=0.1)
+                for console in consoles:
+                    await pool.checkin(console)
+            await director.stop_server()
+            return (results, duration)
+
+        results, duration = asyncio.run(run())
+        for result in results:
+            self.assertEqual(self.results["list jobs"], result)
+        self.assertGreaterEqual(duration, 2 * delay)
+        self.assertLess(duration, calls * delay)
+
+    def test_async_pool_open_failure(self):
+        """
+        If one of the min_size connections fails,
+        the connections established before are closed.
+        """
+        consoles = []
+        closed = []
+
+        class FailingConsole(bareos.bsock.AsyncDirectorConsoleJson):
+            async def open(self):
+                if len(consoles) == 2:
+                    raise bareos.exceptions.ConnectionError("connection refused")
+                await super(FailingConsole, self).open()
+                consoles.append(self)
+
+            async def close(self):
+                closed.append(self)
+                await super(FailingConsole, self).close()
+
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            pool = bareos.bsock.AsyncDirectorConsolePool(
+                min_size=3,
+                max_size=3,
+                console_class=FailingConsole,
+                port=port,
+                password="secret",
+                tls_psk_enable=False,
+            )
+            with self.assertRaises(bareos.exceptions.ConnectionError):
+                async with pool:
+                    pass
+            await director.stop_server()
+            return pool
+
+        pool = asyncio.run(run())
+        self.assertEqual(2, len(consoles))
+        self.assertEqual(consoles, closed)
+        self.assertEqual(0, pool.size)
+        self.assertEqual([], pool.idle)
+
+    def test_async_call_many(self):
+        """
+        Pipelined commands return their results in order,
+        also if they exceed the data sent in advance.
+        """
+        commands = ["list jobid={0} {1}".format(i, "x" * 100) for i in range(2000)]
+
+        async def run():
+            director = FakeDirector(
+                results=lambda command: (
+                    None if command.startswith("invalid") else {"command": command}
+                )
+            )
+            port = await director.start_server()
+            async with bareos.bsock.AsyncDirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False
+            ) as console:
+                results = await console.call_many(commands)
+                errors = await console.call_many(
+                    ["list jobs", "invalid", "list clients"], return_exceptions=True
+                )
+                with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                    await console.call_many(["list jobs", "invalid", "list clients"])
+                # connection is still in sync
+                last = await console.call("list pools")
+            await director.stop_server()
+            return (results, errors, last)
+
+        results, errors, last = asyncio.run(run())
+        self.assertEqual([{"command": command} for command in commands], results)
+        self.assertEqual({"command": "list jobs"}, errors[0])
+        self.assertIsInstance(
+            errors[1], bareos.exceptions.JsonRpcErrorReceivedException
+        )
+        self.assertEqual({"command": "list clients"}, errors[2])
+        self.assertEqual({"command": "list pools"}, last)
+
+    def test_async_call_stream(self):
+        """
+        Results are parsed while they arrive.
+        When the iteration is stopped early,
+        the rest of the result is discarded.
+        """
+        filenames = [{"filename": "/file{0}".format(i)} for i in range(5000)]
+        results = dict(self.results)
+        results["list files jobid=1"] = {"filenames": filenames}
+
+        async def run():
+            director = FakeDirector(results=results)
+            port = await director.start_server()
+            async with bareos.bsock.AsyncDirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False
+            ) as console:
+                items = [
+                    item
+                    async for item in console.call_stream(
+                        "list files jobid=1", batch_size=1000
+                    )
+                ]
+                stream = console.call_stream("list files jobid=1", batch_size=10)
+                async for item in stream:
+                    break
+                await stream.aclose()
+                jobs = await console.call("list jobs")
+                with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                    async for item in console.call_stream("invalid command"):
+                        pass
+                last = await console.call("list jobs")
+            await director.stop_server()
+            return (items, jobs, last)
+
+        items, jobs, last = asyncio.run(run())
+        self.assertEqual(
+            [(("filenames", i), value) for i, value in enumerate(filenames)], items
+        )
+        self.assertEqual(self.results["list jobs"], jobs)
+        self.assertEqual(self.results["list jobs"], last)
+
+    def test_sync_login(self):
+        """
+        The fake director is also usable by the blocking classes.
+        """
+        director = FakeDirector(results=self.results)
+        port = director.start()
+        try:
+            console = bareos.bsock.DirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False
+            )
+            self.assertEqual(self.results["list jobs"], console.call("list jobs"))
+            console.close()
+        finally:
+            director.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
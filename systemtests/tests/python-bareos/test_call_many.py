@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+import unittest
+
+import bareos.bsock
+import bareos.exceptions
+
+import bareos_unittest
+from bareos_unittest import FakeDirector
+
+
+class PythonBareosCallManyTest(bareos_unittest.Base):
+    """
+    Tests pipelining commands against a fake director.
+    No running Bareos daemon is required.
+    """
+
+    def setUp(self):
+        super(PythonBareosCallManyTest, self).setUp()
+        self.director = FakeDirector(results=self.get_result)
+        self.port = self.director.start()
+        self.console = bareos.bsock.DirectorConsoleJson(
+            port=self.port, password="secret", tls_psk_enable=False
+        )
+
+    @staticmethod
+    def get_result(command):
+        if command.startswith("invalid"):
+            return None
+        return {"command": command}
+
+    def tearDown(self):
+        self.console.close()
+        self.director.stop()
+        super(PythonBareosCallManyTest, self).tearDown()
+
+    def test_order(self):
+        commands = ["list jobid={0}".format(i) for i in range(20)]
+        results = self.console.call_many(commands)
+        self.assertEqual([{"command": command} for command in commands], results)
+
+    def test_more_than_window(self):
+        # more command data than sent in advance
+        commands = ["list jobid={0} {1}".format(i, "x" * 100) for i in range(2000)]
+        results = self.console.call_many(commands)
+        self.assertEqual([{"command": command} for command in commands], results)
+
+    def test_errors(self):
+        commands = ["list jobs", "invalid", "list clients"]
+        results = self.console.call_many(commands, return_exceptions=True)
+        self.assertEqual({"command": "list jobs"}, results[0])
+        self.assertIsInstance(
+            results[1], bareos.exceptions.JsonRpcErrorReceivedException
+        )
+        self.assertEqual({"command": "list clients"}, results[2])
+
+        with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+            self.console.call_many(commands)
+        # connection is still in sync
+        self.assertEqual({"command": "list pools"}, self.console.call("list pools"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import unittest
+
+import bareos.bsock
+from bareos.bsock.directorconsolejson import DirectorConsoleJson
+import bareos.exceptions
+
+import bareos_unittest
+from bareos_unittest import FakeDirector
+
+
+class PythonBareosCallRawTest(bareos_unittest.Base):
+    """
+    Tests receiving undecoded results against a fake director.
+    No running Bareos daemon is required.
+    """
+
+    results = {"list jobs": {"jobs": [{"jobid": "1", "job": 'backup "}'}]}}
+
+    def test_call_raw(self):
+        director = FakeDirector(results=self.results)
+        port = director.start()
+        console = bareos.bsock.DirectorConsoleJson(
+            port=port, password="secret", tls_psk_enable=False
+        )
+        try:
+            raw = console.call_raw("list jobs")
+            self.assertIsInstance(raw, bytes)
+            self.assertEqual(self.results["list jobs"], json.loads(raw))
+            with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                console.call_raw("invalid command")
+        finally:
+            console.close()
+            director.stop()
+
+    def test_async_call_raw(self):
+        async def run():
+            director = FakeDirector(results=self.results)
+            port = await director.start_server()
+            async with bareos.bsock.AsyncDirectorConsoleJson(
+                port=port, password="secret", tls_psk_enable=False
+            ) as console:
+                raw = await console.call_raw("list jobs")
+                with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                    await console.call_raw("invalid command")
+            await director.stop_server()
+            return raw
+
+        self.assertEqual(self.results["list jobs"], json.loads(asyncio.run(run())))
+
+    def test_result_layouts(self):
+        result = {"clients": [{"name": "client-fd"}]}
+        # compact (as sent by the Director), indented and other member orders
+        for envelope in [
+            b'{"jsonrpc":"2.0","id":null,"result":{"clients":[{"name":"client-fd"}]}}',
+            json.dumps({"jsonrpc": "2.0", "id": None, "result": result}, indent=2),
+            json.dumps({"result": result, "jsonrpc": "2.0", "id": None}),
+        ]:
+            if isinstance(envelope, str):
+                envelope = envelope.encode("utf-8")
+            raw = DirectorConsoleJson._get_raw_result(bytearray(envelope))
+            self.assertEqual(result, json.loads(raw))
+
+
+if __name__ == "__main__":
+    unittest.main()
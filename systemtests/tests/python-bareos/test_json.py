@@ -102,6 +102,29 @@ class PythonBareosJsonBackendTest(bareos_unittest.Json):
         logger.debug(str(result))
         self.assertEqual(username, result["whoami"])
 
+    def test_json_call_many(self):
+        username = self.get_operator_username()
+        password = self.get_operator_password(username)
+
+        director = bareos.bsock.DirectorConsoleJson(
+            address=self.director_address,
+            port=self.director_port,
+            name=username,
+            password=password,
+            **self.director_extra_options
+        )
+        whoami, invalid, clients = director.call_many(
+            ["whoami", "invalidcommand", "list clients"], return_exceptions=True
+        )
+        self.assertEqual(username, whoami["whoami"])
+        self.assertIsInstance(invalid, bareos.exceptions.JsonRpcErrorReceivedException)
+        self.assertEqual(director.call("list clients"), clients)
+
+        with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+            director.call_many(["whoami", "invalidcommand", "whoami"])
+        # all results have been received, so the connection is still usable
+        self.assertEqual(username, director.call("whoami")["whoami"])
+
     @unittest.skip("Most commands do return valid JSON")
     def test_json_backend_with_invalid_json_output(self):
         logger = logging.getLogger()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import unittest
+
+import bareos.bsock
+from bareos.bsock.lowlevel import LowLevel
+import bareos.exceptions
+from bareos.util.jsonstream import JsonStreamParser
+
+import bareos_unittest
+from bareos_unittest import FakeSocket
+
+
+class PythonBareosJsonStreamTest(bareos_unittest.Base):
+    """
+    Tests the incremental result processing
+    by replaying data through a fake socket.
+    No running Bareos daemon is required.
+    """
+
+    result = {
+        "jsonrpc": "2.0",
+        "id": None,
+        "result": {
+            "filenames": [
+                {"filename": "/etc/passwd"},
+                {"filename": '/tmp/äöü "quoted" [x], {y}'},
+                {"filename": "/var/log/messages", "size": 12345678},
+            ],
+            "volumes": {"Full": [{"volumename": "Full-0001"}], "Incremental": []},
+            "meta": {"range": {"limit": 1000, "offset": 0}},
+            "count": 3,
+            "empty": {},
+            "flags": [True, False, None, 1.5e3],
+        },
+    }
+
+    @staticmethod
+    def split(data, size):
+        return [data[i : i + size] for i in range(0, len(data), size)]
+
+    @staticmethod
+    def get_director(data):
+        director = bareos.bsock.DirectorConsoleJson.__new__(
+            bareos.bsock.DirectorConsoleJson
+        )
+        LowLevel.__init__(director)
+        director.socket = FakeSocket(data)
+        return director
+
+    def test_parser_chunk_sizes(self):
+        data = json.dumps(self.result).encode("utf-8")
+        expected = list(JsonStreamParser([data]))
+        for size in [1, 2, 3, 7, 64]:
+            self.assertEqual(expected, list(JsonStreamParser(self.split(data, size))))
+
+        filenames = [
+            value for path, value in expected if path[:2] == ("result", "filenames")
+        ]
+        self.assertEqual(self.result["result"]["filenames"], filenames)
+
+    def test_parser_reassemble(self):
+        data = json.dumps(self.result, indent=2).encode("utf-8")
+        reassembled = {}
+        for path, value in JsonStreamParser(self.split(data, 5)):
+            JsonStreamParser.set_path(reassembled, path, value)
+        # empty arrays and objects produce no items
+        expected = copy.deepcopy(self.result)
+        del expected["result"]["volumes"]["Incremental"]
+        del expected["result"]["empty"]
+        self.assertEqual(expected, reassembled)
+
+    def test_parser_invalid(self):
+        for data in [b'{"result": [1, 2', b'{"result": [1 2]}', b'{"a": 1} x']:
+            with self.assertRaises(ValueError):
+                list(JsonStreamParser(self.split(data, 3)))
+
+    def test_call_stream(self):
+        payload = json.dumps(self.result).encode("utf-8")
+        data = FakeSocket.response(payload, chunk_size=10) + FakeSocket.response(
+            b'{"jsonrpc":"2.0","id":null,"result":{"time":"now"}}'
+        )
+        director = self.get_director(data)
+        filenames = []
+        for path, value in director.call_stream("list files jobid=1"):
+            if path[0] == "filenames":
+                filenames.append(value)
+        self.assertEqual(self.result["result"]["filenames"], filenames)
+        self.assertEqual(b"list files jobid=1", director.socket.sent[4:])
+        self.assertEqual({"time": "now"}, director.call("time"))
+
+    def test_call_stream_stop_early(self):
+        """
+        When the iteration is stopped early,
+        the rest of the result must be discarded.
+        """
+        payload = json.dumps(self.result).encode("utf-8")
+        data = FakeSocket.response(payload, chunk_size=10) + FakeSocket.response(
+            b'{"jsonrpc":"2.0","id":null,"result":{"time":"now"}}'
+        )
+        director = self.get_director(data)
+        for path, value in director.call_stream("list files jobid=1"):
+            break
+        self.assertEqual({"time": "now"}, director.call("time"))
+
+    def test_call_stream_error(self):
+        payload = b'{"jsonrpc":"2.0","id":null,"error":{"code":1,"message":"failed","data":{"result":{},"messages":{"error":["INVALIDCOMMAND: is an invalid command.\\n"]}}}}'
+        director = self.get_director(FakeSocket.response(payload, chunk_size=10))
+        with self.assertRaises(
+            bareos.exceptions.JsonRpcErrorReceivedException
+        ) as context:
+            list(director.call_stream("invalid"))
+        self.assertIn("is an invalid command", str(context.exception))
+
+    def test_call_stream_not_an_object(self):
+        for payload in [b"5", b"[1, 2]"]:
+            director = self.get_director(FakeSocket.response(payload))
+            with self.assertRaises(
+                bareos.exceptions.JsonRpcInvalidJsonReceivedException
+            ):
+                list(director.call_stream("list jobs"))
+
+    def test_call_iter_closed_before_start(self):
+        """
+        An iterator closed before the iteration started
+        does not send its command, so no result is left on the connection.
+        """
+        data = FakeSocket.response(
+            b'{"jsonrpc":"2.0","id":null,"result":{"time":"now"}}'
+        )
+        director = self.get_director(data)
+        director.call_iter("list files jobid=1").close()
+        unstarted = director.call_iter("list files jobid=2")
+        del unstarted
+        self.assertEqual({"time": "now"}, director.call("time"))
+        self.assertEqual(b"time", director.socket.sent[4:])
+
+    def test_call_iter(self):
+        payload = b"".join(b"line %i\n" % i for i in range(100))
+        data = FakeSocket.response(payload, chunk_size=15)
+        lowlevel = LowLevel()
+        lowlevel.socket = FakeSocket(data)
+        parts = list(lowlevel.call_iter("list files jobid=1"))
+        self.assertEqual(payload, b"".join(parts))
+        # parts end at line boundaries
+        for part in parts:
+            self.assertTrue(part.endswith(b"\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -240,6 +240,18 @@ class PythonBareosListCommandTest(bareos_unittest.Json):
         )
         self.assertEqual(len(result["jobs"]), 0)
 
+        # keyset pagination: jobs are ordered by JobId
+        result = director.call("list jobs after_jobid=0")
+        jobids = [int(job["jobid"]) for job in result["jobs"]]
+        self.assertEqual(jobids, sorted(jobids))
+        result = director.call("list jobs after_jobid={} limit=1".format(jobids[0]))
+        self.assertEqual([int(job["jobid"]) for job in result["jobs"]], jobids[1:2])
+        # the last JobId read from the catalog (also if filtered by an ACL)
+        self.assertEqual(result["lastjobid"], jobids[1])
+        result = director.call("list jobs after_jobid={}".format(jobids[-1]))
+        self.assertEqual(len(result["jobs"]), 0)
+        self.assertNotIn("lastjobid", result)
+
         # list jobs jobstatus=X
         result = director.call("list jobs jobstatus=T")
         self.assertTrue(result["jobs"])
@@ -463,6 +475,19 @@ class PythonBareosListCommandTest(bareos_unittest.Json):
             mediaid,
         )
 
+        # keyset pagination: volumes are ordered by MediaId
+        after_mediaid = int(mediaid) - 1
+        result = director.call(f"llist volumes all after_mediaid={after_mediaid}")
+        self.assertEqual(result["volumes"][0]["mediaid"], mediaid)
+        result = director.call(
+            f"list volumes pool=Full after_mediaid={after_mediaid} limit=1"
+        )
+        self.assertEqual(
+            [volume["mediaid"] for volume in result["volumes"]],
+            [mediaid],
+        )
+        self.assertEqual(result["lastmediaid"], int(mediaid))
+
     def test_list_pool(self):
         """
         verifying `list pool` and `llist pool ...` outputs correct data
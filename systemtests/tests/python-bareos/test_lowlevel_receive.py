@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import time
+import unittest
+
+from bareos.bsock.constants import Constants
+from bareos.bsock.lowlevel import LowLevel
+
+import bareos_unittest
+from bareos_unittest import FakeSocket
+
+
+class PythonBareosLowLevelReceiveTest(bareos_unittest.Base):
+    """
+    Tests the receive path of LowLevel
+    by replaying data through a fake socket.
+    No running Bareos daemon is required.
+    """
+
+    @staticmethod
+    def get_lowlevel(data, max_chunk=65536):
+        lowlevel = LowLevel()
+        lowlevel.socket = FakeSocket(data, max_chunk=max_chunk)
+        return lowlevel
+
+    def test_recv_bytes_partial_reads(self):
+        payload = bytes(range(256)) * 64
+        lowlevel = self.get_lowlevel(payload, max_chunk=7)
+        result = lowlevel.recv_bytes(len(payload))
+        self.assertEqual(payload, result)
+
+    def test_recv_msg_until_signal(self):
+        payload = b"".join(b"line %i\n" % i for i in range(1000))
+        lowlevel = self.get_lowlevel(FakeSocket.response(payload, chunk_size=100))
+        result = lowlevel.recv_msg()
+        self.assertEqual(payload, result)
+        self.assertEqual(Constants.BNET_EOD, lowlevel.status)
+
+    def test_statistics(self):
+        payload = b"x" * 1000
+        lowlevel = self.get_lowlevel(FakeSocket.response(payload, chunk_size=100))
+        self.assertIsNone(lowlevel.statistics)
+        statistics = lowlevel.enable_statistics()
+        lowlevel.send(bytearray(b"list jobs"))
+        self.assertEqual(payload, lowlevel.recv_msg())
+        self.assertEqual(1, statistics.messages_sent)
+        self.assertEqual(4 + 9, statistics.bytes_sent)
+        self.assertEqual(10, statistics.messages_received)
+        self.assertEqual(1, statistics.signals_received)
+        self.assertEqual(10 * (4 + 100) + 4, statistics.bytes_received)
+        self.assertGreaterEqual(statistics.recv_time, 0)
+        self.assertEqual(
+            statistics.bytes_received, statistics.as_dict()["bytes_received"]
+        )
+        self.assertIsNone(lowlevel.enable_statistics(False))
+
+    def test_no_debug_formatting(self):
+        """
+        Received data is only formatted for logging,
+        when debug logging is enabled.
+        """
+
+        class Unformattable(bytearray):
+            def __str__(self):
+                raise AssertionError("formatted for logging")
+
+        lowlevel = self.get_lowlevel(FakeSocket.response(b"data\n"))
+        lowlevel.recv_bytes = lambda length, timeout=10: Unformattable(
+            LowLevel.recv_bytes(lowlevel, length, timeout)
+        )
+        level = lowlevel.logger.level
+        lowlevel.logger.setLevel(logging.INFO)
+        try:
+            self.assertEqual(b"data\n", lowlevel.recv_msg())
+        finally:
+            lowlevel.logger.setLevel(level)
+
+    def test_recv_msg_until_regex(self):
+        """
+        The end of message regex must also be detected,
+        when the line is split over multiple network messages.
+        The data following the matching line is kept for the next call.
+        """
+        data = (
+            FakeSocket.message(b"some output\n10")
+            + FakeSocket.message(b"00 OK: bareos-dir\n")
+            + FakeSocket.message(b"remaining")
+            + FakeSocket.message(b" data\n")
+            + FakeSocket.signal(Constants.BNET_EOD)
+        )
+        lowlevel = self.get_lowlevel(data)
+        result = lowlevel.recv_msg()
+        self.assertEqual(b"some output\n1000 OK: bareos-dir\n", result)
+        result = lowlevel.recv_msg()
+        self.assertEqual(b"remaining data\n", result)
+
+    def test_recv_msg_single_line(self):
+        """
+        JSON results are a single line.
+        Make sure, they are received completely.
+        """
+        payload = b'{"jsonrpc":"2.0","id":null,"result":{"x":"' + b"a" * 100000 + b'"}}'
+        lowlevel = self.get_lowlevel(FakeSocket.response(payload, chunk_size=1000))
+        result = lowlevel.recv_msg()
+        self.assertEqual(payload, result)
+
+    @unittest.skipUnless(
+        os.environ.get("PYTHON_BAREOS_BENCHMARK"),
+        "set PYTHON_BAREOS_BENCHMARK to run benchmarks",
+    )
+    def test_benchmark_recv_msg(self):
+        """
+        Replay a large director response through a fake socket.
+
+        PYTHON_BAREOS_BENCHMARK_RESPONSE can point to a recorded response
+        (payload only, without network headers).
+        Otherwise PYTHON_BAREOS_BENCHMARK_SIZE (in MB, default 500)
+        of list files like output is generated.
+        """
+        logger = logging.getLogger()
+
+        recorded = os.environ.get("PYTHON_BAREOS_BENCHMARK_RESPONSE")
+        if recorded:
+            with open(recorded, "rb") as f:
+                payload = f.read()
+        else:
+            size = int(os.environ.get("PYTHON_BAREOS_BENCHMARK_SIZE", 500)) * 1000000
+            line = b"/some/backup/directory/with/a/file-name.txt\n"
+            payload = line * (size // len(line))
+        data = FakeSocket.response(payload, chunk_size=65536)
+        lowlevel = self.get_lowlevel(data)
+
+        start = time.perf_counter()
+        result = lowlevel.recv_msg()
+        duration = time.perf_counter() - start
+
+        self.assertEqual(len(payload), len(result))
+        message = "recv_msg: {} bytes in {:.2f}s ({:.1f} MB/s)".format(
+            len(result), duration, len(result) / duration / 1000000
+        )
+        logger.info(message)
+        print(message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+import unittest
+
+from bareos.util import BareosBase64, LStat, LStatColumns
+import bareos.util.lstat
+
+import bareos_unittest
+
+
+class PythonBareosLStatTest(bareos_unittest.Base):
+    """
+    Tests decoding lstat strings.
+    No running Bareos daemon is required.
+    """
+
+    lstat = "gD V2/ IGk B Pp Pp A fB BAA I BmUFaT BmUFaT BmUFaT A A C"
+    expected = {
+        "dev": 2051,
+        "ino": 89535,
+        "mode": 0o100644,
+        "nlink": 1,
+        "uid": 1001,
+        "gid": 1001,
+        "rdev": 0,
+        "size": 1985,
+        "blksize": 4096,
+        "blocks": 8,
+        "atime": 1716541075,
+        "mtime": 1716541075,
+        "ctime": 1716541075,
+        "linkfi": 0,
+        "flags": 0,
+        "data_stream": 2,
+    }
+
+    def get_lstats(self):
+        lstats = [self.lstat]
+        for i in range(1, 1000):
+            values = [self.expected[field] + i for field in LStat.fields]
+            values[1] = -i
+            lstats.append(b" ".join(BareosBase64.to_base64(value) for value in values))
+        return lstats
+
+    def test_decode(self):
+        self.assertEqual(self.expected, LStat.decode(self.lstat))
+        # optional fields missing (older Bareos versions)
+        short = LStat.decode(self.lstat.rsplit(" ", 3)[0])
+        self.assertEqual(0, short["data_stream"])
+        self.assertEqual(self.expected["ctime"], short["ctime"])
+
+    def check_columns(self, use_numpy):
+        lstats = self.get_lstats()
+        columns = LStatColumns(use_numpy=use_numpy)
+        columns.extend(lstats[:10])
+        columns.extend(lstats[10:])
+        self.assertEqual(len(lstats), len(columns))
+        for field in LStat.fields:
+            self.assertEqual(
+                [LStat.decode(lstat)[field] for lstat in lstats],
+                list(columns[field]),
+                field,
+            )
+
+        # rows with different number of fields
+        columns = LStatColumns(fields=["size", "data_stream"], use_numpy=use_numpy)
+        columns.extend([self.lstat, self.lstat.rsplit(" ", 3)[0], "", "B"])
+        self.assertEqual([1985, 1985, 0, 0], list(columns["size"]))
+        self.assertEqual([2, 0, 0, 0], list(columns["data_stream"]))
+        with self.assertRaises(KeyError):
+            columns["mode"]
+
+        # only empty lstats, also a complete batch of them
+        columns = LStatColumns(fields=["size", "mtime"], use_numpy=use_numpy)
+        columns.extend([""] * 5)
+        columns.extend([""] * LStatColumns.numpy_batch_size)
+        columns.extend([self.lstat])
+        rows = 5 + LStatColumns.numpy_batch_size + 1
+        self.assertEqual(rows, len(columns))
+        self.assertEqual([0] * (rows - 1) + [1985], list(columns["size"]))
+        self.assertEqual(
+            [0] * (rows - 1) + [self.expected["mtime"]], list(columns["mtime"])
+        )
+
+    def test_columns_python(self):
+        self.check_columns(use_numpy=False)
+
+    @unittest.skipIf(bareos.util.lstat.numpy is None, "NumPy is not available")
+    def test_columns_numpy(self):
+        self.check_columns(use_numpy=True)
+        columns = LStatColumns(fields=["size"])
+        columns.extend([self.lstat] * 3)
+        self.assertEqual(3 * 1985, columns.to_numpy()["size"].sum())
+
+    def test_invalid_field(self):
+        with self.assertRaises(ValueError):
+            LStatColumns(fields=["size", "invalid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
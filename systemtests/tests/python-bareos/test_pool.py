@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+# -*- coding: utf-8 -*-
+import socket
+import threading
+import time
+import unittest
+
+import bareos.bsock
+import bareos.exceptions
+
+import bareos_unittest
+from bareos_unittest import FakeDirector
+
+
+class PythonBareosPoolTest(bareos_unittest.Base):
+    """
+    Tests DirectorConsolePool and reconnects against a fake director.
+    No running Bareos daemon is required.
+    """
+
+    results = {"list jobs": {"jobs": [{"jobid": "1"}]}}
+
+    def setUp(self):
+        super(PythonBareosPoolTest, self).setUp()
+        self.director = FakeDirector(results=self.results)
+        self.port = self.director.start()
+
+    def tearDown(self):
+        self.director.stop()
+        super(PythonBareosPoolTest, self).tearDown()
+
+    def get_pool(self, **kwargs):
+        return bareos.bsock.DirectorConsolePool(
+            port=self.port, password="secret", tls_psk_enable=False, **kwargs
+        )
+
+    def get_logins(self):
+        return self.director.commands.count(".api json compact=yes")
+
+    def test_reconnect(self):
+        console = bareos.bsock.DirectorConsoleJson(
+            port=self.port, password="secret", tls_psk_enable=False
+        )
+        self.assertEqual(1, console.max_reconnects)
+        self.director.disconnect()
+        self.assertEqual(self.results["list jobs"], console.call("list jobs"))
+        self.assertEqual(2, self.get_logins())
+        # no reconnects left
+        self.director.disconnect()
+        with self.assertRaises(bareos.exceptions.ConnectionLostError):
+            console.call("list jobs")
+
+    def test_reuse(self):
+        with self.get_pool(max_size=2) as pool:
+            for i in range(5):
+                with pool.connection() as console:
+                    self.assertEqual(
+                        self.results["list jobs"], console.call("list jobs")
+                    )
+            self.assertEqual(1, pool.size)
+            self.assertEqual(1, self.get_logins())
+
+    def test_min_size(self):
+        with self.get_pool(min_size=2, max_size=3) as pool:
+            self.assertEqual(2, pool.size)
+            self.assertEqual(2, self.get_logins())
+
+    def test_min_size_failure(self):
+        """
+        If one of the min_size connections fails,
+        the connections established before are closed.
+        """
+        consoles = []
+        closed = []
+
+        class FailingConsole(bareos.bsock.DirectorConsoleJson):
+            def __init__(self, **kwargs):
+                if len(consoles) == 2:
+                    raise socket.error("connection refused")
+                super(FailingConsole, self).__init__(**kwargs)
+                consoles.append(self)
+
+            def close(self):
+                # also called by __del__ of the failed console
+                if self in consoles:
+                    closed.append(self)
+                    super(FailingConsole, self).close()
+
+        with self.assertRaises(bareos.exceptions.ConnectionError):
+            self.get_pool(min_size=3, max_size=3, console_class=FailingConsole)
+        self.assertEqual(2, len(consoles))
+        self.assertEqual(consoles, closed)
+
+    def test_call(self):
+        with self.get_pool() as pool:
+            self.assertEqual(self.results["list jobs"], pool.call("list jobs"))
+            self.assertEqual(1, len(pool.idle))
+
+    def test_jsonrpc_error_keeps_connection(self):
+        with self.get_pool() as pool:
+            with self.assertRaises(bareos.exceptions.JsonRpcErrorReceivedException):
+                with pool.connection() as console:
+                    console.call("invalid command")
+            self.assertEqual(1, len(pool.idle))
+
+    def test_max_size(self):
+        with self.get_pool(max_size=2) as pool:
+            first = pool.checkout()
+            second = pool.checkout()
+            with self.assertRaises(bareos.exceptions.PoolTimeoutError):
+                pool.checkout(timeout=0.1)
+
+            # a waiting thread gets the connection returned by another thread
+            result = []
+            thread = threading.Thread(
+                target=lambda: result.append(pool.checkout(timeout=10))
+            )
+            thread.start()
+            time.sleep(0.1)
+            pool.checkin(first)
+            thread.join()
+            self.assertIs(first, result[0])
+            pool.checkin(result[0])
+            pool.checkin(second)
+            self.assertEqual(2, pool.size)
+
+    def test_idle_eviction(self):
+        with self.get_pool(min_size=1, idle_timeout=0.1) as pool:
+            consoles = [pool.checkout() for i in range(3)]
+            for console in consoles:
+                pool.checkin(console)
+            self.assertEqual(3, pool.size)
+            time.sleep(0.2)
+            self.assertEqual(2, pool.evict_idle())
+            self.assertEqual(1, pool.size)
+
+    def test_probe(self):
+        with self.get_pool(probe_interval=0) as pool:
+            with pool.connection() as console:
+                pass
+            # connection lost while idle, the probe reconnects
+            self.director.disconnect()
+            with pool.connection() as console:
+                self.assertEqual(self.results["list jobs"], console.call("list jobs"))
+            self.assertEqual(1, pool.size)
+
+    def test_concurrent(self):
+        threads = 8
+        calls = 20
+        errors = []
+
+        def worker(pool):
+            try:
+                for i in range(calls):
+                    with pool.connection() as console:
+                        console.call("list jobs")
+            except Exception as e:
+                errors.append(e)
+
+        with self.get_pool(max_size=3) as pool:
+            workers = [
+                threading.Thread(target=worker, args=(pool,)) for i in range(threads)
+            ]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            self.assertEqual([], errors)
+            self.assertLessEqual(pool.size, 3)
+            self.assertEqual(threads * calls, self.director.commands.count("list jobs"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,6 +36,7 @@ from bareos.bsock.protocolmessages import ProtocolMessages
 from bareos.bsock.protocolversions import ProtocolVersions
 from bareos.bsock.lowlevel import LowLevel
 import bareos.exceptions
+import bareos.util
 
 import bareos_unittest
 
@@ -98,3 +99,45 @@ class PythonBareosModuleTest(bareos_unittest.Base):
         md5 = password.md5()
         self.assertTrue(isinstance(md5, bytes))
         self.assertEqual(md5, b"5ebe2294ecd0e0f08eab7690d2a6ee69")
+
+    def test_base64_int(self):
+        base64 = bareos.util.BareosBase64()
+        for value, encoded in [
+            (0, "A"),
+            (1, "B"),
+            (63, "/"),
+            (64, "BA"),
+            (-65, "-BB"),
+            (1731435185, "BnM5qx"),
+        ]:
+            self.assertEqual(encoded, base64.int_to_base64(value))
+            self.assertEqual(value, base64.base64_to_int(encoded))
+            self.assertEqual(
+                value, bareos.util.BareosBase64.from_base64(encoded.encode())
+            )
+
+    def test_base64_bin(self):
+        # generated by the Bareos core BinToBase64()
+        data = bytes(range(0, 256, 17))
+        self.assertEqual(
+            b"ABEiM0RVZneImaq7zN3u/w",
+            bareos.util.BareosBase64.bin_to_base64(data, compatible=True),
+        )
+        self.assertEqual(
+            b"ABEiM0RVZn+Im6+7z9/u/D",
+            bareos.util.BareosBase64.bin_to_base64(data, compatible=False),
+        )
+        self.assertEqual(
+            bytearray(b"/D"), bareos.util.BareosBase64().string_to_base64(b"\xff")
+        )
+
+    def test_base64_decode_fields(self):
+        lstat = "A A IH/ B A A A BAA B BnM5qx BnM5qx BnM5qx A A C"
+        expected = [0, 0, 0o100777, 1, 0, 0, 0, 4096, 1]
+        expected += [1731435185, 1731435185, 1731435185, 0, 0, 2]
+        self.assertEqual(expected, bareos.util.BareosBase64.decode_fields(lstat))
+        self.assertEqual(
+            [expected, [], [-1, 64]],
+            bareos.util.BareosBase64.decode_fields_many([lstat, "", b"-B BA"]),
+        )
+        self.assertEqual([], bareos.util.BareosBase64.decode_fields_many([]))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Benchmark of the Bareos REST API against a fake director.
+
+Starts a fake director (answering every command after a delay),
+the REST API (uvicorn) and fires concurrent GET requests of multiple users.
+Reports requests per second and latency percentiles.
+
+No running Bareos daemon is required, only the Python modules
+of the REST API (fastapi, uvicorn, ...).
+
+To compare different versions of the REST API,
+run the benchmark with --restapi pointing to the different source trees, e.g.
+
+    ./benchmark.py --restapi /tmp/bareos-old/restapi
+    ./benchmark.py
+"""
+
+from __future__ import print_function
+from argparse import ArgumentParser
+import http.client
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+SOURCE_DIR = os.path.realpath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../../..")
+)
+sys.path.insert(0, os.path.join(SOURCE_DIR, "systemtests", "python-modules"))
+sys.path.insert(0, os.path.join(SOURCE_DIR, "python-bareos"))
+
+from bareos_unittest import FakeDirector
+
+API_INI = """\
+[Director]
+Name=bareos-dir
+Address=127.0.0.1
+Port={director_port}
+PoolSize={pool_size}
+
+[JWT]
+secret_key = {secret_key}
+algorithm = HS256
+access_token_expire_minutes = 30
+"""
+
+RESULTS = {
+    "llist clients": {
+        "clients": [
+            {"clientid": str(i), "name": "client{0}-fd".format(i)} for i in range(50)
+        ]
+    },
+    "list jobs": {"jobs": [{"jobid": str(i), "jobstatus": "T"} for i in range(100)]},
+    "list jobs count": {"jobs": [{"count": "100"}]},
+    "version": {"version": {"name": "bareos-dir", "version": "24.0.0", "os": "Linux"}},
+    "time": {"time": {"full": "2024-01-01 00:00:00"}},
+}
+
+
+def start_restapi(restapi_dir, workdir, port):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [restapi_dir, os.path.join(SOURCE_DIR, "python-bareos")]
+        + env.get("PYTHONPATH", "").split(os.pathsep)
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "bareos_restapi:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("REST API failed to start")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            connection.request("GET", "/openapi.json")
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("REST API did not start within 30 seconds")
+
+
+def login(port, username):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request(
+        "POST",
+        "/token",
+        urllib.parse.urlencode({"username": username, "password": "secret"}),
+        {"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        raise RuntimeError("login failed: {0} {1}".format(response.status, body))
+    return json.loads(body)["access_token"]
+
+
+def worker(port, token, endpoints, count, latencies, errors):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Authorization": "Bearer " + token}
+    for i in range(count):
+        endpoint = endpoints[i % len(endpoints)]
+        start = time.perf_counter()
+        try:
+            connection.request("GET", endpoint, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--restapi",
+        default=os.path.join(SOURCE_DIR, "restapi"),
+        help="Directory containing the bareos_restapi module. Default: %(default)s",
+    )
+    parser.add_argument("--port", type=int, default=8765, help="REST API port")
+    parser.add_argument("--users", type=int, default=4, help="Number of users")
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Concurrent requests per user"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=50, help="Requests per concurrent client"
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.05, help="Director delay per command (s)"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=16, help="Director connections per user"
+    )
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        help="Endpoint to request. Can be given multiple times. Default: /control/clients",
+    )
+    args = parser.parse_args()
+    endpoints = args.endpoint or ["/control/clients"]
+
+    director = FakeDirector(results=RESULTS, delay=args.delay)
+    director_port = director.start()
+    workdir = tempfile.mkdtemp()
+    with open(os.path.join(workdir, "api.ini"), "w") as api_ini:
+        api_ini.write(
+            API_INI.format(
+                director_port=director_port,
+                pool_size=args.pool_size,
+                secret_key=os.urandom(32).hex(),
+            )
+        )
+    restapi = start_restapi(os.path.realpath(args.restapi), workdir, args.port)
+    try:
+        tokens = [login(args.port, "user{0}".format(i)) for i in range(args.users)]
+        latencies = []
+        errors = []
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(args.port, token, endpoints, args.requests, latencies, errors),
+            )
+            for token in tokens
+            for i in range(args.concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+    finally:
+        restapi.terminate()
+        restapi.wait()
+        director.stop()
+        shutil.rmtree(workdir)
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    latencies.sort()
+    print("endpoints:        {0}".format(" ".join(endpoints)))
+    print(
+        "clients:          {0} users x {1} concurrent requests".format(
+            args.users, args.concurrency
+        )
+    )
+    print("director delay:   {0:.3f} s".format(args.delay))
+    print("requests:         {0}".format(len(latencies)))
+    print("errors:           {0}".format(len(errors)))
+    print("requests/s:       {0:.1f}".format(len(latencies) / duration))
+    print("latency p50:      {0:.3f} s".format(percentile(latencies, 0.50)))
+    print("latency p99:      {0:.3f} s".format(percentile(latencies, 0.99)))
+    # includes the startup of the REST API
+    print("REST API CPU:     {0:.3f} s".format(usage.ru_utime + usage.ru_stime))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
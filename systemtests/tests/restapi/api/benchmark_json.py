@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#   BAREOS - Backup Archiving REcovery Open Sourced
+#
+#   Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+#   This program is Free Software; you can redistribute it and/or
+#   modify it under the terms of version three of the GNU Affero General Public
+#   License as published by the Free Software Foundation and included
+#   in the file LICENSE.
+#
+#   This program is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+#   Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+#   02110-1301, USA.
+
+"""
+Benchmark of the JSON serialization of large REST API responses.
+
+Compares the ways a director result (llist jobs) can be turned into a response:
+
+- jsonable_encoder: decode the result, convert it by FastAPI's jsonable_encoder
+  and encode it by JSONResponse (what FastAPI does for returned dicts)
+- FastJSONResponse: decode the result and encode it by FastJSONResponse
+  (orjson, if installed)
+- RawJSONResponse: pass the undecoded result on
+
+No running Bareos daemon is required, only the Python modules
+of the REST API (fastapi, ...).
+"""
+
+from __future__ import print_function
+from argparse import ArgumentParser
+import importlib.util
+import json
+import os
+import sys
+import time
+
+SOURCE_DIR = os.path.realpath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../../..")
+)
+sys.path.insert(0, os.path.join(SOURCE_DIR, "python-bareos"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from bareos.bsock.directorconsolejson import DirectorConsoleJson
+
+# load the module directly, as the bareos_restapi package requires an api.ini
+spec = importlib.util.spec_from_file_location(
+    "responses", os.path.join(SOURCE_DIR, "restapi", "bareos_restapi", "responses.py")
+)
+responses = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(responses)
+
+
+def job(jobid):
+    return {
+        "jobid": str(jobid),
+        "job": "backup-client{0}-fd.2024-01-01_00.00.{1:05d}".format(
+            jobid % 100, jobid % 100000
+        ),
+        "name": "backup-client{0}-fd".format(jobid % 100),
+        "purgedfiles": "0",
+        "type": "B",
+        "level": "I",
+        "clientid": str(jobid % 100),
+        "client": "client{0}-fd".format(jobid % 100),
+        "jobstatus": "T",
+        "schedtime": "2024-01-01 00:00:00",
+        "starttime": "2024-01-01 00:00:01",
+        "endtime": "2024-01-01 00:10:00",
+        "realendtime": "2024-01-01 00:10:00",
+        "jobtdate": "1704067800",
+        "volsessionid": str(jobid),
+        "volsessiontime": "1704067000",
+        "jobfiles": "1234",
+        "jobbytes": "123456789",
+        "joberrors": "0",
+        "jobmissingfiles": "0",
+        "poolid": "3",
+        "poolname": "Incremental",
+        "priorjobid": "0",
+        "filesetid": "1",
+        "fileset": "LinuxAll",
+    }
+
+
+def director_result(jobs):
+    """
+    JSON-RPC result as sent by the director in compact mode.
+    """
+    envelope = {
+        "jsonrpc": "2.0",
+        "id": None,
+        "result": {"jobs": [job(i) for i in range(1, jobs + 1)]},
+    }
+    return bytearray(json.dumps(envelope, separators=(",", ":")), "utf-8")
+
+
+def jsonable_encoder_path(resultstring):
+    result = DirectorConsoleJson._get_result(
+        DirectorConsoleJson._parse_fullresult(resultstring)
+    )
+    content = jsonable_encoder({"totalItems": len(result["jobs"]), **result})
+    return JSONResponse(content).body
+
+
+def fast_json_response_path(resultstring):
+    result = DirectorConsoleJson._get_result(
+        DirectorConsoleJson._parse_fullresult(resultstring)
+    )
+    return responses.FastJSONResponse(
+        {"totalItems": len(result["jobs"]), **result}
+    ).body
+
+
+def raw_json_response_path(resultstring):
+    rawResult = DirectorConsoleJson._get_raw_result(resultstring)
+    return responses.RawJSONResponse.from_director_result(
+        rawResult, {"totalItems": "100000"}
+    ).body
+
+
+def measure(function, resultstring, repeat):
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        body = function(resultstring)
+        durations.append(time.perf_counter() - start)
+    return min(durations), len(body)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--jobs", type=int, default=100000, help="Number of jobs. Default: %(default)s"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Repetitions (the fastest is reported)"
+    )
+    args = parser.parse_args()
+
+    resultstring = director_result(args.jobs)
+    print("jobs:              {0}".format(args.jobs))
+    print("director result:   {0:.1f} MB".format(len(resultstring) / 1e6))
+    print("orjson:            {0}".format(responses.orjson is not None))
+    baseline = None
+    for name, function in [
+        ("jsonable_encoder", jsonable_encoder_path),
+        ("FastJSONResponse", fast_json_response_path),
+        ("RawJSONResponse", raw_json_response_path),
+    ]:
+        duration, size = measure(function, resultstring, args.repeat)
+        if baseline is None:
+            baseline = duration
+        print(
+            "{0:18} {1:8.3f} s {2:7.1f}x  ({3:.1f} MB)".format(
+                name + ":", duration, baseline / duration, size / 1e6
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/bin/bash
+
+#
+# BAREOS - Backup Archiving REcovery Open Sourced
+#
+# Copyright (C) 2024-2024 Bareos GmbH & Co. KG
+#
+# This program is Free Software; you can redistribute it and/or
+# modify it under the terms of version three of the GNU Affero General Public
+# License as published by the Free Software Foundation, which is
+# listed in the file LICENSE.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.
+#
+
+#
+# Fire concurrent GET requests of one user,
+# like a dashboard loading multiple endpoints at once,
+# and verify that every response is complete.
+#
+# $1: number of concurrent requests per endpoint
+# $2, $3, ...: pairs of endpoint_url and string to grep for
+#
+# REST_API_TOKEN: token of the user (optional)
+#
+
+set -e
+set -o pipefail
+set -u
+
+cd $(dirname "$BASH_SOURCE")
+. ../environment-local
+
+if [ -z "${REST_API_TOKEN:-}" ]; then
+  REST_API_TOKEN=$(./curl-auth.sh)
+fi
+
+concurrency="$1"
+shift
+
+outdir=$(mktemp -d)
+trap 'rm -rf "$outdir"' EXIT
+
+declare -A search
+pids=()
+n=0
+while [ $# -ge 2 ]; do
+  endpoint="$1"
+  for i in $(seq "$concurrency"); do
+    n=$((n + 1))
+    search[$n]="$2"
+    printf "%s\n" "$endpoint" >"$outdir/$n.endpoint"
+    curl --silent --show-error --write-out "\nHTTP_CODE=%{http_code}\n" \
+      -H "accept: application/json" \
+      -H "Authorization: Bearer $REST_API_TOKEN" \
+      -X GET "${REST_API_URL}/${endpoint}" >"$outdir/$n.out" 2>&1 &
+    pids+=($!)
+  done
+  shift 2
+done
+
+RC=0
+for pid in "${pids[@]}"; do
+  wait "$pid" || RC=1
+done
+
+failed=0
+for i in $(seq "$n"); do
+  if ! grep -q "^HTTP_CODE=200$" "$outdir/$i.out" \
+    || ! grep -q "${search[$i]}" "$outdir/$i.out"; then
+    failed=$((failed + 1))
+    printf "request %s (%s) failed:\n" "$i" "$(cat "$outdir/$i.endpoint")"
+    cat "$outdir/$i.out"
+  fi
+done
+
+printf "%d concurrent requests, %d failed\n" "$n" "$failed"
+if [ "$failed" -gt 0 ]; then
+  exit 1
+fi
+exit $RC